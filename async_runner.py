@@ -0,0 +1,248 @@
+# alma/async_runner.py
+
+from __future__ import annotations
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+
+from .cadence_layer import (
+    CadenceWindowEngine,
+    CadenceWindowMetrics,
+    RawSample,
+    window_to_cadence_point,
+)
+from .dejavu_layer import DejaVuEngine
+from .interpretation_layer import InterpretationResult, StreamingInterpreter
+from .pipeline import AlmaPipelineConfig
+
+
+# end-of-stream marker passed through the per-device queues
+_EOS = object()
+
+
+@dataclass
+class RunnerConfig:
+    """
+    Concurrency settings of the AsyncPipelineRunner.
+    """
+    sample_queue_size: int = 512       # per device, cadence stage input
+    window_queue_size: int = 64        # per device, Deja-Vu/interpretation input
+    result_queue_size: int = 4096      # shared output; 0 = unbounded
+    batch_size: int = 256              # max items drained per stage step
+    offload_min_windows: int = 16      # analyse larger batches in the executor
+
+
+class _DeviceAnalysis:
+    """
+    Deja-Vu + interpretation state of one device (bounded, see pipeline.py).
+    Only ever used by that device's analysis task, one batch at a time.
+    """
+
+    def __init__(self, config: AlmaPipelineConfig) -> None:
+        self.dejavu = DejaVuEngine(config.dejavu_config())
+        self.interpreter = StreamingInterpreter(config.interpretation_config())
+
+    def analyse(self, windows: List[CadenceWindowMetrics]) -> List[InterpretationResult]:
+        return [
+            self.interpreter.push(window_to_cadence_point(w), self.dejavu.push(w))
+            for w in windows
+        ]
+
+
+class _Device:
+    def __init__(self, device_id: str, config: AlmaPipelineConfig, runner_config: RunnerConfig) -> None:
+        self.device_id = device_id
+        self.samples: asyncio.Queue = asyncio.Queue(runner_config.sample_queue_size)
+        self.windows: asyncio.Queue = asyncio.Queue(runner_config.window_queue_size)
+        self.cadence = CadenceWindowEngine(config.cadence_config())
+        self.analysis = _DeviceAnalysis(config)
+        self.tasks: List[asyncio.Task] = []
+        self.closing = False
+        self.error: Optional[BaseException] = None     # first stage failure
+        self.ended = False                              # cadence took _EOS
+
+
+async def _drain(queue: asyncio.Queue, limit: int) -> list:
+    """
+    Wait for one item, then take whatever else is ready (up to `limit`).
+    """
+    items = [await queue.get()]
+    while len(items) < limit and items[-1] is not _EOS:
+        try:
+            items.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return items
+
+
+class AsyncPipelineRunner:
+    """
+    Asyncio runner for many concurrent device streams on one node
+    (hybrid topology, ARCHITECTURE_OVERVIEW §9.4.2).
+
+    Each device gets two tasks connected by bounded queues:
+
+        submit() -> [samples] -> cadence -> [windows] -> Deja-Vu +
+        interpretation -> [results, shared]
+
+    Full queues make the upstream await, so a slow consumer or an
+    expensive Deja-Vu search pushes back all the way to submit(). Window
+    batches of at least `offload_min_windows` are analysed in `executor`
+    (default: the loop's thread pool) so the event loop keeps serving
+    other devices. Per-device state is touched by one task at a time.
+
+    If a stage raises (e.g. samples out of time order), the device is
+    marked failed: its other stage is cancelled, pending and later
+    submit() calls and close_device() re-raise the exception, and the
+    other devices keep running.
+    """
+
+    def __init__(
+        self,
+        config: Optional[AlmaPipelineConfig] = None,
+        runner_config: Optional[RunnerConfig] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        self.config = config if config is not None else AlmaPipelineConfig()
+        self.runner_config = runner_config if runner_config is not None else RunnerConfig()
+        self.executor = executor
+        self._devices: Dict[str, _Device] = {}
+        self._results: asyncio.Queue = asyncio.Queue(self.runner_config.result_queue_size)
+        self._closed = False
+
+    def _device(self, device_id: str) -> _Device:
+        dev = self._devices.get(device_id)
+        if dev is None:
+            if self._closed:
+                raise RuntimeError("runner is closed")
+            dev = _Device(device_id, self.config, self.runner_config)
+            dev.tasks = [
+                asyncio.create_task(self._guard(dev, self._cadence_task)),
+                asyncio.create_task(self._guard(dev, self._analysis_task)),
+            ]
+            self._devices[device_id] = dev
+        elif dev.error is not None:
+            raise dev.error
+        elif dev.closing:
+            raise RuntimeError(f"device {device_id!r} is closing")
+        return dev
+
+    async def _guard(self, dev: _Device, stage: Callable[[_Device], Awaitable[None]]) -> None:
+        """
+        Run one stage; on failure record the error and stop the device.
+        """
+        try:
+            await stage(dev)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            if dev.error is not None:
+                return
+            dev.error = exc
+            current = asyncio.current_task()
+            for task in dev.tasks:
+                if task is not current:
+                    task.cancel()
+            # nothing feeds on the sample queue any more: discard it up to
+            # the end of stream so blocked submit() calls return (and raise)
+            while not dev.ended:
+                dev.ended = await dev.samples.get() is _EOS
+
+    async def _cadence_task(self, dev: _Device) -> None:
+        limit = self.runner_config.batch_size
+        while True:
+            batch = await _drain(dev.samples, limit)
+            done = dev.ended = batch[-1] is _EOS
+            if done:
+                batch.pop()
+            for s in batch:
+                for w in dev.cadence.push(s):
+                    await dev.windows.put(w)
+            if done:
+                for w in dev.cadence.flush():
+                    await dev.windows.put(w)
+                await dev.windows.put(_EOS)
+                return
+
+    async def _analysis_task(self, dev: _Device) -> None:
+        loop = asyncio.get_running_loop()
+        limit = self.runner_config.batch_size
+        while True:
+            batch = await _drain(dev.windows, limit)
+            done = batch[-1] is _EOS
+            if done:
+                batch.pop()
+            if len(batch) >= self.runner_config.offload_min_windows:
+                results = await loop.run_in_executor(self.executor, dev.analysis.analyse, batch)
+            else:
+                results = dev.analysis.analyse(batch)
+            for r in results:
+                await self._results.put((dev.device_id, r))
+            if done:
+                return
+
+    async def submit(self, device_id: str, sample: RawSample) -> None:
+        """
+        Queue one sample; waits while the device's sample queue is full.
+        """
+        dev = self._device(device_id)
+        await dev.samples.put(sample)
+        if dev.error is not None:
+            raise dev.error
+
+    async def ingest(self, device_id: str, stream: AsyncIterable[RawSample], close: bool = True) -> None:
+        """
+        Feed a whole async sample stream for one device.
+        """
+        async for sample in stream:
+            await self.submit(device_id, sample)
+        if close:
+            await self.close_device(device_id)
+
+    async def close_device(self, device_id: str) -> None:
+        """
+        End a device's stream: flush its open windows and wait until all of
+        its results are queued. Re-raises the error of a failed device.
+        """
+        dev = self._devices.get(device_id)
+        if dev is None:
+            return
+        try:
+            if not dev.closing:
+                dev.closing = True
+                await dev.samples.put(_EOS)
+            await asyncio.gather(*dev.tasks, return_exceptions=True)
+        finally:
+            self._devices.pop(device_id, None)
+        if dev.error is not None:
+            raise dev.error
+
+    async def results(self) -> AsyncIterator[Tuple[str, InterpretationResult]]:
+        """
+        (device_id, result) pairs as they are produced; ends after aclose().
+        """
+        while True:
+            item = await self._results.get()
+            if item is _EOS:
+                return
+            yield item
+
+    async def aclose(self) -> None:
+        """
+        Close every device, then end the results() iterator; re-raises the
+        first device error, if any.
+        """
+        self._closed = True
+        outcomes = await asyncio.gather(
+            *(self.close_device(d) for d in list(self._devices)),
+            return_exceptions=True,
+        )
+        await self._results.put(_EOS)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+
+    @property
+    def device_count(self) -> int:
+        return len(self._devices)
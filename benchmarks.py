@@ -0,0 +1,387 @@
+# alma/benchmarks.py
+"""
+Layered benchmarks for the core pipeline.
+
+Builds deterministic synthetic workloads (signal_generator) at several
+sizes and times each layer on its own and the whole
+Cadence -> Deja-Vu -> Interpretation chain. Each benchmark gets a warm-up run
+and is then timed over several repeats, each looping the workload for
+at least `min_time` seconds like timeit's autorange; throughput comes
+from the fastest repeat and latency percentiles from the median one, so
+one noisy run does not count as a regression. A fixed pure-Python
+reference loop is timed before every repeat; comparisons scale the
+baseline by the ratio of the two runs' reference times, so a machine
+that is uniformly slower today is not reported as a regression. Results
+are written as JSON; with --baseline the run is compared against a
+stored result file and regressions are reported (non-zero exit status).
+
+    python -m alma.benchmarks --sizes 1h,1d --output bench.json
+    python -m alma.benchmarks --baseline bench.json
+"""
+
+from __future__ import annotations
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from .cadence_layer import (
+    CadenceConfig,
+    CadenceWindowEngine,
+    RawSample,
+    build_cadence_windows,
+    windows_to_cadence_points,
+)
+from .codec import to_epoch_us
+from .dejavu_layer import DejaVuEngine, run_dejavu_pipeline
+from .event_log import format_timestamp
+from .interpretation_layer import InterpretationConfig, interpret_state
+from .pipeline import run_alma_core_pipeline
+from .request_auth import RequestVerifier
+from .signal_generator import generate_signals
+
+
+SIZES: Dict[str, int] = {
+    "1h": 60,
+    "1d": 24 * 60,
+    "30d": 30 * 24 * 60,
+}
+
+# a layer benchmark prepares its input once and returns (run, item count);
+# run() may record per-item latencies (ns) into the list it is given
+Prepared = Tuple[Callable[[List[int]], None], int]
+
+
+@dataclass
+class BenchResult:
+    name: str
+    size: str
+    items: int
+    seconds: float                     # per run, median over the repeats
+    throughput: float                  # items per second, fastest repeat
+    best_seconds: Optional[float] = None
+    repeats: int = 1
+    reference_seconds: Optional[float] = None   # fastest reference loop
+    peak_mb: Optional[float] = None
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+
+
+class _Discard(list):
+    """
+    Latency sink for the memory pass, so recording does not show up as
+    allocation.
+    """
+
+    def append(self, item) -> None:
+        pass
+
+
+def _percentile(sorted_ns: Sequence[int], q: float) -> float:
+    idx = min(len(sorted_ns) - 1, max(0, round(q * (len(sorted_ns) - 1))))
+    return sorted_ns[idx] / 1e6
+
+
+def _reference_seconds() -> float:
+    """
+    Time a fixed interpreter-bound loop, as a measure of machine speed.
+    """
+    t0 = time.perf_counter()
+    total = 0
+    for i in range(100_000):
+        total += i * i
+    return time.perf_counter() - t0
+
+
+def _samples(minutes: int, seed: int) -> List[RawSample]:
+    return generate_signals(n_wearers=1, minutes=minutes, seed=seed).raw_samples(0)
+
+
+def _prepare_cadence(samples: List[RawSample]) -> Prepared:
+    def run(latencies: List[int]) -> None:
+        engine = CadenceWindowEngine(CadenceConfig())
+        clock = time.perf_counter_ns
+        for s in samples:
+            t0 = clock()
+            engine.push(s)
+            latencies.append(clock() - t0)
+        engine.flush()
+    return run, len(samples)
+
+
+def _prepare_dejavu(samples: List[RawSample]) -> Prepared:
+    windows = build_cadence_windows(samples)
+
+    def run(latencies: List[int]) -> None:
+        engine = DejaVuEngine()
+        clock = time.perf_counter_ns
+        for w in windows:
+            t0 = clock()
+            engine.push(w)
+            latencies.append(clock() - t0)
+    return run, len(windows)
+
+
+def _prepare_interpretation(samples: List[RawSample]) -> Prepared:
+    windows = build_cadence_windows(samples)
+    points = windows_to_cadence_points(windows)
+    summaries = run_dejavu_pipeline(windows)
+
+    config = InterpretationConfig()
+
+    def run(latencies: List[int]) -> None:
+        # one batch call; no per-item latency to report
+        interpret_state(points, windows, summaries, config)
+    return run, len(points)
+
+
+def _prepare_chain(samples: List[RawSample]) -> Prepared:
+    # items are windows (one result each), matching the latency samples
+    windows = len(build_cadence_windows(samples))
+
+    def run(latencies: List[int]) -> None:
+        # latency = time from the previous result to the next one
+        clock = time.perf_counter_ns
+        produced = 0
+        t0 = clock()
+        for _ in run_alma_core_pipeline(samples):
+            t1 = clock()
+            latencies.append(t1 - t0)
+            t0 = t1
+            produced += 1
+        if produced != windows:
+            raise RuntimeError(f"chain benchmark produced {produced} results for {windows} windows")
+    return run, windows
+
+
+def _prepare_verify(samples: List[RawSample]) -> Prepared:
+    # one signed request per sample, sent at the sample's time and spread
+    # over 1000 clients; the verifier's clock follows the requests, so
+    # replay buckets hold a realistic few seconds of traffic. The run is
+    # single-threaded, so throughput is the verification rate per core.
+    secrets = {f"client-{i}": f"secret-{i}".encode() for i in range(1000)}
+    signer = RequestVerifier(secrets)
+    requests = []
+    for i, s in enumerate(samples):
+        client = f"client-{i % 1000}"
+        timestamp = format_timestamp(s.timestamp)
+        payload = f'{{"hr":{s.hr_bpm:.1f},"seq":{i}}}'.encode()
+        sent = to_epoch_us(s.timestamp) / 1e6
+        requests.append((sent, client, timestamp, signer.sign(client, timestamp, payload), payload))
+
+    def run(latencies: List[int]) -> None:
+        now = [0.0]
+        verifier = RequestVerifier(secrets, clock=lambda: now[0])
+        clock = time.perf_counter_ns
+        for sent, client, ts, signature, payload in requests:
+            now[0] = sent
+            t0 = clock()
+            error = verifier.verify(client, ts, signature, payload)
+            latencies.append(clock() - t0)
+            if error is not None:
+                raise RuntimeError(f"verify benchmark rejected a valid request: {error}")
+    return run, len(requests)
+
+
+BENCHMARKS: Dict[str, Callable[[List[RawSample]], Prepared]] = {
+    "cadence": _prepare_cadence,
+    "dejavu": _prepare_dejavu,
+    "interpretation": _prepare_interpretation,
+    "chain": _prepare_chain,
+    "verify": _prepare_verify,
+}
+
+
+def run_benchmark(
+    name: str,
+    size: str,
+    samples: List[RawSample],
+    measure_memory: bool = True,
+    repeats: int = 5,
+    warmup: int = 1,
+    min_time: float = 0.2,
+) -> BenchResult:
+    """
+    Time `warmup` untimed runs, then `repeats` timed ones of `loops` runs
+    each, where `loops` is the smallest power of two that makes a repeat
+    last `min_time` seconds. Seconds and latency percentiles are medians
+    over the repeats; throughput is from the fastest one.
+    """
+    if repeats < 1:
+        raise ValueError("repeats must be >= 1")
+    run, items = BENCHMARKS[name](samples)
+    loops = 1
+    for i in range(max(1, warmup)):
+        t0 = time.perf_counter()
+        run([])
+        once = time.perf_counter() - t0
+        if i == 0:
+            while once * loops < min_time:
+                loops *= 2
+
+    seconds: List[float] = []
+    reference: List[float] = []
+    percentiles: Dict[float, List[float]] = {0.50: [], 0.95: [], 0.99: []}
+    for _ in range(repeats):
+        latencies: List[int] = []
+        reference.append(_reference_seconds())
+        gc.collect()
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            run(latencies)
+        seconds.append((time.perf_counter() - t0) / loops)
+        if latencies:
+            latencies.sort()
+            for q, values in percentiles.items():
+                values.append(_percentile(latencies, q))
+
+    best = min(seconds)
+    result = BenchResult(
+        name=name,
+        size=size,
+        items=items,
+        seconds=statistics.median(seconds),
+        throughput=items / best if best > 0 else float("inf"),
+        best_seconds=best,
+        repeats=repeats,
+        reference_seconds=min(reference),
+    )
+    if percentiles[0.50]:
+        result.p50_ms = statistics.median(percentiles[0.50])
+        result.p95_ms = statistics.median(percentiles[0.95])
+        result.p99_ms = statistics.median(percentiles[0.99])
+
+    if measure_memory:
+        # separate pass: tracemalloc slows allocation-heavy code down
+        gc.collect()
+        tracemalloc.start()
+        run(_Discard())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result.peak_mb = peak / (1024 * 1024)
+
+    return result
+
+
+def run_suite(
+    sizes: Sequence[str] = ("1h", "1d"),
+    names: Sequence[str] = tuple(BENCHMARKS),
+    seed: int = 42,
+    measure_memory: bool = True,
+    repeats: int = 5,
+    warmup: int = 1,
+    min_time: float = 0.2,
+) -> List[BenchResult]:
+    results: List[BenchResult] = []
+    for size in sizes:
+        samples = _samples(SIZES[size], seed)
+        for name in names:
+            results.append(run_benchmark(
+                name, size, samples, measure_memory, repeats, warmup, min_time,
+            ))
+    return results
+
+
+def compare(
+    current: Sequence[BenchResult],
+    baseline: Sequence[BenchResult],
+    tolerance: float = 0.2,
+) -> List[str]:
+    """
+    Regressions of `current` against `baseline`: lower throughput, or higher
+    p99 latency or peak memory, by more than `tolerance` (relative).
+    Throughput is best-of-repeats and p99 the median repeat on both sides;
+    when both runs timed the reference loop, the baseline's throughput and
+    p99 are first scaled to the current machine speed.
+    """
+    base = {(b.name, b.size): b for b in baseline}
+    regressions: List[str] = []
+    for cur in current:
+        ref = base.get((cur.name, cur.size))
+        if ref is None:
+            continue
+        key = f"{cur.name}/{cur.size}"
+        slowdown = 1.0
+        if cur.reference_seconds and ref.reference_seconds:
+            slowdown = cur.reference_seconds / ref.reference_seconds
+        expected = ref.throughput / slowdown
+        if cur.throughput < expected * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {cur.throughput:.0f}/s < baseline {expected:.0f}/s"
+            )
+        for field, scale in (("p99_ms", slowdown), ("peak_mb", 1.0)):
+            now, then = getattr(cur, field), getattr(ref, field)
+            if now is not None and then is not None and now > then * scale * (1 + tolerance):
+                regressions.append(f"{key}: {field} {now:.3f} > baseline {then * scale:.3f}")
+    return regressions
+
+
+def save_results(path: str, results: Sequence[BenchResult]) -> None:
+    payload = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [asdict(r) for r in results],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+def load_results(path: str) -> List[BenchResult]:
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+    return [BenchResult(**r) for r in payload["results"]]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Alma core pipeline benchmarks")
+    parser.add_argument("--sizes", default="1h,1d", help=f"comma list of {', '.join(SIZES)}")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma list of benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--baseline", default=None, help="compare against a stored result file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed repeat")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    args = parser.parse_args(argv)
+
+    results = run_suite(
+        sizes=args.sizes.split(","),
+        names=args.only.split(","),
+        seed=args.seed,
+        measure_memory=not args.no_memory,
+        repeats=args.repeats,
+        warmup=args.warmup,
+        min_time=args.min_time,
+    )
+
+    print(f"{'benchmark':<16}{'size':<6}{'items':>10}{'items/s':>14}{'peak MB':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for r in results:
+        fmt = lambda v: "-" if v is None else f"{v:.3f}"
+        print(
+            f"{r.name:<16}{r.size:<6}{r.items:>10}{r.throughput:>14.0f}"
+            f"{fmt(r.peak_mb):>10}{fmt(r.p50_ms):>10}{fmt(r.p99_ms):>10}"
+        )
+
+    if args.output:
+        save_results(args.output, results)
+
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
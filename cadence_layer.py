@@ -1,238 +1,201 @@
-
-# alma/dejavu_layer.py
+# alma/cadence_layer.py
 
 from __future__ import annotations
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Optional, Literal, Tuple
+from typing import Deque, Iterable, List, Optional
 from datetime import datetime, timedelta
-from .cadence_layer import CadencePoint, CadenceWindowMetrics
 import math
 
 
 Number = float
 
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
 
 @dataclass
-class DejaVuConfig:
+class RawSample:
     """
-    Configuration for the Deja-Vu mechanism.
-
-    This is intentionally simple for now and can be tuned later
-    without breaking the API.
+    One raw reading from the device.
     """
-    window_minutes: int = 10
-    min_history_minutes: int = 60          # how far back we need history
-    min_gap_minutes: int = 15              # avoid matching with the immediate past
-    similarity_threshold: Number = 0.8     # 0–1, higher = stricter
-    min_confidence_mean: Number = 0.6      # ignore low-confidence windows
-    max_matches_per_window: int = 3        # to avoid flooding
+    timestamp: datetime
+    hr_bpm: Number
+    rr_ms: Number
+    accel_mg: Number
+    signal_quality: Number              # 0–1
+    battery_pct: Optional[Number] = None
 
 
 @dataclass
-class DejaVuFeatureVector:
+class CadencePoint:
     """
-    Feature representation of a window, ready for similarity comparison.
+    Compact per-window point consumed by the interpretation layer.
     """
-    timestamp: datetime           # window_end or representative time
+    timestamp: datetime                 # window_end
     hr_mean: Optional[Number]
     hrv_rmssd: Optional[Number]
-    movement_mean: Optional[Number]
-    confidence_mean: Number
+    movement_level: Optional[Number]
+    confidence: Number
 
 
 @dataclass
-class DejaVuMatch:
+class CadenceWindowMetrics:
     """
-    One deja-vu match: current window vs a similar past window.
+    Aggregated metrics of one cadence window.
     """
-    current_time: datetime
-    past_time: datetime
-    similarity: Number            # 0–1
-    duration_minutes: int
-    notes: Optional[str] = None   # e.g. "calm repeated", "overload pattern"
+    window_start: datetime
+    window_end: datetime
+    hr_mean: Optional[Number]
+    hrv_rmssd: Optional[Number]         # RMSSD of successive RR intervals (ms)
+    movement_mean: Optional[Number]
+    confidence_mean: Number             # mean signal quality, 0–1
 
 
 @dataclass
-class DejaVuSummary:
+class CadenceConfig:
     """
-    High-level summary for a given time window.
+    Windowing configuration (CADENCE_LAYER_SPEC §2.3, §5.1).
     """
-    window_start: datetime
-    window_end: datetime
-    matches: List[DejaVuMatch]
-    strongest_match: Optional[DejaVuMatch]
+    window_size: Number = 120.0         # seconds
+    step_size: Number = 120.0           # seconds; < window_size gives overlap
+    min_signal_quality: Number = 0.7    # samples below this only count for confidence
 
 
-def _window_to_feature_vector(
-    window: CadenceWindowMetrics
-) -> Optional[DejaVuFeatureVector]:
+class _OpenWindow:
     """
-    Convert a CadenceWindowMetrics into a compact feature vector.
-    Return None if window is too low-confidence to be used.
+    Running sums of one window that has not closed yet.
     """
-    if window.confidence_mean < 0.6:   # config.min_confidence_mean would be nicer, but signature fixed
-        return None
-    return DejaVuFeatureVector(
-        timestamp=window.window_end,
-        hr_mean=window.hr_mean,
-        hrv_rmssd=window.hrv_rmssd,
-        movement_mean=window.movement_mean,
-        confidence_mean=window.confidence_mean
+    __slots__ = (
+        "index", "n", "quality_sum",
+        "hr_sum", "acc_sum", "good_n",
+        "ssd_sum", "ssd_n", "last_rr",
     )
 
-
-def _vector_distance(a: DejaVuFeatureVector, b: DejaVuFeatureVector) -> Number:
-    """
-    Compute a distance between two feature vectors.
-    Use a simple numeric distance (e.g. normalized Euclidean)
-    over available fields, skipping those that are None.
-    """
-    fields = ['hr_mean', 'hrv_rmssd', 'movement_mean', 'confidence_mean']
-    diffs = []
-    for f in fields:
-        va = getattr(a, f)
-        vb = getattr(b, f)
-        if va is not None and vb is not None:
-            # normalise each to [0,1] range using a gentle sigmoid
-            # (confidence already in [0,1])
-            if f == 'confidence_mean':
-                diffs.append(va - vb)
-            else:
-                # tanh clamp to [-1,1] then scale to unit interval
-                na = math.tanh(va)
-                nb = math.tanh(vb)
-                diffs.append(na - nb)
-    if not diffs:
-        return 1e6   # large distance if no comparable fields
-    return math.sqrt(sum(d * d for d in diffs) / len(diffs))
-
-
-def _distance_to_similarity(distance: Number) -> Number:
-    """
-    Map a non-negative distance to [0, 1] similarity score.
-    Smaller distance -> higher similarity.
-    """
-    return max(0.0, min(1.0, 1.0 / (1.0 + distance)))
-
-
-def build_feature_history(
-    windows: List[CadenceWindowMetrics],
-    config: DejaVuConfig
-) -> List[DejaVuFeatureVector]:
-    """
-    Pre-compute feature vectors for all windows that are good enough
-    to be used as history.
-    """
-    hist = []
-    for w in windows:
-        fv = _window_to_feature_vector(w)
-        if fv is not None:
-            hist.append(fv)
-    return hist
-
-
-def find_dejavu_for_window(
-    current: CadenceWindowMetrics,
-    history: List[DejaVuFeatureVector],
-    config: DejaVuConfig
-) -> DejaVuSummary:
-    """
-    For a given current window, search history for similar past windows.
-
-    Rules:
-    - skip history points that are:
-        * too recent (within min_gap_minutes)
-        * too far (before min_history_minutes, if we want to restrict)
-    - compute similarity to all remaining history vectors
-    - keep only those >= similarity_threshold
-    - sort by similarity desc
-    - truncate to max_matches_per_window
-    """
-    current_fv = _window_to_feature_vector(current)
-    if current_fv is None:
-        return DejaVuSummary(
-            window_start=current.window_start,
-            window_end=current.window_end,
-            matches=[],
-            strongest_match=None
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.n = 0
+        self.quality_sum = 0.0
+        self.hr_sum = 0.0
+        self.acc_sum = 0.0
+        self.good_n = 0
+        self.ssd_sum = 0.0
+        self.ssd_n = 0
+        self.last_rr: Optional[Number] = None
+
+
+class CadenceWindowEngine:
+    """
+    Sliding-window aggregation of raw samples.
+
+    Windows start every `step_size` seconds from the first sample and span
+    `window_size` seconds. Every open window keeps running sums (HR,
+    movement, confidence and the squared successive RR differences for
+    RMSSD), so a sample costs O(window_size / step_size) no matter how
+    many samples a window holds. Windows that received no samples are
+    not emitted. Samples must arrive in time order.
+    """
+
+    def __init__(self, config: Optional[CadenceConfig] = None) -> None:
+        if config is None:
+            config = CadenceConfig()
+        if config.window_size <= 0 or config.step_size <= 0:
+            raise ValueError("window_size and step_size must be positive")
+        self.config = config
+        self._size_us = round(config.window_size * 1e6)
+        self._step_us = round(config.step_size * 1e6)
+        self._origin: Optional[datetime] = None
+        self._last_us = -1
+        self._next_index = 0
+        self._open: Deque[_OpenWindow] = deque()
+
+    def _close(self, w: _OpenWindow) -> CadenceWindowMetrics:
+        start = self._origin + timedelta(microseconds=w.index * self._step_us)
+        good = w.good_n
+        return CadenceWindowMetrics(
+            window_start=start,
+            window_end=start + timedelta(microseconds=self._size_us),
+            hr_mean=w.hr_sum / good if good else None,
+            hrv_rmssd=math.sqrt(w.ssd_sum / w.ssd_n) if w.ssd_n else None,
+            movement_mean=w.acc_sum / good if good else None,
+            confidence_mean=w.quality_sum / w.n,
         )
 
-    now = current_fv.timestamp
-    gap = timedelta(minutes=config.min_gap_minutes)
-    min_age = timedelta(minutes=config.min_history_minutes)
-
-    matches: List[DejaVuMatch] = []
-    for past_fv in history:
-        age = now - past_fv.timestamp
-        if age < gap:
-            continue
-        if age > min_age:
-            continue   # could be relaxed later; here we obey the config names
-        sim = _distance_to_similarity(_vector_distance(current_fv, past_fv))
-        if sim >= config.similarity_threshold:
-            matches.append(
-                DejaVuMatch(
-                    current_time=now,
-                    past_time=past_fv.timestamp,
-                    similarity=sim,
-                    duration_minutes=config.window_minutes,
-                    notes=None
-                )
-            )
-
-    # sort desc
-    matches.sort(key=lambda m: m.similarity, reverse=True)
-    matches = matches[:config.max_matches_per_window]
-
-    strongest = matches[0] if matches else None
-    return DejaVuSummary(
-        window_start=current.window_start,
-        window_end=current.window_end,
-        matches=matches,
-        strongest_match=strongest
+    def push(self, sample: RawSample) -> List[CadenceWindowMetrics]:
+        """
+        Add one sample; returns the windows it closed, oldest first.
+        """
+        if self._origin is None:
+            self._origin = sample.timestamp
+        t = (sample.timestamp - self._origin) // _ONE_MICROSECOND
+        if t < self._last_us:
+            raise ValueError("samples must arrive in time order")
+        self._last_us = t
+
+        closed: List[CadenceWindowMetrics] = []
+        size, step = self._size_us, self._step_us
+        while self._open and self._open[0].index * step + size <= t:
+            closed.append(self._close(self._open.popleft()))
+
+        # open every window that covers t (empty ones in between are skipped)
+        first = (t - size) // step + 1
+        last = t // step
+        for index in range(max(first, self._next_index), last + 1):
+            self._open.append(_OpenWindow(index))
+        self._next_index = max(self._next_index, last + 1)
+
+        good = sample.signal_quality >= self.config.min_signal_quality
+        for w in self._open:
+            w.n += 1
+            w.quality_sum += sample.signal_quality
+            if good:
+                w.good_n += 1
+                w.hr_sum += sample.hr_bpm
+                w.acc_sum += sample.accel_mg
+                if w.last_rr is not None:
+                    d = sample.rr_ms - w.last_rr
+                    w.ssd_sum += d * d
+                    w.ssd_n += 1
+                w.last_rr = sample.rr_ms
+
+        return closed
+
+    def flush(self) -> List[CadenceWindowMetrics]:
+        """
+        Close all remaining windows, e.g. at the end of a recording.
+        """
+        closed = [self._close(w) for w in self._open]
+        self._open.clear()
+        return closed
+
+
+def build_cadence_windows(
+    samples: Iterable[RawSample],
+    config: Optional[CadenceConfig] = None,
+) -> List[CadenceWindowMetrics]:
+    """
+    Slice a time-ordered sample series into cadence windows.
+    """
+    engine = CadenceWindowEngine(config)
+    windows: List[CadenceWindowMetrics] = []
+    for s in samples:
+        windows.extend(engine.push(s))
+    windows.extend(engine.flush())
+    return windows
+
+
+def window_to_cadence_point(window: CadenceWindowMetrics) -> CadencePoint:
+    return CadencePoint(
+        timestamp=window.window_end,
+        hr_mean=window.hr_mean,
+        hrv_rmssd=window.hrv_rmssd,
+        movement_level=window.movement_mean,
+        confidence=window.confidence_mean,
     )
 
 
-def run_dejavu_pipeline(
-    windows: List[CadenceWindowMetrics],
-    config: Optional[DejaVuConfig] = None
-) -> List[DejaVuSummary]:
+def windows_to_cadence_points(windows: Iterable[CadenceWindowMetrics]) -> List[CadencePoint]:
     """
-    High-level pipeline:
-
-    INPUT:
-        - list of CadenceWindowMetrics (sorted by time)
-    OUTPUT:
-        - list of DejaVuSummary, one per window, possibly with 0+ matches
-
-    This is the main entry point higher layers will use.
+    One cadence point per window, stamped with window_end so the
+    interpretation layer can line it up with Deja-Vu summaries.
     """
-    if config is None:
-        config = DejaVuConfig()
-
-    summaries: List[DejaVuSummary] = []
-    history: List[DejaVuFeatureVector] = []
-
-    # build history incrementally (only windows *before* current)
-    for i, w in enumerate(windows):
-        # minimal history requirement: at least one window older than min_gap
-        # we cheat by using index: once we have a few windows we start
-        if i == 0:
-            summaries.append(
-                DejaVuSummary(window_start=w.window_start, window_end=w.window_end, matches=[], strongest_match=None)
-            )
-            fv = _window_to_feature_vector(w)
-            if fv is not None:
-                history.append(fv)
-            continue
-
-        # use history *so far* (strictly past windows)
-        summary = find_dejavu_for_window(w, history, config)
-        summaries.append(summary)
-
-        # add current to history for next iterations
-        fv = _window_to_feature_vector(w)
-        if fv is not None:
-            history.append(fv)
-
-    return summaries
+    return [window_to_cadence_point(w) for w in windows]
@@ -0,0 +1,40 @@
+# alma/codec.py
+
+from __future__ import annotations
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import math
+
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_us(ts: datetime) -> int:
+    """
+    Microseconds since the Unix epoch. Naive timestamps are taken as UTC
+    (the layers use datetime.utcnow()).
+    """
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return (ts - EPOCH) // _ONE_MICROSECOND
+
+
+def from_epoch_us(us: int, tz_aware: bool = False) -> datetime:
+    """
+    Inverse of to_epoch_us: a naive UTC datetime, or a UTC-aware one.
+    """
+    return (EPOCH_UTC if tz_aware else EPOCH) + timedelta(microseconds=us)
+
+
+def encode_optional(v: Optional[float]) -> float:
+    """
+    Optional float for a float64 column: None becomes NaN.
+    """
+    return math.nan if v is None else v
+
+
+def decode_optional(v: float) -> Optional[float]:
+    return None if math.isnan(v) else v
@@ -0,0 +1,195 @@
+# alma/dejavu_batch.py
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+from datetime import datetime, timedelta
+import math
+
+import numpy as np
+
+from .cadence_layer import CadenceWindowMetrics
+from .dejavu_layer import (
+    DejaVuConfig,
+    DejaVuMatch,
+    DejaVuSummary,
+)
+
+
+# column order of the feature matrix; the last column is not tanh-normalised
+FEATURE_COLUMNS = ("hr_mean", "hrv_rmssd", "movement_mean", "confidence_mean")
+
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+@dataclass
+class FeatureMatrix:
+    """
+    Columnar view of a window series, ready for vectorised comparison.
+
+    `coords` holds the normalised feature columns (tanh for signed fields,
+    clamped to [0, 1] for confidence) with NaN for missing values.
+    `offsets_us` are window_end timestamps as integer microseconds relative
+    to the first window, so age comparisons stay exact.
+    `eligible` marks windows that pass the confidence filter.
+    """
+    timestamps: List[datetime]
+    offsets_us: np.ndarray        # int64, shape (n,)
+    coords: np.ndarray            # float64, shape (n, 4)
+    eligible: np.ndarray          # bool, shape (n,)
+
+
+def _normalise(value: Optional[float], signed: bool) -> float:
+    if value is None:
+        return math.nan
+    # same scalar functions as _vector_distance, so results are bit-identical
+    if signed:
+        return math.tanh(value)
+    return max(0.0, min(1.0, value))
+
+
+def build_feature_matrix(
+    windows: Sequence[CadenceWindowMetrics],
+    config: Optional[DejaVuConfig] = None,
+) -> FeatureMatrix:
+    """
+    Convert windows into a FeatureMatrix (one row per window, in input order).
+    Rows that fail the confidence filter are kept but marked not eligible.
+    """
+    if config is None:
+        config = DejaVuConfig()
+
+    n = len(windows)
+    coords = np.empty((n, len(FEATURE_COLUMNS)), dtype=np.float64)
+    offsets = np.empty(n, dtype=np.int64)
+    eligible = np.empty(n, dtype=bool)
+    timestamps: List[datetime] = []
+
+    origin = windows[0].window_end if n else None
+    for i, w in enumerate(windows):
+        timestamps.append(w.window_end)
+        offsets[i] = (w.window_end - origin) // _ONE_MICROSECOND
+        eligible[i] = w.confidence_mean >= config.min_confidence_mean
+        coords[i, 0] = _normalise(w.hr_mean, True)
+        coords[i, 1] = _normalise(w.hrv_rmssd, True)
+        coords[i, 2] = _normalise(w.movement_mean, True)
+        coords[i, 3] = _normalise(w.confidence_mean, False)
+
+    return FeatureMatrix(
+        timestamps=timestamps,
+        offsets_us=offsets,
+        coords=coords,
+        eligible=eligible,
+    )
+
+
+def _block_similarities(current: np.ndarray, past: np.ndarray) -> np.ndarray:
+    """
+    NaN-aware RMS distance -> similarity for a block of rows vs columns.
+    Mirrors _vector_distance / _distance_to_similarity, field by field,
+    so the accumulation order (and the result) matches the scalar path.
+    """
+    total = np.zeros((current.shape[0], past.shape[0]), dtype=np.float64)
+    count = np.zeros(total.shape, dtype=np.int64)
+    for j in range(current.shape[1]):
+        diff = current[:, j, None] - past[None, :, j]
+        present = ~np.isnan(diff)
+        total += np.where(present, diff * diff, 0.0)
+        count += present
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distance = np.sqrt(total / count)
+    distance[count == 0] = 1e9
+    return np.clip(1.0 / (1.0 + distance), 0.0, 1.0)
+
+
+def run_dejavu_pipeline_batch(
+    windows: Sequence[CadenceWindowMetrics],
+    config: Optional[DejaVuConfig] = None,
+    block_size: int = 256,
+) -> List[DejaVuSummary]:
+    """
+    Vectorised equivalent of run_dejavu_pipeline.
+
+    Windows are processed in blocks of `block_size` rows; each block is
+    compared against all earlier windows at once. Windows sorted by
+    window_end (the normal case) also restrict the compared columns to the
+    [now - min_history, now - min_gap] range of the block.
+    Produces the same list of DejaVuSummary as run_dejavu_pipeline.
+    """
+    if config is None:
+        config = DejaVuConfig()
+
+    n = len(windows)
+    if n == 0:
+        return []
+
+    fm = build_feature_matrix(windows, config)
+    gap_us = timedelta(minutes=config.min_gap_minutes) // _ONE_MICROSECOND
+    min_age_us = timedelta(minutes=config.min_history_minutes) // _ONE_MICROSECOND
+    k = config.max_matches_per_window
+    is_sorted = bool(np.all(np.diff(fm.offsets_us) >= 0))
+
+    # a summary is produced once at least one earlier window was eligible
+    has_history = np.zeros(n, dtype=bool)
+    has_history[1:] = np.cumsum(fm.eligible)[:-1] > 0
+
+    summaries: List[DejaVuSummary] = []
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        rows = np.arange(start, stop)
+        now = fm.offsets_us[rows]
+
+        if is_sorted:
+            col_lo = int(np.searchsorted(fm.offsets_us, now[0] - min_age_us, side="left"))
+            col_hi = int(np.searchsorted(fm.offsets_us, now[-1] - gap_us, side="right"))
+            col_hi = min(col_hi, stop - 1)
+        else:
+            col_lo, col_hi = 0, stop - 1
+        cols = np.arange(col_lo, max(col_lo, col_hi))
+
+        if cols.size:
+            age = now[:, None] - fm.offsets_us[None, cols]
+            mask = (
+                (cols[None, :] < rows[:, None])
+                & fm.eligible[None, cols]
+                & fm.eligible[rows, None]
+                & (age >= gap_us)
+                & (age <= min_age_us)
+            )
+            sims = _block_similarities(fm.coords[rows], fm.coords[cols])
+            mask &= sims >= config.similarity_threshold
+        else:
+            mask = np.zeros((rows.size, 0), dtype=bool)
+            sims = np.zeros((rows.size, 0), dtype=np.float64)
+
+        for r, i in enumerate(rows):
+            if not has_history[i]:
+                continue
+            w = windows[i]
+            hits = np.flatnonzero(mask[r])
+            matches: List[DejaVuMatch] = []
+            if hits.size and k > 0:
+                # similarity desc, then history order (stable, like list.sort)
+                order = np.lexsort((hits, -sims[r, hits]))[:k]
+                now_ts = fm.timestamps[i]
+                for h in hits[order]:
+                    matches.append(
+                        DejaVuMatch(
+                            current_time=now_ts,
+                            past_time=fm.timestamps[cols[h]],
+                            similarity=float(sims[r, h]),
+                            duration_minutes=config.window_minutes,
+                            notes=None,
+                        )
+                    )
+            summaries.append(
+                DejaVuSummary(
+                    window_start=w.window_start,
+                    window_end=w.window_end,
+                    matches=matches,
+                    strongest_match=matches[0] if matches else None,
+                )
+            )
+
+    return summaries
@@ -0,0 +1,157 @@
+# alma/dejavu_fleet.py
+
+from __future__ import annotations
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+import os
+import struct
+import time
+
+from .cadence_layer import CadenceWindowMetrics
+from .codec import decode_optional, encode_optional, from_epoch_us, to_epoch_us
+from .dejavu_layer import DejaVuConfig, DejaVuSummary, run_dejavu_pipeline
+
+
+@dataclass
+class WorkerTiming:
+    """
+    Work done by one pool process during a fleet run.
+    """
+    worker_pid: int
+    users: int
+    windows: int
+    seconds: float
+
+
+@dataclass
+class FleetResult:
+    summaries: Dict[str, List[DejaVuSummary]]
+    worker_timings: List[WorkerTiming]
+    wall_seconds: float
+
+
+_COUNT = struct.Struct("<q")
+
+
+def _pack_windows(windows: Sequence[CadenceWindowMetrics]) -> bytes:
+    """
+    Columnar encoding of a window list: a row count followed by two int64
+    timestamp columns and four float64 feature columns (NaN = missing).
+    One bytes object pickles as a single buffer copy instead of one object
+    graph per window.
+    """
+    starts = array("q", (to_epoch_us(w.window_start) for w in windows))
+    ends = array("q", (to_epoch_us(w.window_end) for w in windows))
+    hr = array("d", (encode_optional(w.hr_mean) for w in windows))
+    hrv = array("d", (encode_optional(w.hrv_rmssd) for w in windows))
+    mov = array("d", (encode_optional(w.movement_mean) for w in windows))
+    conf = array("d", (w.confidence_mean for w in windows))
+    return b"".join(
+        [_COUNT.pack(len(windows))] + [col.tobytes() for col in (starts, ends, hr, hrv, mov, conf)]
+    )
+
+
+def _unpack_windows(data: bytes) -> List[CadenceWindowMetrics]:
+    (n,) = _COUNT.unpack_from(data)
+    view = memoryview(data)[_COUNT.size:]
+    cols = []
+    for code in "qqdddd":
+        col = view[: n * 8].cast(code)
+        cols.append(col)
+        view = view[n * 8:]
+    starts, ends, hr, hrv, mov, conf = cols
+    return [
+        CadenceWindowMetrics(
+            window_start=from_epoch_us(starts[i]),
+            window_end=from_epoch_us(ends[i]),
+            hr_mean=decode_optional(hr[i]),
+            hrv_rmssd=decode_optional(hrv[i]),
+            movement_mean=decode_optional(mov[i]),
+            confidence_mean=conf[i],
+        )
+        for i in range(n)
+    ]
+
+
+def _run_chunk(
+    chunk: List[Tuple[str, bytes]],
+    config: DejaVuConfig,
+) -> Tuple[int, float, int, List[Tuple[str, List[DejaVuSummary]]]]:
+    """
+    Pool worker: run the Deja-Vu pipeline for every user in the chunk.
+    """
+    t0 = time.perf_counter()
+    out = []
+    n_windows = 0
+    for user_id, packed in chunk:
+        windows = _unpack_windows(packed)
+        n_windows += len(windows)
+        out.append((user_id, run_dejavu_pipeline(windows, config)))
+    return os.getpid(), time.perf_counter() - t0, n_windows, out
+
+
+def run_dejavu_fleet(
+    windows_by_user: Mapping[str, Sequence[CadenceWindowMetrics]],
+    config: Optional[DejaVuConfig] = None,
+    max_workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    chunks_per_worker: int = 4,
+) -> FleetResult:
+    """
+    Run the Deja-Vu pipeline for many users across a process pool.
+
+    Users are sorted by window count (largest first) and dealt round-robin
+    into about max_workers * chunks_per_worker chunks (more if
+    `chunk_size` caps the users per chunk), so the heaviest users land in
+    different chunks and every worker gets a share of big and small ones.
+    Window lists travel to the workers in a packed columnar form.
+    Timestamps come back as naive UTC datetimes.
+
+    Pass `executor` to reuse a long-lived pool across runs; max_workers
+    then only sizes the chunking (default: the CPU count).
+    """
+    if config is None:
+        config = DejaVuConfig()
+
+    t0 = time.perf_counter()
+    users = sorted(windows_by_user, key=lambda u: len(windows_by_user[u]), reverse=True)
+    workers = max_workers or os.cpu_count() or 1
+    n_chunks = workers * max(1, chunks_per_worker)
+    if chunk_size:
+        n_chunks = max(n_chunks, -(-len(users) // chunk_size))
+    n_chunks = min(n_chunks, len(users))
+    chunks = [
+        [(u, _pack_windows(windows_by_user[u])) for u in users[i::n_chunks]]
+        for i in range(n_chunks)
+    ]
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    summaries: Dict[str, List[DejaVuSummary]] = {}
+    timings: Dict[int, WorkerTiming] = {}
+    try:
+        futures = [executor.submit(_run_chunk, chunk, config) for chunk in chunks]
+        for fut in as_completed(futures):
+            pid, seconds, n_windows, results = fut.result()
+            t = timings.get(pid)
+            if t is None:
+                t = timings[pid] = WorkerTiming(worker_pid=pid, users=0, windows=0, seconds=0.0)
+            t.users += len(results)
+            t.windows += n_windows
+            t.seconds += seconds
+            for user_id, user_summaries in results:
+                summaries[user_id] = user_summaries
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return FleetResult(
+        summaries={u: summaries[u] for u in windows_by_user},
+        worker_timings=sorted(timings.values(), key=lambda t: t.worker_pid),
+        wall_seconds=time.perf_counter() - t0,
+    )
@@ -0,0 +1,313 @@
+# alma/dejavu_index.py
+
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from heapq import merge
+from itertools import product
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import math
+
+from .cadence_layer import CadenceWindowMetrics
+from .dejavu_layer import (
+    DejaVuConfig,
+    DejaVuEngine,
+    DejaVuFeatureVector,
+    DejaVuHistory,
+    DejaVuSummary,
+    _distance_to_similarity,
+    _normalised_features,
+)
+
+
+class _Entry(NamedTuple):
+    # compares as (timestamp, seq): seq is unique, so vec is never compared
+    timestamp: datetime
+    seq: int
+    vec: DejaVuFeatureVector
+    coords: Tuple[Optional[float], ...]
+
+
+def _mask_of(coords: Tuple[Optional[float], ...]) -> int:
+    mask = 0
+    for i, c in enumerate(coords):
+        if c is not None:
+            mask |= 1 << i
+    return mask
+
+
+def _bits(mask: int) -> Tuple[int, ...]:
+    return tuple(i for i in range(4) if mask >> i & 1)
+
+
+class _Series:
+    """
+    Entries in history order with a moving head, so a time range is two
+    bisects and eviction is one.
+    """
+
+    __slots__ = ("timestamps", "entries", "head")
+
+    def __init__(self) -> None:
+        self.timestamps: List[datetime] = []
+        self.entries: List[_Entry] = []
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.entries) - self.head
+
+    def live(self) -> List[_Entry]:
+        return self.entries[self.head:]
+
+    def add(self, entry: _Entry) -> None:
+        if self.timestamps and entry.timestamp < self.timestamps[-1]:
+            i = bisect_right(self.timestamps, entry.timestamp, self.head)
+            self.timestamps.insert(i, entry.timestamp)
+            self.entries.insert(i, entry)
+        else:
+            self.timestamps.append(entry.timestamp)
+            self.entries.append(entry)
+
+    def range(self, start: datetime, end: datetime) -> Tuple[int, int]:
+        lo = bisect_left(self.timestamps, start, self.head)
+        return lo, bisect_right(self.timestamps, end, lo)
+
+    def evict_before(self, cutoff: datetime) -> None:
+        self.head = bisect_left(self.timestamps, cutoff, self.head)
+        if self.head * 2 >= len(self.entries):
+            del self.timestamps[: self.head]
+            del self.entries[: self.head]
+            self.head = 0
+
+
+class _Span:
+    """
+    Running min/max of each coordinate over a group.
+    """
+
+    __slots__ = ("lo", "hi")
+
+    def __init__(self) -> None:
+        self.lo = [math.inf] * 4
+        self.hi = [-math.inf] * 4
+
+    def add(self, coords: Tuple[Optional[float], ...]) -> None:
+        for i, c in enumerate(coords):
+            if c is not None:
+                if c < self.lo[i]:
+                    self.lo[i] = c
+                if c > self.hi[i]:
+                    self.hi[i] = c
+
+    def spread(self, field: int) -> float:
+        return self.hi[field] - self.lo[field]
+
+
+class _Grid:
+    """
+    Uniform grid over the coordinates selected by `fields`.
+
+    The cell side is at least the query radius, so every point within the
+    radius of a query lies in one of the 3**len(fields) neighbouring cells.
+    Each cell is a _Series; entries leave it through evict(), so cells
+    that no query visits do not keep expired entries alive.
+    """
+
+    def __init__(self, fields: Tuple[int, ...], side: float) -> None:
+        self.fields = fields
+        self.side = side
+        self.cells: Dict[Tuple[int, ...], _Series] = {}
+
+    def _key(self, coords: Tuple[Optional[float], ...]) -> Tuple[int, ...]:
+        return tuple(math.floor(coords[f] / self.side) for f in self.fields)
+
+    def add(self, entry: _Entry) -> None:
+        key = self._key(entry.coords)
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = _Series()
+        cell.add(entry)
+
+    def evict(self, entry: _Entry, cutoff: datetime) -> None:
+        key = self._key(entry.coords)
+        cell = self.cells.get(key)
+        if cell is not None:
+            cell.evict_before(cutoff)
+            if not cell:
+                del self.cells[key]
+
+    def collect(
+        self,
+        coords: Tuple[Optional[float], ...],
+        start: datetime,
+        end: datetime,
+        runs: List[List[_Entry]],
+    ) -> int:
+        """
+        Append the in-range slice of every neighbouring cell to `runs`;
+        returns how many entries were added.
+        """
+        center = self._key(coords)
+        if len(self.cells) < 3 ** len(center):
+            cells = [
+                cell for key, cell in self.cells.items()
+                if all(-1 <= k - c <= 1 for k, c in zip(key, center))
+            ]
+        else:
+            cells = []
+            for offset in product((-1, 0, 1), repeat=len(center)):
+                cell = self.cells.get(tuple(c + o for c, o in zip(center, offset)))
+                if cell is not None:
+                    cells.append(cell)
+        n = 0
+        for cell in cells:
+            lo, hi = cell.range(start, end)
+            if lo < hi:
+                runs.append(cell.entries[lo:hi])
+                n += hi - lo
+        return n
+
+
+class DejaVuIndex(DejaVuHistory):
+    """
+    DejaVuHistory with a spatial index over the tanh-normalised features.
+
+    similarity >= threshold is equivalent to an RMS distance <= r with
+    r = 1 / threshold - 1, i.e. a Euclidean radius of sqrt(n) * r over the
+    n fields both vectors have. Vectors are grouped by which fields they
+    carry; for every (stored group, shared fields) pair a grid is built
+    lazily on first use and kept up to date afterwards. Only fields whose
+    stored values spread wider than the radius are gridded: tanh maps
+    realistic hr, hrv and movement values to 1.0, and a field every vector
+    shares the same cell on cannot prune anything. When a field starts to
+    spread, the grids of its group are rebuilt on their next query.
+
+    Cells are time-ordered, so a query bisects each neighbouring cell to
+    the time range and merges the slices. When the neighbourhood still
+    holds at least half of the range the plain range is returned instead,
+    so the index never costs much more than the linear history. The exact
+    similarity check still happens in find_dejavu_for_window, so results
+    are identical to the unindexed history.
+    """
+
+    def __init__(self, config: Optional[DejaVuConfig] = None) -> None:
+        super().__init__()
+        if config is None:
+            config = DejaVuConfig()
+        self.config = config
+        threshold = config.similarity_threshold
+        self._radius = (1.0 / threshold - 1.0) if threshold > 0 else math.inf
+        # a pair without shared fields still scores this similarity
+        self._no_overlap_matches = _distance_to_similarity(1e9) >= threshold
+        self._groups: Dict[int, _Series] = {}
+        self._spans: Dict[int, _Span] = {}
+        self._grids: Dict[int, Dict[int, _Grid]] = {}
+        self._unindexed = _Series()
+        self._seq = 0
+
+    def append(self, vec: DejaVuFeatureVector) -> None:
+        super().append(vec)
+        coords = _normalised_features(vec)
+        entry = _Entry(vec.timestamp, self._seq, vec, coords)
+        self._seq += 1
+        if any(c is not None and math.isnan(c) for c in coords):
+            # NaN features cannot be placed in a cell; always compare them
+            self._unindexed.add(entry)
+            return
+        mask = _mask_of(coords)
+        group = self._groups.get(mask)
+        if group is None:
+            group = self._groups[mask] = _Series()
+            self._spans[mask] = _Span()
+            self._grids[mask] = {}
+        group.add(entry)
+        self._spans[mask].add(coords)
+        grids = self._grids[mask]
+        for shared, grid in list(grids.items()):
+            if self._fields(mask, shared) != grid.fields:
+                del grids[shared]
+            else:
+                grid.add(entry)
+
+    def evict_before(self, cutoff: datetime) -> None:
+        super().evict_before(cutoff)
+        self._unindexed.evict_before(cutoff)
+        for mask, group in self._groups.items():
+            lo = group.head
+            hi = bisect_left(group.timestamps, cutoff, lo)
+            if hi == lo:
+                continue
+            for grid in self._grids[mask].values():
+                for entry in group.entries[lo:hi]:
+                    grid.evict(entry, cutoff)
+            group.evict_before(cutoff)
+
+    def _fields(self, mask: int, shared: int) -> Tuple[int, ...]:
+        side = self._side(shared)
+        span = self._spans[mask]
+        return tuple(f for f in _bits(shared) if span.spread(f) > side)
+
+    def _side(self, shared: int) -> float:
+        # slight margin so rounding never pushes a true match one cell out
+        return math.sqrt(len(_bits(shared))) * self._radius * (1.0 + 1e-9) + 1e-12
+
+    def _grid(self, mask: int, shared: int) -> _Grid:
+        grids = self._grids[mask]
+        grid = grids.get(shared)
+        if grid is None:
+            grid = grids[shared] = _Grid(self._fields(mask, shared), self._side(shared))
+            for entry in self._groups[mask].live():
+                grid.add(entry)
+        return grid
+
+    def candidates(
+        self,
+        current: DejaVuFeatureVector,
+        start: datetime,
+        end: datetime,
+    ) -> List[DejaVuFeatureVector]:
+        coords = _normalised_features(current)
+        if math.isinf(self._radius) or any(c is not None and math.isnan(c) for c in coords):
+            return self.between(start, end)
+
+        query_mask = _mask_of(coords)
+        runs: List[List[_Entry]] = []
+        n = 0
+        series = [self._unindexed]
+        for mask, group in self._groups.items():
+            if not group:
+                continue
+            shared = mask & query_mask
+            if shared:
+                n += self._grid(mask, shared).collect(coords, start, end, runs)
+            elif self._no_overlap_matches:
+                series.append(group)
+        for s in series:
+            lo, hi = s.range(start, end)
+            if lo < hi:
+                runs.append(s.entries[lo:hi])
+                n += hi - lo
+
+        lo, hi = self._range(start, end)
+        if n * 2 >= hi - lo:
+            return self._vectors[lo:hi]
+        # history order, so ties resolve like the linear scan
+        return [e.vec for e in merge(*runs)]
+
+
+def run_dejavu_pipeline_indexed(
+    windows: List[CadenceWindowMetrics],
+    config: Optional[DejaVuConfig] = None,
+) -> List[DejaVuSummary]:
+    """
+    run_dejavu_pipeline backed by a DejaVuIndex, for long lookbacks.
+    """
+    if config is None:
+        config = DejaVuConfig()
+    engine = DejaVuEngine(config, history=DejaVuIndex(config))
+    summaries: List[DejaVuSummary] = []
+    for w in windows:
+        summary = engine.push(w)
+        if summary is not None:
+            summaries.append(summary)
+    return summaries
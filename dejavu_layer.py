@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+import heapq
 import math
 
 from .cadence_layer import CadenceWindowMetrics
+from .instrumentation import INSTRUMENTATION
 
 Number = float
 
@@ -47,6 +50,77 @@ class DejaVuSummary:
     strongest_match: Optional[DejaVuMatch]
 
 
+class DejaVuHistory:
+    """
+    Time-ordered feature history with a bounded lookback.
+
+    Vectors are kept sorted by timestamp so the candidate range
+    [now - min_history, now - min_gap] is found with two binary searches.
+    Vectors older than the lookback are evicted, which keeps memory flat
+    on long sessions as long as windows arrive in time order.
+    """
+
+    # compact the backing lists once this many evicted slots pile up
+    _COMPACT_MIN = 256
+
+    def __init__(self) -> None:
+        self._timestamps: List[datetime] = []
+        self._vectors: List[DejaVuFeatureVector] = []
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self._vectors) - self._head
+
+    def __iter__(self):
+        return iter(self._vectors[self._head:])
+
+    def append(self, vec: DejaVuFeatureVector) -> None:
+        """
+        Add a vector; out-of-order timestamps are inserted in place.
+        """
+        if self._timestamps and vec.timestamp < self._timestamps[-1]:
+            i = bisect_right(self._timestamps, vec.timestamp, self._head)
+            self._timestamps.insert(i, vec.timestamp)
+            self._vectors.insert(i, vec)
+        else:
+            self._timestamps.append(vec.timestamp)
+            self._vectors.append(vec)
+
+    def _range(self, start: datetime, end: datetime) -> Tuple[int, int]:
+        lo = bisect_left(self._timestamps, start, self._head)
+        return lo, bisect_right(self._timestamps, end, lo)
+
+    def between(self, start: datetime, end: datetime) -> List[DejaVuFeatureVector]:
+        """
+        Vectors with start <= timestamp <= end, oldest first.
+        """
+        lo, hi = self._range(start, end)
+        return self._vectors[lo:hi]
+
+    def candidates(
+        self,
+        current: DejaVuFeatureVector,
+        start: datetime,
+        end: datetime,
+    ) -> List[DejaVuFeatureVector]:
+        """
+        Vectors worth comparing against `current`, oldest first.
+        Subclasses may prune by feature space; the base class returns the
+        whole time range.
+        """
+        return self.between(start, end)
+
+    def evict_before(self, cutoff: datetime) -> None:
+        """
+        Drop vectors with timestamp < cutoff.
+        """
+        self._head = bisect_left(self._timestamps, cutoff, self._head)
+        if self._head >= self._COMPACT_MIN and self._head * 2 >= len(self._vectors):
+            del self._timestamps[: self._head]
+            del self._vectors[: self._head]
+            self._head = 0
+
+
 def _window_to_feature_vector(
     window: CadenceWindowMetrics,
     config: DejaVuConfig,
@@ -66,25 +140,71 @@ def _window_to_feature_vector(
     )
 
 
-def _vector_distance(a: DejaVuFeatureVector, b: DejaVuFeatureVector) -> Number:
+_FEATURE_FIELDS = (
+    ('hr_mean', True),
+    ('hrv_rmssd', True),
+    ('movement_mean', True),
+    ('confidence_mean', False),
+)
+
+
+def _normalised_features(vec: DejaVuFeatureVector) -> Tuple[Optional[Number], ...]:
     """
-    Simple numeric distance between two windows, using available fields.
+    Feature coordinates as used by _vector_distance; missing fields stay None.
+    """
+    out = []
+    for fname, signed in _FEATURE_FIELDS:
+        v = getattr(vec, fname)
+        if v is not None:
+            v = math.tanh(v) if signed else max(0.0, min(1.0, v))
+        out.append(v)
+    return tuple(out)
+
+
+def _bounded_distance(
+    a: Tuple[Optional[Number], ...],
+    b: Tuple[Optional[Number], ...],
+    max_sq: Number = math.inf,
+) -> Optional[Number]:
     """
-    fields = [('hr_mean', True), ('hrv_rmssd', True), ('movement_mean', True), ('confidence_mean', False)]
-    diffs = []
-    for fname, signed in fields:
-        va = getattr(a, fname)
-        vb = getattr(b, fname)
+    RMS distance over the normalised fields both vectors have.
+    Returns None as soon as the running sum of squared differences shows
+    the mean square will exceed `max_sq`.
+    """
+    n = 0
+    for va, vb in zip(a, b):
         if va is not None and vb is not None:
-            # tanh normalisation to [-1, 1] (or [0,1] for confidence)
-            if signed:
-                na, nb = math.tanh(va), math.tanh(vb)
-            else:
-                na, nb = max(0.0, min(1.0, va)), max(0.0, min(1.0, vb))
-            diffs.append(na - nb)
-    if not diffs:
+            n += 1
+    if n == 0:
         return 1e9
-    return math.sqrt(sum(d * d for d in diffs) / len(diffs))
+    budget = max_sq * n
+    total = 0
+    for va, vb in zip(a, b):
+        if va is not None and vb is not None:
+            d = va - vb
+            total += d * d
+            if total > budget:
+                return None
+    return math.sqrt(total / n)
+
+
+def _vector_distance(a: DejaVuFeatureVector, b: DejaVuFeatureVector) -> Number:
+    """
+    Simple numeric distance between two windows, using available fields.
+    """
+    return _bounded_distance(_normalised_features(a), _normalised_features(b))
+
+
+def _similarity_to_max_sq(similarity: Number) -> Number:
+    """
+    Largest mean squared distance that can still reach `similarity`,
+    padded slightly so pruning never drops a borderline candidate
+    (the exact check happens afterwards).
+    """
+    if similarity <= 0:
+        return math.inf
+    r = max(0.0, 1.0 / similarity - 1.0)
+    return r * r * (1.0 + 1e-9) + 1e-15
 
 
 def _distance_to_similarity(distance: Number) -> Number:
@@ -114,17 +234,22 @@ def build_feature_history(
 
 def find_dejavu_for_window(
     current: CadenceWindowMetrics,
-    history: List[DejaVuFeatureVector],
+    history: Union[List[DejaVuFeatureVector], DejaVuHistory],
     config: Optional[DejaVuConfig] = None,
 ) -> DejaVuSummary:
     """
     For the current window, find similar past windows.
+    A DejaVuHistory is searched only within its lookback range.
     """
     if config is None:
         config = DejaVuConfig()
+    instr = INSTRUMENTATION
+    token = instr.start() if instr.enabled else None
 
     current_vec = _window_to_feature_vector(current, config)
     if current_vec is None:
+        if token is not None:
+            instr.record("dejavu.search", token, history_scanned=0)
         return DejaVuSummary(
             window_start=current.window_start,
             window_end=current.window_end,
@@ -136,30 +261,57 @@ def find_dejavu_for_window(
     gap = timedelta(minutes=config.min_gap_minutes)
     min_age = timedelta(minutes=config.min_history_minutes)
 
-    matches: List[DejaVuMatch] = []
-    for past_vec in history:
+    if isinstance(history, DejaVuHistory):
+        candidates = history.candidates(current_vec, now - min_age, now - gap)
+    else:
+        candidates = history
+
+    k = config.max_matches_per_window
+    threshold = config.similarity_threshold
+    threshold_sq = _similarity_to_max_sq(threshold)
+    current_coords = _normalised_features(current_vec)
+
+    # min-heap of the k best (similarity, -position, past_time) so far;
+    # -position makes the earlier history entry win ties, like a stable sort
+    best: List[Tuple[Number, int, datetime]] = []
+    for pos, past_vec in enumerate(candidates if k > 0 else ()):
         age = now - past_vec.timestamp
         if age < gap:
             continue
         # (min_age filter optional; here we apply it strictly)
         if age > min_age:
             continue
-        sim = _distance_to_similarity(_vector_distance(current_vec, past_vec))
-        if sim >= config.similarity_threshold:
-            matches.append(
-                DejaVuMatch(
-                    current_time=now,
-                    past_time=past_vec.timestamp,
-                    similarity=sim,
-                    duration_minutes=config.window_minutes,
-                    notes=None,
-                )
-            )
-
-    matches.sort(key=lambda m: m.similarity, reverse=True)
-    matches = matches[: config.max_matches_per_window]
+        max_sq = threshold_sq
+        if len(best) == k:
+            max_sq = min(max_sq, _similarity_to_max_sq(best[0][0]))
+        dist = _bounded_distance(current_coords, _normalised_features(past_vec), max_sq)
+        if dist is None:
+            continue
+        sim = _distance_to_similarity(dist)
+        if sim < threshold:
+            continue
+        item = (sim, -pos, past_vec.timestamp)
+        if len(best) < k:
+            heapq.heappush(best, item)
+        elif item > best[0]:
+            heapq.heapreplace(best, item)
+
+    best.sort(reverse=True)
+    matches = [
+        DejaVuMatch(
+            current_time=now,
+            past_time=past_time,
+            similarity=sim,
+            duration_minutes=config.window_minutes,
+            notes=None,
+        )
+        for sim, _, past_time in best
+    ]
     strongest = matches[0] if matches else None
 
+    if token is not None:
+        instr.record("dejavu.search", token, history_scanned=len(candidates), matches=len(matches))
+
     return DejaVuSummary(
         window_start=current.window_start,
         window_end=current.window_end,
@@ -168,28 +320,80 @@ def find_dejavu_for_window(
     )
 
 
+class DejaVuEngine:
+    """
+    Incremental Deja-Vu search that owns its history.
+
+    push() takes one window at a time and returns its summary, or None
+    while no usable history exists yet, exactly like the windows skipped
+    by run_dejavu_pipeline. History beyond the lookback of the newest
+    window is evicted, so windows must arrive in time order; a window
+    ending before the previous one raises ValueError.
+    """
+
+    def __init__(
+        self,
+        config: Optional[DejaVuConfig] = None,
+        history: Optional[DejaVuHistory] = None,
+    ) -> None:
+        if config is None:
+            config = DejaVuConfig()
+        self.config = config
+        self.history = history if history is not None else DejaVuHistory()
+        # a pre-filled history (e.g. a persistent store) is usable at once
+        self._has_history = len(self.history) > 0
+        self._min_age = timedelta(minutes=config.min_history_minutes)
+        self._last_end: Optional[datetime] = None
+
+    def push(self, window: CadenceWindowMetrics) -> Optional[DejaVuSummary]:
+        if self._last_end is not None and window.window_end < self._last_end:
+            raise ValueError("windows must arrive in time order")
+        self._last_end = window.window_end
+        summary = None
+        # allow search only after we have some history
+        if self._has_history:
+            summary = find_dejavu_for_window(window, self.history, self.config)
+        # add current to history for next windows
+        fv = _window_to_feature_vector(window, self.config)
+        if fv is not None:
+            self.history.append(fv)
+            self._has_history = True
+            # older vectors are out of reach for every later window
+            self.history.evict_before(fv.timestamp - self._min_age)
+        return summary
+
+
 def run_dejavu_pipeline(
     windows: List[CadenceWindowMetrics],
     config: Optional[DejaVuConfig] = None,
 ) -> List[DejaVuSummary]:
     """
     Main entry point for the Deja-Vu layer.
+    Windows in time order go through DejaVuEngine (bounded history);
+    any other order falls back to a full history in arrival order, since
+    an older window may still need vectors the engine would have evicted.
     """
-    if config is None:
-        config = DejaVuConfig()
+    instr = INSTRUMENTATION
+    token = instr.start() if instr.enabled else None
 
     summaries: List[DejaVuSummary] = []
-    history: List[DejaVuFeatureVector] = []
-
-    # incremental history build
-    for w in windows:
-        # allow search only after we have some history
-        if len(history) > 0:
-            summary = find_dejavu_for_window(w, history, config)
-            summaries.append(summary)
-        # add current to history for next iterations
-        fv = _window_to_feature_vector(w, config)
-        if fv is not None:
-            history.append(fv)
+    if all(a.window_end <= b.window_end for a, b in zip(windows, windows[1:])):
+        engine = DejaVuEngine(config)
+        for w in windows:
+            summary = engine.push(w)
+            if summary is not None:
+                summaries.append(summary)
+    else:
+        if config is None:
+            config = DejaVuConfig()
+        history: List[DejaVuFeatureVector] = []
+        for w in windows:
+            if history:
+                summaries.append(find_dejavu_for_window(w, history, config))
+            fv = _window_to_feature_vector(w, config)
+            if fv is not None:
+                history.append(fv)
 
+    if token is not None:
+        instr.record("dejavu.pipeline", token, items=len(windows))
     return summaries
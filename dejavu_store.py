@@ -0,0 +1,233 @@
+# alma/dejavu_store.py
+
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Iterator, List, Optional
+import mmap
+import os
+import struct
+import zlib
+
+from .cadence_layer import CadenceWindowMetrics
+from .codec import decode_optional, encode_optional, from_epoch_us, to_epoch_us
+from .dejavu_layer import (
+    DejaVuConfig,
+    DejaVuFeatureVector,
+    DejaVuHistory,
+    _window_to_feature_vector,
+)
+
+
+# file header: magic, format version, record size, flags
+_HEADER = struct.Struct("<8sHHH18x")
+_MAGIC = b"ALMADJV\x00"
+_VERSION = 1
+
+# record: timestamp (epoch us), hr_mean, hrv_rmssd, movement_mean,
+# confidence_mean (NaN = missing), crc32 of the preceding bytes
+_RECORD = struct.Struct("<q4dI4x")
+_PAYLOAD = struct.Struct("<q4d")
+
+# header flags
+_TZ_UTC = 1     # timestamps were tz-aware; restore them as UTC
+
+
+class _TimestampColumn:
+    """
+    Read-only sequence view over the record timestamps, for bisect.
+    """
+
+    def __init__(self, store: "DejaVuFeatureStore") -> None:
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, i: int) -> int:
+        return self._store._timestamp_us(i)
+
+
+class DejaVuFeatureStore(DejaVuHistory):
+    """
+    Append-only, fixed-record file of Deja-Vu feature vectors.
+
+    Records are read through mmap, so reopening a store with weeks of
+    history costs only the header check; range lookups binary-search the
+    timestamp column. Each record carries a CRC32 and a torn tail left by a
+    crash is truncated on open. Timestamps must be appended in time order.
+    The first record fixes whether timestamps are tz-aware (read back as
+    UTC) or naive; appending the other kind raises ValueError.
+
+    The store is a DejaVuHistory, so it can be passed to
+    find_dejavu_for_window or used as DejaVuEngine history directly.
+    """
+
+    def __init__(self, path: str, fsync: bool = False) -> None:
+        super().__init__()
+        self.path = path
+        self.fsync = fsync
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_count = 0
+        self._count = 0
+        self._last_us: Optional[int] = None
+        self._flags = 0
+        self._open()
+
+    def _open(self) -> None:
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            os.write(self._fd, _HEADER.pack(_MAGIC, _VERSION, _RECORD.size, 0))
+            os.fsync(self._fd)
+            size = _HEADER.size
+        elif size < _HEADER.size:
+            raise ValueError(f"{self.path}: truncated header")
+        else:
+            magic, version, record_size, self._flags = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+            if magic != _MAGIC:
+                raise ValueError(f"{self.path}: not a Deja-Vu feature store")
+            if version != _VERSION or record_size != _RECORD.size:
+                raise ValueError(f"{self.path}: unsupported store version {version}")
+
+        count = (size - _HEADER.size) // _RECORD.size
+        # drop a torn or corrupt tail left by an interrupted append
+        while count > 0 and not self._record_ok(count - 1):
+            count -= 1
+        valid_size = _HEADER.size + count * _RECORD.size
+        if valid_size != size:
+            os.ftruncate(self._fd, valid_size)
+            os.fsync(self._fd)
+
+        self._count = count
+        self._remap()
+        if count:
+            self._last_us = self._timestamp_us(count - 1)
+
+    def _record_ok(self, i: int) -> bool:
+        raw = os.pread(self._fd, _RECORD.size, _HEADER.size + i * _RECORD.size)
+        if len(raw) != _RECORD.size:
+            return False
+        crc = _RECORD.unpack(raw)[5]
+        return zlib.crc32(raw[: _PAYLOAD.size]) == crc
+
+    def _remap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        length = _HEADER.size + self._count * _RECORD.size
+        self._map = mmap.mmap(self._fd, length, access=mmap.ACCESS_READ)
+        self._mapped_count = self._count
+
+    def _timestamp_us(self, i: int) -> int:
+        if i >= self._mapped_count:
+            self._remap()
+        return struct.unpack_from("<q", self._map, _HEADER.size + i * _RECORD.size)[0]
+
+    def _read(self, i: int) -> DejaVuFeatureVector:
+        if i >= self._mapped_count:
+            self._remap()
+        ts, hr, hrv, mov, conf = _PAYLOAD.unpack_from(self._map, _HEADER.size + i * _RECORD.size)
+        return DejaVuFeatureVector(
+            timestamp=from_epoch_us(ts, bool(self._flags & _TZ_UTC)),
+            hr_mean=decode_optional(hr),
+            hrv_rmssd=decode_optional(hrv),
+            movement_mean=decode_optional(mov),
+            confidence_mean=conf,
+        )
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> DejaVuFeatureVector:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self._read(i)
+
+    def __iter__(self) -> Iterator[DejaVuFeatureVector]:
+        for i in range(self._count):
+            yield self._read(i)
+
+    def append(self, vec: DejaVuFeatureVector) -> None:
+        """
+        Append one vector. The record is written with a single write call;
+        with fsync=True it is durable when this returns.
+        """
+        aware = vec.timestamp.tzinfo is not None
+        if self._count == 0:
+            flags = _TZ_UTC if aware else 0
+            if flags != self._flags:
+                self._flags = flags
+                os.pwrite(self._fd, _HEADER.pack(_MAGIC, _VERSION, _RECORD.size, flags), 0)
+        elif aware != bool(self._flags & _TZ_UTC):
+            held = "naive" if aware else "tz-aware"
+            raise ValueError(f"{self.path}: store holds {held} timestamps")
+        ts = to_epoch_us(vec.timestamp)
+        if self._last_us is not None and ts < self._last_us:
+            raise ValueError("feature store timestamps must be appended in time order")
+        payload = _PAYLOAD.pack(
+            ts,
+            encode_optional(vec.hr_mean),
+            encode_optional(vec.hrv_rmssd),
+            encode_optional(vec.movement_mean),
+            vec.confidence_mean,
+        )
+        record = payload + struct.pack("<I4x", zlib.crc32(payload))
+        os.pwrite(self._fd, record, _HEADER.size + self._count * _RECORD.size)
+        if self.fsync:
+            os.fsync(self._fd)
+        self._count += 1
+        self._last_us = ts
+
+    def append_window(
+        self,
+        window: CadenceWindowMetrics,
+        config: Optional[DejaVuConfig] = None,
+    ) -> Optional[DejaVuFeatureVector]:
+        """
+        Featurise and append a window; low-confidence windows are skipped.
+        """
+        if config is None:
+            config = DejaVuConfig()
+        fv = _window_to_feature_vector(window, config)
+        if fv is not None:
+            self.append(fv)
+        return fv
+
+    def between(self, start: datetime, end: datetime) -> List[DejaVuFeatureVector]:
+        column = _TimestampColumn(self)
+        lo = bisect_left(column, to_epoch_us(start))
+        hi = bisect_right(column, to_epoch_us(end), lo)
+        return [self._read(i) for i in range(lo, hi)]
+
+    def evict_before(self, cutoff: datetime) -> None:
+        # history stays on disk; range lookups are already logarithmic
+        pass
+
+    def flush(self) -> None:
+        os.fsync(self._fd)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "DejaVuFeatureStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_user_store(directory: str, user_id: str, fsync: bool = False) -> DejaVuFeatureStore:
+    """
+    Open (or create) the feature store of one user inside `directory`.
+    """
+    if not user_id or os.sep in user_id or user_id in (".", ".."):
+        raise ValueError(f"invalid user id: {user_id!r}")
+    os.makedirs(directory, exist_ok=True)
+    return DejaVuFeatureStore(os.path.join(directory, f"{user_id}.djv"), fsync=fsync)
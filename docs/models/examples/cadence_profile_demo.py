@@ -9,9 +9,11 @@ This is NOT medical software. It is an engineering demo only.
 
 from __future__ import annotations
 
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum, auto
-from typing import List, Optional
+from typing import Deque, List, Optional, Tuple
+import math
 import random
 import statistics
 from datetime import datetime, timedelta
@@ -62,48 +64,17 @@ ROLLING_WINDOW_MIN = 10        # 10 min trend window
 # 3. Core state logic (simplified v0.1)
 # ---------------------------------------------------------------------
 
-def infer_state(samples: List[RawSample]) -> CadenceResult:
+def _classify(
+    now: datetime,
+    hr_mean: float,
+    rr_mean: float,
+    accel_mean: float,
+    hr_trend: float,
+) -> CadenceResult:
     """
-    Infer cadence state for the LAST window, using all samples provided.
-    `samples` should cover at least the last 10 minutes for trends.
+    Map aggregated window metrics to a cadence state.
     """
 
-    if not samples:
-        now = datetime.utcnow()
-        return CadenceResult(now, CadenceState.UNKNOWN, 0.0, ["EVENT_SIGNAL_LOSS"])
-
-    latest = samples[-1]
-    now = latest.timestamp
-
-    # Filter last 2 minutes (current window)
-    window_start = now - timedelta(seconds=CADENCE_WINDOW_SEC)
-    window = [s for s in samples if s.timestamp >= window_start]
-
-    if not window:
-        return CadenceResult(now, CadenceState.UNKNOWN, 0.0, ["EVENT_SIGNAL_LOSS"])
-
-    # Check signal quality
-    good = [s for s in window if s.signal_quality >= 0.7]
-    if len(good) < len(window) * 0.5:
-        return CadenceResult(now, CadenceState.UNKNOWN, 0.0, ["EVENT_SIGNAL_LOSS"])
-
-    # Aggregate metrics for current window
-    hr_vals = [s.hr_bpm for s in good]
-    rr_vals = [s.rr_ms for s in good]
-    accel_vals = [s.accel_mg for s in good]
-
-    hr_mean = statistics.fmean(hr_vals)
-    rr_mean = statistics.fmean(rr_vals)
-    accel_mean = statistics.fmean(accel_vals)
-
-    # Trend over last 10 min
-    trend_start = now - timedelta(minutes=ROLLING_WINDOW_MIN)
-    trend_window = [s for s in samples if s.timestamp >= trend_start and s.signal_quality >= 0.7]
-    if len(trend_window) >= 2:
-        hr_trend = trend_window[-1].hr_bpm - trend_window[0].hr_bpm
-    else:
-        hr_trend = 0.0
-
     # --- State rules (simplified, aligned with HUMAN_CADENCE_PROFILE_SPEC v0.1) ---
 
     state = CadenceState.CALM
@@ -155,6 +126,158 @@ def infer_state(samples: List[RawSample]) -> CadenceResult:
     return CadenceResult(now, state, confidence, events)
 
 
+def infer_state(samples: List[RawSample]) -> CadenceResult:
+    """
+    Infer cadence state for the LAST window, using all samples provided.
+    `samples` should cover at least the last 10 minutes for trends.
+    """
+
+    if not samples:
+        now = datetime.utcnow()
+        return CadenceResult(now, CadenceState.UNKNOWN, 0.0, ["EVENT_SIGNAL_LOSS"])
+
+    latest = samples[-1]
+    now = latest.timestamp
+
+    # Filter last 2 minutes (current window)
+    window_start = now - timedelta(seconds=CADENCE_WINDOW_SEC)
+    window = [s for s in samples if s.timestamp >= window_start]
+
+    if not window:
+        return CadenceResult(now, CadenceState.UNKNOWN, 0.0, ["EVENT_SIGNAL_LOSS"])
+
+    # Check signal quality
+    good = [s for s in window if s.signal_quality >= 0.7]
+    if len(good) < len(window) * 0.5:
+        return CadenceResult(now, CadenceState.UNKNOWN, 0.0, ["EVENT_SIGNAL_LOSS"])
+
+    # Aggregate metrics for current window
+    hr_vals = [s.hr_bpm for s in good]
+    rr_vals = [s.rr_ms for s in good]
+    accel_vals = [s.accel_mg for s in good]
+
+    hr_mean = statistics.fmean(hr_vals)
+    rr_mean = statistics.fmean(rr_vals)
+    accel_mean = statistics.fmean(accel_vals)
+
+    # Trend over last 10 min
+    trend_start = now - timedelta(minutes=ROLLING_WINDOW_MIN)
+    trend_window = [s for s in samples if s.timestamp >= trend_start and s.signal_quality >= 0.7]
+    if len(trend_window) >= 2:
+        hr_trend = trend_window[-1].hr_bpm - trend_window[0].hr_bpm
+    else:
+        hr_trend = 0.0
+
+    return _classify(now, hr_mean, rr_mean, accel_mean, hr_trend)
+
+
+class _RunningSum:
+    """
+    Float sum with exact add/remove (the partials of math.fsum), so the
+    running mean equals statistics.fmean over the same values.
+    """
+
+    __slots__ = ("partials",)
+
+    def __init__(self) -> None:
+        self.partials: List[float] = []
+
+    def add(self, x: float) -> None:
+        partials = self.partials
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x]
+
+    def remove(self, x: float) -> None:
+        self.add(-x)
+
+    def total(self) -> float:
+        return math.fsum(self.partials)
+
+
+class CadenceStateEstimator:
+    """
+    Incremental version of infer_state.
+
+    Keeps the 2-minute window and the 10-minute trend window as deques
+    with running good-sample counts and HR/RR/accel sums, so each sample
+    costs constant work. After push(s) for every sample, result() equals
+    infer_state() over the same samples. Samples must arrive in time order.
+    """
+
+    def __init__(self) -> None:
+        # (timestamp, good, hr, rr, accel) for the current window
+        self._window: Deque[Tuple[datetime, bool, float, float, float]] = deque()
+        self._good = 0
+        self._hr = _RunningSum()
+        self._rr = _RunningSum()
+        self._accel = _RunningSum()
+        # (timestamp, hr) of good samples in the trend window
+        self._trend: Deque[Tuple[datetime, float]] = deque()
+        self._now: Optional[datetime] = None
+
+    def push(self, sample: RawSample) -> None:
+        now = sample.timestamp
+        if self._now is not None and now < self._now:
+            raise ValueError("samples must arrive in time order")
+        self._now = now
+        good = sample.signal_quality >= 0.7
+
+        self._window.append((now, good, sample.hr_bpm, sample.rr_ms, sample.accel_mg))
+        if good:
+            self._good += 1
+            self._hr.add(sample.hr_bpm)
+            self._rr.add(sample.rr_ms)
+            self._accel.add(sample.accel_mg)
+            self._trend.append((now, sample.hr_bpm))
+
+        window_start = now - timedelta(seconds=CADENCE_WINDOW_SEC)
+        while self._window[0][0] < window_start:
+            _, was_good, hr, rr, accel = self._window.popleft()
+            if was_good:
+                self._good -= 1
+                self._hr.remove(hr)
+                self._rr.remove(rr)
+                self._accel.remove(accel)
+
+        trend_start = now - timedelta(minutes=ROLLING_WINDOW_MIN)
+        while self._trend and self._trend[0][0] < trend_start:
+            self._trend.popleft()
+
+    def result(self) -> CadenceResult:
+        if self._now is None:
+            now = datetime.utcnow()
+            return CadenceResult(now, CadenceState.UNKNOWN, 0.0, ["EVENT_SIGNAL_LOSS"])
+
+        now = self._now
+        n_window = len(self._window)
+        if not n_window or self._good < n_window * 0.5:
+            return CadenceResult(now, CadenceState.UNKNOWN, 0.0, ["EVENT_SIGNAL_LOSS"])
+
+        hr_mean = self._hr.total() / self._good
+        rr_mean = self._rr.total() / self._good
+        accel_mean = self._accel.total() / self._good
+
+        if len(self._trend) >= 2:
+            hr_trend = self._trend[-1][1] - self._trend[0][1]
+        else:
+            hr_trend = 0.0
+
+        return _classify(now, hr_mean, rr_mean, accel_mean, hr_trend)
+
+    def update(self, sample: RawSample) -> CadenceResult:
+        self.push(sample)
+        return self.result()
+
+
 # ---------------------------------------------------------------------
 # 4. Simple simulator
 # ---------------------------------------------------------------------
@@ -176,7 +299,7 @@ def simulate_stream(
         random.seed(seed)
 
     start = datetime.utcnow()
-    samples: List[RawSample] = []
+    estimator = CadenceStateEstimator()
     results: List[CadenceResult] = []
 
     total_seconds = minutes * 60
@@ -226,11 +349,11 @@ def simulate_stream(
             accel_mg=accel,
             signal_quality=sq,
         )
-        samples.append(sample)
+        estimator.push(sample)
 
         # Every cadence window, compute result
         if i > 0 and i % CADENCE_WINDOW_SEC == 0:
-            res = infer_state(samples)
+            res = estimator.result()
             results.append(res)
 
     return results
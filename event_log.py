@@ -0,0 +1,487 @@
+# alma/event_log.py
+
+from __future__ import annotations
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple, Union
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from .codec import to_epoch_us
+
+
+Number = float
+
+# every record is one line of compact JSON followed by ",\n", so any run of
+# records is a valid JSON array body once the last ",\n" is dropped; the
+# fixed-width UTC timestamp always sits at the same offset
+_TS_KEY = b'{"timestamp":"'
+_TS_START = len(_TS_KEY)
+_TS_END = _TS_START + 27            # 2025-11-30T10:00:00.000000Z
+_RECORD_END = b",\n"
+
+_RESPONSE_HEAD = b'{"status":"OK","events":['
+_RESPONSE_TAIL = b"]}"
+
+# sparse index entry: timestamp (epoch us), byte offset in the segment
+_INDEX = struct.Struct("<qq")
+
+# sealed segments mapped at once; older mappings are dropped (and unmapped
+# once no response holds a view of them), since before Python 3.13 every
+# mmap keeps a duplicate of the file descriptor open
+_MAX_MAPPED = 64
+_MMAP_KWARGS = {"trackfd": False} if sys.version_info >= (3, 13) else {}
+
+ByteChunk = Union[bytes, memoryview]
+
+
+@dataclass
+class EventEnvelope:
+    """
+    One outbound event (SYSTEM_LAYER_SPEC §7).
+    """
+    id: int
+    entity_id: str
+    timestamp: datetime
+    event_type: str
+    payload: Any = None
+    confidence: Optional[Number] = None
+
+
+@dataclass
+class EventLogConfig:
+    """
+    Segment and index settings of an EventLog.
+    """
+    segment_bytes: int = 64 * 1024 * 1024    # roll to a new segment past this size
+    index_interval_bytes: int = 4096         # one sparse index entry per this many bytes
+    max_segments: int = 0                    # oldest segments are deleted beyond this; 0 = keep all
+    fsync: bool = False                      # fsync sealed segments and flushes
+
+
+def format_timestamp(ts: datetime) -> str:
+    """
+    Fixed-width ISO8601 UTC form used in the log (naive = UTC).
+    """
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return f"{ts:%Y-%m-%dT%H:%M:%S}.{ts.microsecond:06d}Z"
+
+
+def parse_since(value: str) -> datetime:
+    """
+    Parse the ISO8601 `since` query parameter into a naive UTC datetime.
+    """
+    ts = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+class _Segment:
+    """
+    One log file plus its sparse (timestamp, offset) index. Sealed segments
+    are immutable and read through mmap (mapped on first read); the active
+    one through pread. The segment lock orders readers against seal() and
+    close(), so a read never uses a descriptor that was closed meanwhile.
+    """
+
+    __slots__ = ("base_id", "path", "size", "first_us", "last_us",
+                 "index_us", "index_off", "sealed", "_map", "_fd", "_lock")
+
+    def __init__(self, base_id: int, path: str) -> None:
+        self.base_id = base_id
+        self.path = path
+        self.size = 0
+        self.first_us: Optional[int] = None
+        self.last_us: Optional[int] = None
+        self.index_us = array("q")
+        self.index_off = array("q")
+        self.sealed = False
+        self._map: Optional[mmap.mmap] = None
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> str:
+        return self.path[: -len(".log")] + ".idx"
+
+    def seal(self) -> None:
+        """
+        Mark the (complete) file read-only and persist its index.
+        """
+        with self._lock:
+            self.sealed = True
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        with open(self.index_path, "wb") as f:
+            f.write(b"".join(_INDEX.pack(t, o) for t, o in zip(self.index_us, self.index_off)))
+
+    def buffer(self, start: int, end: int) -> Tuple[Union[mmap.mmap, bytes], int]:
+        """
+        (buf, base) such that buf[k - base] is byte k of the segment for
+        start <= k < end: the mapping itself once sealed, else one pread.
+        """
+        with self._lock:
+            if self.sealed:
+                if self._map is None:
+                    with open(self.path, "rb") as f:
+                        self._map = mmap.mmap(f.fileno(), self.size, access=mmap.ACCESS_READ, **_MMAP_KWARGS)
+                return self._map, 0
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDONLY)
+            return os.pread(self._fd, end - start, start), start
+
+    def unmap(self) -> None:
+        # left to the GC: responses may still hold views of the mapping
+        with self._lock:
+            self._map = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._map = None
+
+
+class EventLog:
+    """
+    Embedded append-only event log backing GET /events?since= (§8.2).
+
+    Events are stored as pre-encoded JSON records in rotated segment
+    files, named after the id of their first event. Each segment keeps a
+    sparse index with one (timestamp, offset) entry per
+    index_interval_bytes, so a `since` query is a binary search over
+    segments, one over the index and a scan of at most one index block.
+    The answer is a list of byte ranges of the segments (zero-copy views
+    for sealed ones) that form the response body as is.
+
+    Appends go through a buffered file and are flushed before the next
+    read. Timestamps must not go backwards.
+    """
+
+    def __init__(self, directory: str, config: Optional[EventLogConfig] = None) -> None:
+        if config is None:
+            config = EventLogConfig()
+        self.directory = directory
+        self.config = config
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        self._writer = None
+        self._dirty = False
+        self._next_id = 1
+        self._last_us: Optional[int] = None
+        self._last_index_off = 0
+        self._mapped: "OrderedDict[int, _Segment]" = OrderedDict()
+        self._map_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    # -- opening ----------------------------------------------------------
+
+    def _open(self) -> None:
+        names = sorted(n for n in os.listdir(self.directory) if n.endswith(".log"))
+        for name in names:
+            seg = _Segment(int(name[: -len(".log")]), os.path.join(self.directory, name))
+            self._segments.append(seg)
+
+        for seg in self._segments[:-1]:
+            seg.size = os.path.getsize(seg.path)
+            if not self._load_index(seg):
+                self._scan(seg)
+            seg.seal()
+        if self._segments:
+            active = self._segments[-1]
+            self._recover(active)
+            self._scan(active)
+            if active.size:
+                self._last_index_off = active.index_off[-1]
+            self._next_id = self._last_id() + 1
+            self._last_us = self._segments[-1].last_us
+            if self._last_us is None and len(self._segments) > 1:
+                self._last_us = self._segments[-2].last_us
+            self._writer = open(active.path, "ab")
+        else:
+            self._new_segment()
+
+    def _recover(self, seg: _Segment) -> None:
+        """
+        Truncate a torn last record left by a crash.
+        """
+        with open(seg.path, "rb") as f:
+            data = f.read()
+        keep = data.rfind(b"\n") + 1
+        if keep != len(data):
+            os.truncate(seg.path, keep)
+        seg.size = keep
+
+    def _load_index(self, seg: _Segment) -> bool:
+        try:
+            with open(seg.index_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return False
+        if not raw or len(raw) % _INDEX.size:
+            return False
+        for t, o in _INDEX.iter_unpack(raw):
+            seg.index_us.append(t)
+            seg.index_off.append(o)
+        seg.first_us = seg.index_us[0]
+        seg.last_us = to_epoch_us(parse_since(self._last_record(seg)[_TS_START:_TS_END].decode()))
+        return True
+
+    def _scan(self, seg: _Segment) -> None:
+        """
+        Rebuild a segment's index from its records.
+        """
+        with open(seg.path, "rb") as f:
+            data = f.read(seg.size)
+        del seg.index_us[:], seg.index_off[:]
+        pos = 0
+        last_off = None
+        while pos < len(data):
+            end = data.index(b"\n", pos) + 1
+            ts = to_epoch_us(parse_since(data[pos + _TS_START: pos + _TS_END].decode()))
+            if last_off is None or pos - last_off >= self.config.index_interval_bytes:
+                seg.index_us.append(ts)
+                seg.index_off.append(pos)
+                last_off = pos
+            if seg.first_us is None:
+                seg.first_us = ts
+            seg.last_us = ts
+            pos = end
+
+    def _buffer(self, seg: _Segment, start: int, end: int) -> Tuple[Union[mmap.mmap, bytes], int]:
+        """
+        seg.buffer(), keeping at most _MAX_MAPPED sealed segments mapped.
+        """
+        buf, base = seg.buffer(start, end)
+        if seg.sealed:
+            with self._map_lock:
+                self._mapped[seg.base_id] = seg
+                self._mapped.move_to_end(seg.base_id)
+                while len(self._mapped) > _MAX_MAPPED:
+                    self._mapped.popitem(last=False)[1].unmap()
+        return buf, base
+
+    def _last_record(self, seg: _Segment) -> bytes:
+        start = seg.index_off[-1] if len(seg.index_off) else 0
+        buf, base = self._buffer(seg, start, seg.size)
+        cut = buf.rfind(b"\n", start - base, seg.size - base - 1) + 1
+        return buf[cut: seg.size - base]
+
+    def _last_id(self) -> int:
+        for seg in reversed(self._segments):
+            if seg.size:
+                return json.loads(self._last_record(seg)[: -len(_RECORD_END)])["id"]
+            if seg.base_id > 1:
+                return seg.base_id - 1
+        return 0
+
+    # -- appending --------------------------------------------------------
+
+    def _new_segment(self) -> None:
+        path = os.path.join(self.directory, f"{self._next_id:020d}.log")
+        seg = _Segment(self._next_id, path)
+        self._segments.append(seg)
+        self._writer = open(path, "ab")
+        self._last_index_off = 0
+
+    def _roll(self) -> None:
+        self._flush()
+        self._writer.close()
+        if self.config.fsync:
+            fd = os.open(self._segments[-1].path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self._segments[-1].seal()
+        self._new_segment()
+        limit = self.config.max_segments
+        while limit and len(self._segments) > limit:
+            old = self._segments.pop(0)
+            old.close()
+            with self._map_lock:
+                self._mapped.pop(old.base_id, None)
+            for path in (old.path, old.index_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def append(
+        self,
+        entity_id: str,
+        timestamp: datetime,
+        event_type: str,
+        payload: Any = None,
+        confidence: Optional[Number] = None,
+    ) -> int:
+        """
+        Append one event and return its id.
+        """
+        ts_us = to_epoch_us(timestamp)
+        ts = format_timestamp(timestamp)
+        with self._lock:
+            if self._last_us is not None and ts_us < self._last_us:
+                raise ValueError(f"event at {ts} is older than the log head")
+            event_id = self._next_id
+            body = json.dumps(
+                {
+                    "id": event_id,
+                    "entity_id": entity_id,
+                    "event_type": event_type,
+                    "payload": payload,
+                    "confidence": confidence,
+                },
+                separators=(",", ":"),
+            )
+            record = b"".join((_TS_KEY, ts.encode(), b'",', body[1:].encode(), _RECORD_END))
+
+            seg = self._segments[-1]
+            if seg.size and seg.size + len(record) > self.config.segment_bytes:
+                self._roll()
+                seg = self._segments[-1]
+            if not seg.size or seg.size - self._last_index_off >= self.config.index_interval_bytes:
+                seg.index_us.append(ts_us)
+                seg.index_off.append(seg.size)
+                self._last_index_off = seg.size
+            self._writer.write(record)
+            self._dirty = True
+            seg.size += len(record)
+            if seg.first_us is None:
+                seg.first_us = ts_us
+            seg.last_us = ts_us
+            self._last_us = ts_us
+            self._next_id = event_id + 1
+            return event_id
+
+    def append_event(self, event: EventEnvelope) -> int:
+        return self.append(event.entity_id, event.timestamp, event.event_type, event.payload, event.confidence)
+
+    def _flush(self) -> None:
+        if self._dirty:
+            self._writer.flush()
+            if self.config.fsync:
+                os.fsync(self._writer.fileno())
+            self._dirty = False
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    # -- reading ----------------------------------------------------------
+
+    def _view(self) -> List[Tuple[_Segment, int]]:
+        """
+        Segments with their readable sizes, as of now.
+        """
+        with self._lock:
+            self._flush()
+            return [(seg, seg.size) for seg in self._segments if seg.size]
+
+    def read_since(self, since: Optional[datetime] = None, limit: int = 0) -> List[ByteChunk]:
+        """
+        Byte ranges holding the records after `since` (exclusive; all when
+        None), oldest first. With `limit`, at most that many records,
+        except that a run of records sharing the last timestamp is never
+        split, so paging with the last timestamp as `since` loses nothing.
+        """
+        segments = self._view()
+        i = 0
+        start = 0
+        if since is not None:
+            since_us = to_epoch_us(since)
+            since_ts = format_timestamp(since).encode()
+            i = bisect_right([seg.last_us for seg, _ in segments], since_us)
+            if i == len(segments):
+                return []
+            seg, size = segments[i]
+            # last index block starting at or before `since`, then scan it
+            j = bisect_right(seg.index_us, since_us) - 1
+            if j >= 0:
+                start = seg.index_off[j]
+                buf, base = self._buffer(seg, start, size)
+                while start < size and buf[start - base + _TS_START: start - base + _TS_END] <= since_ts:
+                    start = buf.find(b"\n", start - base) + 1 + base
+
+        chunks: List[ByteChunk] = []
+        remaining = limit
+        last_ts = None
+        for seg, size in segments[i:]:
+            buf, base = self._buffer(seg, start, size)
+            end = size
+            if limit:
+                end = start
+                while end < size:
+                    ts = buf[end - base + _TS_START: end - base + _TS_END]
+                    if remaining:
+                        remaining -= 1
+                        last_ts = ts
+                    elif ts != last_ts:
+                        break
+                    end = buf.find(b"\n", end - base) + 1 + base
+            if end > start:
+                chunks.append(memoryview(buf)[start - base: end - base])
+            if end < size:
+                break
+            start = 0
+        return chunks
+
+    def response_chunks(self, since: Optional[datetime] = None, limit: int = 0) -> List[ByteChunk]:
+        """
+        Complete JSON response body for GET /events as byte chunks, ready
+        for a vectored write (sum of lengths = Content-Length).
+        """
+        chunks = self.read_since(since, limit)
+        if chunks:
+            chunks[-1] = chunks[-1][: -len(_RECORD_END)]
+        return [_RESPONSE_HEAD, *chunks, _RESPONSE_TAIL]
+
+    def events_since(self, since: Optional[datetime] = None, limit: int = 0) -> List[EventEnvelope]:
+        """
+        Decoded events after `since`, for in-process consumers.
+        """
+        out = []
+        for chunk in self.read_since(since, limit):
+            for line in bytes(chunk).splitlines():
+                rec = json.loads(line[: -1])
+                out.append(EventEnvelope(
+                    id=rec["id"],
+                    entity_id=rec["entity_id"],
+                    timestamp=parse_since(rec["timestamp"]),
+                    event_type=rec["event_type"],
+                    payload=rec["payload"],
+                    confidence=rec["confidence"],
+                ))
+        return out
+
+    def __len__(self) -> int:
+        return self._next_id - self._segments[0].base_id if self._segments else 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                self._flush()
+                self._writer.close()
+                self._writer = None
+            for seg in self._segments:
+                seg.close()
+            with self._map_lock:
+                self._mapped.clear()
+
+    def __enter__(self) -> "EventLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
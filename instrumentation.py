@@ -0,0 +1,171 @@
+# alma/instrumentation.py
+
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+import sys
+import threading
+import time
+
+
+# fixed upper bucket bounds in milliseconds; the last bucket is open-ended
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 25.0, 50.0,
+    100.0, 250.0, 500.0, 1000.0, float("inf"),
+)
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram (constant memory, O(log buckets) record).
+    """
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the q-quantile (max_ms for the
+        open-ended bucket); 0.0 when empty.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": {
+                ("+inf" if b == float("inf") else str(b)): n
+                for b, n in zip(LATENCY_BUCKETS_MS, self.counts)
+            },
+        }
+
+
+class StageStats:
+    """
+    Timings and counters of one pipeline stage.
+    """
+
+    __slots__ = ("latency", "calls", "items", "alloc_blocks", "counters")
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.items = 0
+        self.alloc_blocks = 0
+        self.counters: Dict[str, int] = {}
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "items": self.items,
+            "alloc_blocks": self.alloc_blocks,
+            "counters": dict(self.counters),
+            "latency": self.latency.snapshot(),
+        }
+
+
+class Instrumentation:
+    """
+    Opt-in per-stage profiling.
+
+    Instrumented code checks `enabled` before doing anything, so the cost
+    when disabled is one attribute lookup per call:
+
+        instr = INSTRUMENTATION
+        token = instr.start() if instr.enabled else None
+        ...
+        if token is not None:
+            instr.record("dejavu.search", token, items=1, history_scanned=n)
+
+    alloc_blocks is the net change of sys.getallocatedblocks() over the
+    stage, i.e. how many interpreter allocations the stage left behind.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages = {}
+
+    @staticmethod
+    def start() -> Tuple[int, int]:
+        return time.perf_counter_ns(), sys.getallocatedblocks()
+
+    def record(self, stage: str, token: Tuple[int, int], items: int = 1, **counters: int) -> None:
+        t0, blocks0 = token
+        ms = (time.perf_counter_ns() - t0) / 1e6
+        blocks = sys.getallocatedblocks() - blocks0
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.latency.record(ms)
+            stats.calls += 1
+            stats.items += items
+            stats.alloc_blocks += blocks
+            for key, n in counters.items():
+                stats.counters[key] = stats.counters.get(key, 0) + n
+
+    def stage(self, name: str) -> Optional[StageStats]:
+        return self._stages.get(name)
+
+    def snapshot(self) -> dict:
+        """
+        Plain-dict copy of all stage statistics.
+        """
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in self._stages.items()}
+
+    def latency_ms(self, stage: Optional[str] = None, quantile: float = 0.99) -> float:
+        """
+        Single latency figure for the `latency` field of /health
+        (SYSTEM_LAYER_INTERFACE §8.5): the quantile of `stage`, or the
+        worst quantile across all stages.
+        """
+        with self._lock:
+            if stage is not None:
+                stats = self._stages.get(stage)
+                return stats.latency.percentile(quantile) if stats else 0.0
+            return max(
+                (s.latency.percentile(quantile) for s in self._stages.values()),
+                default=0.0,
+            )
+
+
+# process-wide instance used by the layers
+INSTRUMENTATION = Instrumentation()
@@ -0,0 +1,170 @@
+# alma/interpretation_batch.py
+
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence
+import math
+
+import numpy as np
+
+from .cadence_layer import CadencePoint, CadenceWindowMetrics
+from .dejavu_layer import DejaVuSummary
+from .interpretation_layer import (
+    LABEL_NAMES,
+    InterpretationConfig,
+    InterpretationLabel,
+    InterpretationResult,
+    _integrate_dejavu,
+    align_summaries,
+    labels_of,
+)
+
+
+# InterpretationLabel bits as uint16 column values
+LABELS = LABEL_NAMES
+_BIT = {lab.name.lower(): np.uint16(lab) for lab in InterpretationLabel}
+
+
+@dataclass
+class InterpretationTable:
+    """
+    Columnar interpretation output; one row per cadence point.
+    """
+    timestamps: List[datetime]
+    flags: np.ndarray               # uint16 InterpretationLabel bits
+    confidence: np.ndarray          # float64
+    dejavu: List[Optional[str]]
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def labels(self, i: int) -> List[str]:
+        return list(labels_of(int(self.flags[i])))
+
+    def to_results(self) -> List[InterpretationResult]:
+        return [
+            InterpretationResult(ts, flags, conf, dv)
+            for ts, flags, conf, dv in zip(
+                self.timestamps, self.flags.tolist(), self.confidence.tolist(), self.dejavu
+            )
+        ]
+
+
+def _column(values: List[Optional[float]]) -> np.ndarray:
+    """
+    float64 column with NaN for None.
+    """
+    return np.array([math.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def interpret_columns(
+    hr: np.ndarray,
+    hrv: np.ndarray,
+    movement: np.ndarray,
+    confidence: np.ndarray,
+    config: Optional[InterpretationConfig] = None,
+) -> np.ndarray:
+    """
+    Evaluate the point and trend rules over whole columns (NaN = missing).
+    Returns the uint16 label flags per row.
+    """
+    if config is None:
+        config = InterpretationConfig()
+
+    n = confidence.shape[0]
+    flags = np.zeros(n, dtype=np.uint16)
+    # NaN compares False everywhere, exactly like the None checks
+    low_conf = confidence < config.min_confidence
+    ok = ~low_conf
+
+    elevated = ok & (hr > config.high_hr_threshold)
+    low_hr = ok & ~elevated & (hr < config.low_hr_threshold)
+    calm = ok & (hrv >= config.calm_hrv_threshold)
+    tension = ok & ~calm & (hrv <= config.tension_hrv_threshold)
+    active = ok & (movement > config.movement_threshold)
+    neutral = ok & ~(elevated | low_hr | calm | tension | active)
+
+    for name, mask in (
+        ("low_confidence", low_conf),
+        ("elevated_heart_rate", elevated),
+        ("low_heart_rate", low_hr),
+        ("calm_indicator", calm),
+        ("tension_indicator", tension),
+        ("active", active),
+        ("neutral", neutral),
+    ):
+        flags[mask] |= _BIT[name]
+
+    # trend: first/last slope over the last N points, rows N-1 onwards
+    span = config.trend_window_points
+    if 0 < span <= n:
+        first = slice(0, n - span + 1)
+        last = slice(span - 1, n)
+        hr_slope = hr[last] - hr[first]
+        hrv_slope = hrv[last] - hrv[first]
+        mov_slope = movement[last] - movement[first]
+        mov_last = movement[last]
+
+        calming = (hr_slope < -2) & (hrv_slope > 2)
+        rising = ~calming & (hr_slope > 2) & (hrv_slope < -2)
+        steady = (
+            ~calming & ~rising
+            & (np.abs(mov_slope) <= 5)
+            & (mov_last < config.movement_threshold)
+        )
+        trend = flags[last]
+        trend[calming] |= _BIT["calming_trend"]
+        trend[rising] |= _BIT["tension_trend"]
+        trend[steady] |= _BIT["steady_state"]
+
+    return flags
+
+
+def interpret_state_table(
+    cadence_series: Sequence[CadencePoint],
+    windows: Sequence[CadenceWindowMetrics],
+    dejavu_summaries: Sequence[DejaVuSummary],
+    config: Optional[InterpretationConfig] = None,
+) -> InterpretationTable:
+    """
+    Columnar equivalent of interpret_state.
+    """
+    if config is None:
+        config = InterpretationConfig()
+
+    confidence = np.fromiter((p.confidence for p in cadence_series), dtype=np.float64)
+    flags = interpret_columns(
+        _column([p.hr_mean for p in cadence_series]),
+        _column([p.hrv_rmssd for p in cadence_series]),
+        _column([p.movement_level for p in cadence_series]),
+        confidence,
+        config,
+    )
+
+    dejavu: List[Optional[str]] = [
+        _integrate_dejavu(summary) if summary is not None else None
+        for summary in align_summaries(
+            cadence_series, dejavu_summaries, config.join_tolerance_seconds
+        )
+    ]
+
+    return InterpretationTable(
+        timestamps=[p.timestamp for p in cadence_series],
+        flags=flags,
+        confidence=confidence,
+        dejavu=dejavu,
+    )
+
+
+def interpret_state_batch(
+    cadence_series: Sequence[CadencePoint],
+    windows: Sequence[CadenceWindowMetrics],
+    dejavu_summaries: Sequence[DejaVuSummary],
+    config: Optional[InterpretationConfig] = None,
+) -> List[InterpretationResult]:
+    """
+    Same results as interpret_state, with the rules evaluated as array
+    masks; InterpretationResult objects are only built at the end.
+    """
+    return interpret_state_table(cadence_series, windows, dejavu_summaries, config).to_results()
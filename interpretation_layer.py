@@ -2,11 +2,18 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Optional, Literal
-from datetime import datetime
+from bisect import bisect_right
+from collections import deque
+from enum import IntFlag
+from typing import (
+    Callable, Deque, Dict, Generic, Iterable, Iterator, List, Optional, Literal,
+    Sequence, Tuple, TypeVar,
+)
+from datetime import datetime, timedelta
 
 from .cadence_layer import CadencePoint, CadenceWindowMetrics
 from .dejavu_layer import DejaVuSummary
+from .instrumentation import INSTRUMENTATION
 
 
 Number = float
@@ -24,63 +31,153 @@ class InterpretationConfig:
     low_hr_threshold: Number = 55
     movement_threshold: Number = 200       # accel magnitude (mg)
     trend_window_points: int = 3           # how many cadence points to check for trends
+    join_tolerance_seconds: Number = 0.0   # max clock skew between a point and its summary
 
 
-@dataclass
+class InterpretationLabel(IntFlag):
+    """
+    Known interpretation labels as bits.
+    Bit order follows the order labels are emitted in, so rendering set
+    bits from low to high reproduces the label lists.
+    """
+    LOW_CONFIDENCE = 1 << 0
+    ELEVATED_HEART_RATE = 1 << 1
+    LOW_HEART_RATE = 1 << 2
+    CALM_INDICATOR = 1 << 3
+    TENSION_INDICATOR = 1 << 4
+    ACTIVE = 1 << 5
+    NEUTRAL = 1 << 6
+    CALMING_TREND = 1 << 7
+    TENSION_TREND = 1 << 8
+    STEADY_STATE = 1 << 9
+
+
+# label strings in bit order, and plain-int bits for the hot path
+LABEL_NAMES: Tuple[str, ...] = tuple(lab.name.lower() for lab in InterpretationLabel)
+_LABEL_BITS: Dict[str, int] = {lab.name.lower(): int(lab) for lab in InterpretationLabel}
+
+_LOW_CONFIDENCE = int(InterpretationLabel.LOW_CONFIDENCE)
+_ELEVATED_HEART_RATE = int(InterpretationLabel.ELEVATED_HEART_RATE)
+_LOW_HEART_RATE = int(InterpretationLabel.LOW_HEART_RATE)
+_CALM_INDICATOR = int(InterpretationLabel.CALM_INDICATOR)
+_TENSION_INDICATOR = int(InterpretationLabel.TENSION_INDICATOR)
+_ACTIVE = int(InterpretationLabel.ACTIVE)
+_NEUTRAL = int(InterpretationLabel.NEUTRAL)
+
+# rendered (labels, details) per distinct flag value; at most 2**10 entries
+_rendered: Dict[int, Tuple[Tuple[str, ...], str]] = {}
+
+
+def _render(flags: int) -> Tuple[Tuple[str, ...], str]:
+    entry = _rendered.get(flags)
+    if entry is None:
+        names = tuple(name for i, name in enumerate(LABEL_NAMES) if flags >> i & 1)
+        entry = _rendered[flags] = (names, ", ".join(names) if names else "neutral")
+    return entry
+
+
+def labels_of(flags: int) -> Tuple[str, ...]:
+    """
+    Label names encoded in a flag value.
+    """
+    return _render(flags)[0]
+
+
+def flags_of(labels: Iterable[str]) -> int:
+    """
+    InterpretationLabel bits of a label list; unknown labels are ignored.
+    """
+    flags = 0
+    for name in labels:
+        flags |= _LABEL_BITS.get(name, 0)
+    return flags
+
+
+@dataclass(slots=True)
 class InterpretationResult:
     """
     High-level human-readable output.
+
+    The labels are stored as InterpretationLabel bits in `flags`; `labels`
+    and `details` are rendered on access from a per-flag cache, so results
+    with the same label set share one tuple and one string.
     """
     timestamp: datetime
-    labels: List[str]               # ["calm", "overload", "tension pattern", ...]
-    details: str                    # short explanation
+    flags: int                      # InterpretationLabel bits
     confidence: Number
     dejavu: Optional[str] = None    # e.g. "similar to 2h ago (0.87)"
 
+    @property
+    def labels(self) -> Tuple[str, ...]:
+        """
+        Label names, e.g. ("elevated_heart_rate", "tension_trend").
+        """
+        return _render(self.flags)[0]
+
+    @property
+    def details(self) -> str:
+        """
+        Short explanation: the labels joined by ", ", or "neutral".
+        """
+        return _render(self.flags)[1]
+
+    @classmethod
+    def from_labels(
+        cls,
+        timestamp: datetime,
+        labels: Iterable[str],
+        confidence: Number,
+        dejavu: Optional[str] = None,
+    ) -> "InterpretationResult":
+        """
+        Result carrying the known labels in `labels` (others are dropped).
+        """
+        return cls(timestamp, flags_of(labels), confidence, dejavu)
+
 
 def _interpret_single_point(
     point: CadencePoint,
     config: InterpretationConfig
-) -> List[str]:
+) -> int:
     """
     Interpret instantaneous state from one cadence point.
-    Returns list of labels.
+    Returns InterpretationLabel bits.
     """
     if point.confidence < config.min_confidence:
-        return ["low_confidence"]
+        return _LOW_CONFIDENCE
 
-    labels: List[str] = []
+    flags = 0
 
     # HR-based hints
     hr = point.hr_mean
     if hr is not None:
         if hr > config.high_hr_threshold:
-            labels.append("elevated_heart_rate")
+            flags |= _ELEVATED_HEART_RATE
         elif hr < config.low_hr_threshold:
-            labels.append("low_heart_rate")
+            flags |= _LOW_HEART_RATE
 
     # HRV-based hints
     hrv = point.hrv_rmssd
     if hrv is not None:
         if hrv >= config.calm_hrv_threshold:
-            labels.append("calm_indicator")
+            flags |= _CALM_INDICATOR
         elif hrv <= config.tension_hrv_threshold:
-            labels.append("tension_indicator")
+            flags |= _TENSION_INDICATOR
 
     # movement
     mov = point.movement_level
     if mov is not None and mov > config.movement_threshold:
-        labels.append("active")
+        flags |= _ACTIVE
 
     # if nothing stuck, add a neutral tag
-    if not labels:
-        labels.append("neutral")
+    if not flags:
+        flags = _NEUTRAL
 
-    return labels
+    return flags
 
 
 def _interpret_trend(
-    recent_points: List[CadencePoint],
+    recent_points: Sequence[CadencePoint],
     config: InterpretationConfig
 ) -> Optional[str]:
     """
@@ -142,6 +239,143 @@ def _integrate_dejavu(
     return f"similar to {time_str} ago ({best.similarity:.2f})"
 
 
+def _interpret_point(
+    point: CadencePoint,
+    trend_window: Sequence[CadencePoint],
+    dejavu_summary: Optional[DejaVuSummary],
+    config: InterpretationConfig,
+) -> InterpretationResult:
+    """
+    Build the InterpretationResult of one point, given the last
+    trend_window_points points (ending with `point`) and its summary.
+    """
+    # single point labels
+    flags = _interpret_single_point(point, config)
+
+    trend_label = _interpret_trend(trend_window, config)
+    if trend_label is not None:
+        flags |= _LABEL_BITS[trend_label]
+
+    return InterpretationResult(
+        point.timestamp, flags, point.confidence, _integrate_dejavu(dejavu_summary),
+    )
+
+
+class StreamingInterpreter:
+    """
+    Incremental interpretation, one cadence point at a time.
+
+    Keeps the last trend_window_points points in a ring buffer, so each
+    push is constant time. Pushing the points of a series in order (with
+    the summary interpret_state would find for each) yields exactly the
+    results of interpret_state.
+    """
+
+    def __init__(self, config: Optional[InterpretationConfig] = None) -> None:
+        if config is None:
+            config = InterpretationConfig()
+        self.config = config
+        self._recent: Deque[CadencePoint] = deque(maxlen=max(1, config.trend_window_points))
+
+    def push(
+        self,
+        point: CadencePoint,
+        dejavu_summary: Optional[DejaVuSummary] = None,
+    ) -> InterpretationResult:
+        self._recent.append(point)
+        return _interpret_point(point, self._recent, dejavu_summary, self.config)
+
+
+T = TypeVar("T")
+
+_END = object()
+
+
+class AsOfJoin(Generic[T]):
+    """
+    Incremental as-of join against a stream of items sorted by `key`.
+
+    match(ts) returns the last item with key <= ts + tolerance, provided
+    it is no more than `tolerance` before ts; None otherwise. Queries must
+    come in ascending order. Items are pulled from the iterable lazily and
+    only the current and next one are kept, so it also works on live
+    streams.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[T],
+        key: Callable[[T], datetime],
+        tolerance: timedelta = timedelta(0),
+    ) -> None:
+        self.key = key
+        self.tolerance = tolerance
+        self._items = iter(items)
+        self._next = next(self._items, _END)
+        self._current = _END
+        self._last: Optional[datetime] = None
+
+    def match(self, ts: datetime) -> Optional[T]:
+        if self._last is not None and ts < self._last:
+            raise ValueError("as-of join queries must be in ascending order")
+        self._last = ts
+
+        limit = ts + self.tolerance
+        while self._next is not _END and self.key(self._next) <= limit:
+            self._current = self._next
+            self._next = next(self._items, _END)
+
+        current = self._current
+        if current is not _END and ts - self.key(current) <= self.tolerance:
+            return current
+        return None
+
+
+def _window_end(summary: DejaVuSummary) -> datetime:
+    return summary.window_end
+
+
+def _ascending(values: Iterable[datetime]) -> bool:
+    it = iter(values)
+    prev = next(it, None)
+    for v in it:
+        if v < prev:
+            return False
+        prev = v
+    return True
+
+
+def align_summaries(
+    cadence_series: Sequence[CadencePoint],
+    dejavu_summaries: Sequence[DejaVuSummary],
+    tolerance_seconds: Number = 0.0,
+) -> Iterator[Optional[DejaVuSummary]]:
+    """
+    Deja-Vu summary of each point: the latest summary whose window_end is
+    within `tolerance_seconds` of the point's timestamp (exact match when
+    0). One merge pass when both sides are time-ordered; unsorted input
+    is sorted / bisected instead.
+    """
+    tol = timedelta(seconds=tolerance_seconds)
+    if not _ascending(s.window_end for s in dejavu_summaries):
+        # stable, so a later summary still wins on equal window_end
+        dejavu_summaries = sorted(dejavu_summaries, key=_window_end)
+
+    if _ascending(p.timestamp for p in cadence_series):
+        join = AsOfJoin(dejavu_summaries, _window_end, tol)
+        for point in cadence_series:
+            yield join.match(point.timestamp)
+        return
+
+    ends = [s.window_end for s in dejavu_summaries]
+    for point in cadence_series:
+        i = bisect_right(ends, point.timestamp + tol)
+        if i and point.timestamp - ends[i - 1] <= tol:
+            yield dejavu_summaries[i - 1]
+        else:
+            yield None
+
+
 def interpret_state(
     cadence_series: List[CadencePoint],
     windows: List[CadenceWindowMetrics],
@@ -158,45 +392,18 @@ def interpret_state(
     """
     if config is None:
         config = InterpretationConfig()
+    instr = INSTRUMENTATION
+    token = instr.start() if instr.enabled else None
 
     results: List[InterpretationResult] = []
 
-    # pre-index windows and dejavu by timestamp for fast lookup
-    window_map = {w.window_end: w for w in windows}
-    dejavu_map = {s.window_end: s for s in dejavu_summaries}
-
-    for i, point in enumerate(cadence_series):
-        # single point labels
-        single_labels = _interpret_single_point(point, config)
-
-        # trend label (use last N points up to i)
-        trend_window = cadence_series[max(0, i - config.trend_window_points + 1): i + 1]
-        trend_label = _interpret_trend(trend_window, config)
-
-        # build label list
-        labels = single_labels.copy()
-        if trend_label is not None:
-            labels.append(trend_label)
-
-        # details string
-        details = ", ".join(labels) if labels else "neutral"
-
-        # confidence for the result: average of point confidence
-        confidence = point.confidence
-
-        # dejavu string
-        window_key = point.timestamp  # assume point.timestamp == window_end
-        dejavu_summary = dejavu_map.get(window_key)
-        dejavu_str = _integrate_dejavu(dejavu_summary)
+    # point.timestamp is its window_end, up to join_tolerance_seconds of skew
+    summaries = align_summaries(cadence_series, dejavu_summaries, config.join_tolerance_seconds)
 
-        results.append(
-            InterpretationResult(
-                timestamp=point.timestamp,
-                labels=labels,
-                details=details,
-                confidence=confidence,
-                dejavu=dejavu_str,
-            )
-        )
+    interpreter = StreamingInterpreter(config)
+    for point, dejavu_summary in zip(cadence_series, summaries):
+        results.append(interpreter.push(point, dejavu_summary))
 
+    if token is not None:
+        instr.record("interpretation.interpret_state", token, items=len(cadence_series))
     return results
@@ -1,35 +1,112 @@
-# Alma Core Pipeline – Cadence → Deja-Vu → Interpretation
-
-This document shows how to use the core Alma layers end-to-end.
-
-```python
-from datetime import datetime, timedelta
-from alma_core.cadence_layer import RawSample
-from alma_core.pipeline import run_alma_core_pipeline, AlmaPipelineConfig
-
-# 1) Build some dummy samples (in real life these come from the device).
-now = datetime.utcnow()
-samples = [
-    RawSample(
-        timestamp=now + timedelta(seconds=i * 5),
-        hr_bpm=70 + (i % 5),
-        rr_ms=850.0,
-        accel_mg=100.0,
-        signal_quality=0.9,
-        battery_pct=80.0,
-    )
-    for i in range(0, 200)  # ~1000 seconds of data
-]
-
-# 2) Configure the pipeline (uses sane defaults if you don't tweak anything).
-config = AlmaPipelineConfig(
-    cadence_seconds=120,
-    window_minutes=10,
+# alma/pipeline.py
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .cadence_layer import (
+    CadenceConfig,
+    CadenceWindowEngine,
+    CadenceWindowMetrics,
+    RawSample,
+    window_to_cadence_point,
+)
+from .dejavu_layer import DejaVuConfig, DejaVuEngine, DejaVuSummary
+from .interpretation_layer import (
+    InterpretationConfig,
+    InterpretationResult,
+    StreamingInterpreter,
 )
 
-# 3) Run the full core pipeline.
-results = run_alma_core_pipeline(samples, config=config)
 
-# 4) Inspect the high-level interpretation.
-for r in results:
-    print(r.timestamp.isoformat(), r.labels, r.details, "conf=", r.confidence)
+Number = float
+
+
+@dataclass
+class AlmaPipelineConfig:
+    """
+    Configuration of the core Cadence -> Deja-Vu -> Interpretation chain.
+    Uses sane defaults for everything that is not set.
+    """
+    cadence_seconds: Number = 120               # cadence window size
+    cadence_step_seconds: Optional[Number] = None   # defaults to cadence_seconds
+    window_minutes: int = 10                    # Deja-Vu match duration
+    min_signal_quality: Number = 0.7
+    dejavu: Optional[DejaVuConfig] = None
+    interpretation: Optional[InterpretationConfig] = None
+
+    def cadence_config(self) -> CadenceConfig:
+        step = self.cadence_step_seconds
+        return CadenceConfig(
+            window_size=self.cadence_seconds,
+            step_size=self.cadence_seconds if step is None else step,
+            min_signal_quality=self.min_signal_quality,
+        )
+
+    def dejavu_config(self) -> DejaVuConfig:
+        if self.dejavu is not None:
+            return self.dejavu
+        return DejaVuConfig(window_minutes=self.window_minutes)
+
+    def interpretation_config(self) -> InterpretationConfig:
+        if self.interpretation is not None:
+            return self.interpretation
+        return InterpretationConfig()
+
+
+def cadence_stage(
+    samples: Iterable[RawSample],
+    config: CadenceConfig,
+) -> Iterator[CadenceWindowMetrics]:
+    """
+    Yield each cadence window as soon as a later sample closes it.
+    """
+    engine = CadenceWindowEngine(config)
+    for s in samples:
+        yield from engine.push(s)
+    yield from engine.flush()
+
+
+def dejavu_stage(
+    windows: Iterable[CadenceWindowMetrics],
+    config: DejaVuConfig,
+) -> Iterator[Tuple[CadenceWindowMetrics, Optional[DejaVuSummary]]]:
+    """
+    Pair every window with its Deja-Vu summary (None before any history).
+    """
+    engine = DejaVuEngine(config)
+    for w in windows:
+        yield w, engine.push(w)
+
+
+def interpretation_stage(
+    pairs: Iterable[Tuple[CadenceWindowMetrics, Optional[DejaVuSummary]]],
+    config: InterpretationConfig,
+) -> Iterator[InterpretationResult]:
+    """
+    Interpret each window's cadence point as it arrives.
+    """
+    interpreter = StreamingInterpreter(config)
+    for window, summary in pairs:
+        yield interpreter.push(window_to_cadence_point(window), summary)
+
+
+def run_alma_core_pipeline(
+    samples: Iterable[RawSample],
+    config: Optional[AlmaPipelineConfig] = None,
+) -> Iterator[InterpretationResult]:
+    """
+    Main entry point for the core pipeline.
+
+    Accepts any iterable of time-ordered RawSample (a list, a file reader,
+    a live device stream) and yields InterpretationResult objects as each
+    cadence window closes. Every stage is a generator with bounded state
+    (open cadence windows, the Deja-Vu lookback, the trend window), so
+    memory stays constant on multi-day streams.
+    """
+    if config is None:
+        config = AlmaPipelineConfig()
+
+    windows = cadence_stage(samples, config.cadence_config())
+    pairs = dejavu_stage(windows, config.dejavu_config())
+    return interpretation_stage(pairs, config.interpretation_config())
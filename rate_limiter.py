@@ -0,0 +1,193 @@
+# alma/rate_limiter.py
+
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional
+import time
+
+
+Number = float
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Token bucket: `rate` tokens per second, at most `burst` stored.
+    """
+    rate: Number
+    burst: Number
+
+
+# SYSTEM_LAYER_INTERFACE §8.6
+DEFAULT_LIMITS: Dict[str, RateLimit] = {
+    "/state": RateLimit(rate=1.0, burst=1.0),
+    "/events": RateLimit(rate=5.0, burst=5.0),
+    "/input": RateLimit(rate=30.0, burst=30.0),
+    "/telemetry": RateLimit(rate=1.0 / 60.0, burst=1.0),
+}
+
+# clients examined per new client when looking for one to evict
+_EVICT_PROBES = 8
+
+# seconds; absorbs rounding in tat, which is a running sum of steps
+_SLACK = 1e-9
+
+
+class RateLimiter:
+    """
+    Per-client, per-endpoint token buckets in one flat float array.
+
+    Each bucket is kept in GCRA form: instead of (tokens, last refill) it
+    stores the single "theoretical arrival time" at which the bucket would
+    be full again. A request costing c is admitted when
+    max(tat, now) - now <= (burst - c) / rate, which is exactly the
+    token bucket test tokens >= c with tokens refilled lazily from the
+    monotonic clock, at one read and one write per decision. Bucket
+    (slot, endpoint) lives at slot * n_endpoints + endpoint, so a client
+    costs 8 bytes per endpoint plus its dict entry.
+
+    A client whose buckets all have tat <= now is indistinguishable from a
+    new one, so its slot can be reused without changing any decision.
+    Eviction is CLOCK-style and only runs when a new client needs a slot:
+    a hand sweeps a few slots past where it stopped last time and frees
+    the idle ones. When every probed client is active the array doubles,
+    up to `max_clients` slots; beyond that the new client is refused
+    (allow() returns False) until probes find an idle slot, so memory
+    stays bounded however many client IDs show up.
+
+    Endpoints without a limit are always allowed. Not thread-safe; made
+    for a single event loop (allow() never awaits).
+    """
+
+    __slots__ = ("clock", "max_clients", "_endpoints", "_interval", "_limit", "_n",
+                 "_slots", "_owner", "_free", "_hand", "_capacity", "_tat")
+
+    def __init__(
+        self,
+        limits: Optional[Mapping[str, RateLimit]] = None,
+        capacity: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+        max_clients: int = 65_536,
+    ) -> None:
+        if limits is None:
+            limits = DEFAULT_LIMITS
+        if max_clients < 1:
+            raise ValueError("max_clients must be >= 1")
+        for name, lim in limits.items():
+            if lim.rate <= 0 or lim.burst < 1:
+                raise ValueError(f"{name}: rate must be > 0 and burst >= 1")
+        self.clock = clock
+        self.max_clients = max_clients
+        self._endpoints: Dict[str, int] = {name: i for i, name in enumerate(limits)}
+        self._interval = [1.0 / lim.rate for lim in limits.values()]
+        self._limit = [lim.burst / lim.rate for lim in limits.values()]
+        self._n = len(self._interval)
+
+        self._slots: Dict[str, int] = {}
+        self._owner: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._hand = 0
+        self._capacity = 0
+        self._tat = array("d")
+        self._grow(max(1, min(capacity, max_clients)))
+
+    def _grow(self, slots: int) -> None:
+        self._free.extend(range(self._capacity + slots - 1, self._capacity - 1, -1))
+        self._capacity += slots
+        self._owner.extend([None] * slots)
+        self._tat.extend([0.0] * (slots * self._n))
+
+    def _idle(self, slot: int, now: float) -> bool:
+        base = slot * self._n
+        return max(self._tat[base: base + self._n]) <= now
+
+    def _release(self, slot: int) -> None:
+        del self._slots[self._owner[slot]]
+        self._owner[slot] = None
+        self._free.append(slot)
+
+    def _assign(self, client_id: str, now: float) -> Optional[int]:
+        if not self._free:
+            hand = self._hand
+            for _ in range(min(_EVICT_PROBES, self._capacity)):
+                if self._owner[hand] is not None and self._idle(hand, now):
+                    self._release(hand)
+                hand = (hand + 1) % self._capacity
+            self._hand = hand
+            if not self._free:
+                if self._capacity >= self.max_clients:
+                    return None
+                self._grow(min(self._capacity, self.max_clients - self._capacity))
+        slot = self._free.pop()
+        base = slot * self._n
+        self._tat[base: base + self._n] = array("d", [0.0] * self._n)
+        self._owner[slot] = client_id
+        self._slots[client_id] = slot
+        return slot
+
+    def allow(self, client_id: str, endpoint: str, cost: Number = 1.0) -> bool:
+        """
+        Take `cost` tokens from the client's bucket for `endpoint`; False
+        (and no change) if the bucket does not hold that many, or if the
+        client is new and all max_clients slots are in use.
+        """
+        e = self._endpoints.get(endpoint)
+        if e is None:
+            return True
+        now = self.clock()
+        slot = self._slots.get(client_id)
+        if slot is None:
+            slot = self._assign(client_id, now)
+            if slot is None:
+                return False
+        i = slot * self._n + e
+        tat = self._tat[i]
+        if tat < now:
+            tat = now
+        step = self._interval[e] * cost
+        # backlog before the step, so a full bucket compares 0 exactly
+        if tat - now > self._limit[e] - step + _SLACK:
+            return False
+        self._tat[i] = tat + step
+        return True
+
+    def tokens(self, client_id: str, endpoint: str) -> Number:
+        """
+        Tokens currently in the client's bucket for `endpoint`.
+        """
+        e = self._endpoints[endpoint]
+        slot = self._slots.get(client_id)
+        if slot is None:
+            return self._limit[e] / self._interval[e]
+        backlog = max(0.0, self._tat[slot * self._n + e] - self.clock())
+        return (self._limit[e] - backlog) / self._interval[e]
+
+    def retry_after(self, client_id: str, endpoint: str, cost: Number = 1.0) -> Number:
+        """
+        Seconds until allow() would next succeed (0 if it would now).
+        """
+        e = self._endpoints.get(endpoint)
+        slot = self._slots.get(client_id)
+        if e is None or slot is None:
+            return 0.0
+        now = self.clock()
+        tat = max(self._tat[slot * self._n + e], now)
+        return max(0.0, tat + self._interval[e] * cost - self._limit[e] - now)
+
+    def evict_idle(self) -> int:
+        """
+        Release every idle client now; returns how many were released.
+        """
+        now = self.clock()
+        idle = [slot for slot in self._slots.values() if self._idle(slot, now)]
+        for slot in idle:
+            self._release(slot)
+        return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
@@ -0,0 +1,280 @@
+# alma/request_auth.py
+
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional, Union
+import hmac
+import time
+
+from .codec import EPOCH
+from .event_log import parse_since
+
+
+Number = float
+
+# rejection codes (SYSTEM_LAYER_INTERFACE §8.8)
+ERROR_MISSING_HEADERS = "ERROR_MISSING_HEADERS"
+ERROR_UNKNOWN_CLIENT = "ERROR_UNKNOWN_CLIENT"
+ERROR_TIMESTAMP_DRIFT = "ERROR_TIMESTAMP_DRIFT"
+ERROR_SIGNATURE_INVALID = "ERROR_SIGNATURE_INVALID"
+ERROR_REPLAY = "ERROR_REPLAY"
+ERROR_REPLAY_CACHE_FULL = "ERROR_REPLAY_CACHE_FULL"
+
+HEADER_CLIENT_ID = "X-Alma-Client-ID"
+HEADER_TIMESTAMP = "X-Alma-Timestamp"
+HEADER_SIGNATURE = "X-Alma-Signature"
+
+# replay cache key: leading bytes of the signature digest
+_KEY_BYTES = 16
+
+_TIMESTAMP_CACHE_SIZE = 4096
+
+SecretSource = Union[Mapping[str, bytes], Callable[[str], Optional[bytes]]]
+
+
+@dataclass
+class VerifierConfig:
+    """
+    Signature verification and replay protection settings.
+    """
+    max_drift_seconds: Number = 30          # reject timestamps further off than this
+    bucket_seconds: Number = 5              # replay cache granularity
+    max_entries_per_client: int = 1_000     # exact signatures per client and bucket
+    max_entries_per_bucket: int = 100_000   # exact signatures per bucket, all clients
+    bloom_bits_per_bucket: int = 0          # 0 = no Bloom filter
+    bloom_hashes: int = 4
+    key_cache_size: int = 10_000            # prepared per-client HMAC states
+
+
+def canonical_message(client_id: str, timestamp: str, payload: bytes = b"") -> bytes:
+    """
+    Signed bytes: timestamp, client ID and payload, newline separated.
+    """
+    return b"".join((timestamp.encode(), b"\n", client_id.encode(), b"\n", payload))
+
+
+class _Bucket:
+    __slots__ = ("seen", "per_client", "bloom", "overflow", "overflowed")
+
+    def __init__(self, bloom_bits: int) -> None:
+        self.seen: set = set()
+        self.per_client: Dict[str, int] = {}
+        self.bloom: Optional[bytearray] = bytearray((bloom_bits + 7) // 8) if bloom_bits else None
+        self.overflow = False       # exact set full; the Bloom filter alone decides
+        self.overflowed: set = set()    # clients past their cap; likewise
+
+
+class ReplayCache:
+    """
+    Signatures seen within the drift window, grouped into time buckets by
+    request timestamp.
+
+    A replay only gets past the drift check while its timestamp is within
+    max_drift_seconds of now, so a bucket is dropped as a whole once it
+    falls out of that window; nothing is swept entry by entry. Each bucket
+    holds at most max_entries_per_client exact keys per client and
+    max_entries_per_bucket in total, and at most
+    2 * max_drift_seconds / bucket_seconds + 2 buckets are live (requests
+    may be early or late), so memory is bounded.
+
+    With a Bloom filter each bucket is checked against its bit array
+    first (a miss is a definite miss), and past either cap the filter
+    alone keeps protecting that client (or the whole bucket), trading a
+    small false rejection rate for bounded memory. Without a filter,
+    requests past a cap are rejected (ERROR_REPLAY_CACHE_FULL), failing
+    closed: a client over its own cap only locks itself out, but enough
+    clients at their caps to fill max_entries_per_bucket lock out every
+    client until the bucket expires, so size the two caps (or enable the
+    filter) for the expected client count.
+
+    Keys are signature digests, so Bloom positions are read straight from
+    their bytes without further hashing.
+    """
+
+    def __init__(self, config: Optional[VerifierConfig] = None) -> None:
+        if config is None:
+            config = VerifierConfig()
+        self.config = config
+        self._buckets: Dict[int, _Bucket] = {}
+        self._oldest: Optional[int] = None
+        self._bloom_bits = config.bloom_bits_per_bucket
+        if self._bloom_bits and config.bloom_hashes * 4 > _KEY_BYTES:
+            raise ValueError(f"bloom_hashes must be at most {_KEY_BYTES // 4} (4 key bytes each)")
+
+    def _positions(self, key: bytes):
+        m = self._bloom_bits
+        return [int.from_bytes(key[4 * i: 4 * i + 4], "little") % m for i in range(self.config.bloom_hashes)]
+
+    def expire(self, now: Number) -> None:
+        """
+        Drop buckets that lie entirely before now - max_drift_seconds.
+        """
+        oldest = int((now - self.config.max_drift_seconds) // self.config.bucket_seconds)
+        if self._oldest is not None and oldest <= self._oldest:
+            return
+        self._oldest = oldest
+        for index in [i for i in self._buckets if i < oldest]:
+            del self._buckets[index]
+
+    def check_and_add(self, key: bytes, timestamp: Number, client_id: str = "") -> Optional[str]:
+        """
+        Record a signature digest; returns a rejection code if it was seen
+        before (or cannot be tracked), None if it is new.
+        """
+        config = self.config
+        index = int(timestamp // config.bucket_seconds)
+        bucket = self._buckets.get(index)
+        if bucket is None:
+            bucket = self._buckets[index] = _Bucket(self._bloom_bits)
+
+        bloom = bucket.bloom
+        if bloom is not None:
+            positions = self._positions(key)
+            if all(bloom[p >> 3] >> (p & 7) & 1 for p in positions):
+                if bucket.overflow or key in bucket.seen or client_id in bucket.overflowed:
+                    return ERROR_REPLAY
+            for p in positions:
+                bloom[p >> 3] |= 1 << (p & 7)
+        elif key in bucket.seen:
+            return ERROR_REPLAY
+
+        count = bucket.per_client.get(client_id, 0)
+        if count >= config.max_entries_per_client:
+            if bloom is None:
+                return ERROR_REPLAY_CACHE_FULL
+            bucket.overflowed.add(client_id)
+        elif len(bucket.seen) >= config.max_entries_per_bucket:
+            if bloom is None:
+                return ERROR_REPLAY_CACHE_FULL
+            bucket.overflow = True
+        else:
+            bucket.seen.add(key)
+            bucket.per_client[client_id] = count + 1
+        return None
+
+    def __len__(self) -> int:
+        return sum(len(b.seen) for b in self._buckets.values())
+
+    @property
+    def bucket_count(self) -> int:
+        return len(self._buckets)
+
+
+class RequestVerifier:
+    """
+    Verifies signed requests (SYSTEM_LAYER_INTERFACE §8.8).
+
+    Per client, the HMAC-SHA256 state after absorbing the key is prepared
+    once and kept in an LRU, so each verification costs one copy of that
+    state plus hashing the message. Digests are compared with
+    hmac.compare_digest. Checks run cheapest first: headers, client,
+    drift, signature, then the replay cache, so forged requests never
+    reach (or fill) the cache.
+
+    verify() returns None for an accepted request, otherwise one of the
+    ERROR_* codes; it does not raise on malformed header values. Replays
+    are counted per client in `replays`. Not thread-safe: use one verifier
+    per event loop or thread.
+    """
+
+    def __init__(
+        self,
+        secrets: SecretSource,
+        config: Optional[VerifierConfig] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if config is None:
+            config = VerifierConfig()
+        self.config = config
+        self.clock = clock
+        self._lookup = secrets.get if isinstance(secrets, Mapping) else secrets
+        self._keys: "OrderedDict[str, object]" = OrderedDict()
+        self.replay_cache = ReplayCache(config)
+        self.replays: Dict[str, int] = {}
+        # parsed X-Alma-Timestamp values; a burst shares a handful of them
+        self._sent: Dict[str, float] = {}
+
+    def _prepared(self, client_id: str):
+        h = self._keys.get(client_id)
+        if h is not None:
+            self._keys.move_to_end(client_id)
+            return h
+        secret = self._lookup(client_id)
+        if secret is None:
+            return None
+        h = self._keys[client_id] = hmac.new(secret, digestmod="sha256")
+        if len(self._keys) > self.config.key_cache_size:
+            self._keys.popitem(last=False)
+        return h
+
+    def forget(self, client_id: str) -> None:
+        """
+        Drop a cached key, e.g. after the client's secret was rotated.
+        """
+        self._keys.pop(client_id, None)
+
+    def sign(self, client_id: str, timestamp: str, payload: bytes = b"") -> str:
+        """
+        Hex signature a client would send (for clients and tests).
+        """
+        h = self._prepared(client_id)
+        if h is None:
+            raise KeyError(client_id)
+        h = h.copy()
+        h.update(canonical_message(client_id, timestamp, payload))
+        return h.hexdigest()
+
+    def verify(
+        self,
+        client_id: Optional[str],
+        timestamp: Optional[str],
+        signature: Optional[str],
+        payload: bytes = b"",
+    ) -> Optional[str]:
+        if not client_id or not timestamp or not signature:
+            return ERROR_MISSING_HEADERS
+        h = self._prepared(client_id)
+        if h is None:
+            return ERROR_UNKNOWN_CLIENT
+
+        now = self.clock()
+        sent = self._sent.get(timestamp)
+        if sent is None:
+            try:
+                sent = (parse_since(timestamp) - EPOCH).total_seconds()
+            except (ValueError, OverflowError):
+                return ERROR_TIMESTAMP_DRIFT
+            if len(self._sent) >= _TIMESTAMP_CACHE_SIZE:
+                self._sent.clear()
+            self._sent[timestamp] = sent
+        if abs(now - sent) > self.config.max_drift_seconds:
+            return ERROR_TIMESTAMP_DRIFT
+
+        h = h.copy()
+        h.update(canonical_message(client_id, timestamp, payload))
+        digest = h.digest()
+        try:
+            given = bytes.fromhex(signature)
+        except ValueError:
+            return ERROR_SIGNATURE_INVALID
+        if not hmac.compare_digest(digest, given):
+            return ERROR_SIGNATURE_INVALID
+
+        cache = self.replay_cache
+        cache.expire(now)
+        error = cache.check_and_add(digest[:_KEY_BYTES], sent, client_id)
+        if error == ERROR_REPLAY:
+            self.replays[client_id] = self.replays.get(client_id, 0) + 1
+        return error
+
+    def verify_headers(self, headers: Mapping[str, str], payload: bytes = b"") -> Optional[str]:
+        """
+        verify() on the X-Alma-* headers of a request (exact header names).
+        """
+        return self.verify(
+            headers.get(HEADER_CLIENT_ID),
+            headers.get(HEADER_TIMESTAMP),
+            headers.get(HEADER_SIGNATURE),
+            payload,
+        )
@@ -0,0 +1,199 @@
+# alma/signal_generator.py
+
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from .cadence_layer import RawSample
+from .codec import to_epoch_us
+
+
+# Phase model of the cadence profile demo (HUMAN_CADENCE_PROFILE_SPEC v0.1),
+# repeated every `phase_period_minutes`.
+PHASE_CALM, PHASE_FOCUSED, PHASE_STRAIN, PHASE_RISK = range(4)
+PHASE_NAMES = ("CALM", "FOCUSED", "STRAIN", "RISK")
+
+BASE_HR_BPM = 75
+BASE_ACC_MG = 50
+
+# per phase: (hr offset, hr sd, accel mean, accel sd)
+_PHASE_PARAMS = np.array(
+    [
+        (0.0, 3.0, BASE_ACC_MG + 80, 40.0),
+        (15.0, 5.0, BASE_ACC_MG + 180, 60.0),
+        (30.0, 8.0, BASE_ACC_MG + 350, 80.0),
+        (50.0, 10.0, BASE_ACC_MG + 450, 90.0),
+    ]
+)
+
+# phase boundaries in minutes within one period of 60 minutes
+_PHASE_BOUNDS = np.array([10, 30, 50])
+
+DROPOUT_RATE = 0.03
+
+DEFAULT_START = datetime(2025, 1, 1)
+
+
+@dataclass
+class SyntheticSignals:
+    """
+    Columnar synthetic samples for several wearers on a shared time axis.
+    Signal arrays have shape (n_wearers, n_samples).
+    """
+    start: datetime
+    offsets_us: np.ndarray       # int64, (n_samples,), relative to start
+    phase: np.ndarray            # uint8, (n_samples,)
+    hr_bpm: np.ndarray
+    rr_ms: np.ndarray
+    accel_mg: np.ndarray
+    signal_quality: np.ndarray
+
+    @property
+    def n_wearers(self) -> int:
+        return self.hr_bpm.shape[0]
+
+    @property
+    def n_samples(self) -> int:
+        return self.offsets_us.shape[0]
+
+    def timestamps(self) -> np.ndarray:
+        """
+        Sample times as datetime64[us], in UTC when `start` is tz-aware.
+        """
+        return np.datetime64(to_epoch_us(self.start), "us") + self.offsets_us.astype("timedelta64[us]")
+
+    def raw_samples(self, wearer: int = 0) -> List[RawSample]:
+        """
+        Materialise one wearer's samples as RawSample objects.
+        """
+        start = self.start
+        return [
+            RawSample(
+                timestamp=start + timedelta(microseconds=off),
+                hr_bpm=hr,
+                rr_ms=rr,
+                accel_mg=acc,
+                signal_quality=sq,
+            )
+            for off, hr, rr, acc, sq in zip(
+                self.offsets_us.tolist(),
+                self.hr_bpm[wearer].tolist(),
+                self.rr_ms[wearer].tolist(),
+                self.accel_mg[wearer].tolist(),
+                self.signal_quality[wearer].tolist(),
+            )
+        ]
+
+    def iter_raw_batches(self, wearer: int = 0, batch_size: int = 4096) -> Iterator[List[RawSample]]:
+        """
+        RawSample lists of at most `batch_size`, for feeding streaming code.
+        """
+        for lo in range(0, self.n_samples, batch_size):
+            part = SyntheticSignals(
+                start=self.start,
+                offsets_us=self.offsets_us[lo:lo + batch_size],
+                phase=self.phase[lo:lo + batch_size],
+                hr_bpm=self.hr_bpm[:, lo:lo + batch_size],
+                rr_ms=self.rr_ms[:, lo:lo + batch_size],
+                accel_mg=self.accel_mg[:, lo:lo + batch_size],
+                signal_quality=self.signal_quality[:, lo:lo + batch_size],
+            )
+            yield part.raw_samples(wearer)
+
+
+def _phase_of(offsets_us: np.ndarray, period_minutes: float) -> np.ndarray:
+    minute = (offsets_us // 60_000_000) % period_minutes
+    # stretch the 60-minute phase layout over the chosen period
+    scaled = minute * (60.0 / period_minutes)
+    return np.searchsorted(_PHASE_BOUNDS, scaled, side="right").astype(np.uint8)
+
+
+def _generate(
+    rng: np.random.Generator,
+    offsets_us: np.ndarray,
+    n_wearers: int,
+    base_hr: float,
+    period_minutes: float,
+) -> SyntheticSignals:
+    n = offsets_us.shape[0]
+    phase = _phase_of(offsets_us, period_minutes)
+    params = _PHASE_PARAMS[phase]
+    shape = (n_wearers, n)
+
+    hr = base_hr + params[:, 0] + params[:, 1] * rng.standard_normal(shape)
+    accel = np.abs(params[:, 2] + params[:, 3] * rng.standard_normal(shape))
+    # RR ~ 60000 / HR with some noise
+    rr = 60000.0 / np.maximum(hr, 40.0) + 30.0 * rng.standard_normal(shape)
+    # signal quality – occasionally bad
+    dropout = rng.random(shape) < DROPOUT_RATE
+    quality = np.where(
+        dropout,
+        rng.uniform(0.3, 0.6, shape),
+        rng.uniform(0.8, 1.0, shape),
+    )
+    return SyntheticSignals(
+        start=DEFAULT_START,
+        offsets_us=offsets_us,
+        phase=phase,
+        hr_bpm=hr,
+        rr_ms=rr,
+        accel_mg=accel,
+        signal_quality=quality,
+    )
+
+
+def generate_signals(
+    n_wearers: int = 1,
+    minutes: float = 60,
+    step_seconds: float = 5.0,
+    base_hr: float = BASE_HR_BPM,
+    seed: Optional[int] = 42,
+    start: Optional[datetime] = None,
+    phase_period_minutes: float = 60,
+) -> SyntheticSignals:
+    """
+    Generate `minutes` of samples every `step_seconds` for `n_wearers`,
+    cycling CALM -> FOCUSED -> STRAIN -> RISK every `phase_period_minutes`.
+    The same seed always gives the same arrays.
+    """
+    step_us = round(step_seconds * 1e6)
+    offsets = np.arange(0, round(minutes * 60e6), step_us, dtype=np.int64)
+    out = _generate(np.random.default_rng(seed), offsets, n_wearers, base_hr, phase_period_minutes)
+    if start is not None:
+        out.start = start
+    return out
+
+
+def iter_signal_chunks(
+    n_wearers: int,
+    minutes: float,
+    chunk_minutes: float = 1440,
+    step_seconds: float = 5.0,
+    base_hr: float = BASE_HR_BPM,
+    seed: Optional[int] = 42,
+    start: Optional[datetime] = None,
+    phase_period_minutes: float = 60,
+) -> Iterator[SyntheticSignals]:
+    """
+    Like generate_signals, but yields consecutive chunks of `chunk_minutes`
+    so months of data for many wearers fit in bounded memory. Chunk
+    offsets stay relative to the common start; every chunk draws from its
+    own child seed, so the output is deterministic.
+    """
+    step_us = round(step_seconds * 1e6)
+    total_us = round(minutes * 60e6)
+    chunk_us = max(step_us, round(chunk_minutes * 60e6) // step_us * step_us)
+    seeds = np.random.SeedSequence(seed)
+    lo = 0
+    while lo < total_us:
+        hi = min(lo + chunk_us, total_us)
+        offsets = np.arange(lo, hi, step_us, dtype=np.int64)
+        rng = np.random.default_rng(seeds.spawn(1)[0])
+        out = _generate(rng, offsets, n_wearers, base_hr, phase_period_minutes)
+        if start is not None:
+            out.start = start
+        yield out
+        lo = hi
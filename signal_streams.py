@@ -0,0 +1,249 @@
+# alma/signal_streams.py
+
+from __future__ import annotations
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+import operator
+
+import numpy as np
+
+from .cadence_layer import CadenceConfig
+from .codec import from_epoch_us, to_epoch_us
+
+
+Number = float
+
+
+class SignalStream:
+    """
+    One named time series (CADENCE_LAYER_SPEC §2.1), stored as columns.
+
+    Timestamps (epoch microseconds, UTC) and values live in two typed
+    arrays, 16 bytes per sample; context tags describe the whole stream
+    (§2.2) and are not repeated per sample. Samples must arrive in time
+    order; equal timestamps are allowed.
+    """
+
+    __slots__ = ("id", "context_tags", "timestamps_us", "values")
+
+    def __init__(self, stream_id: str, context_tags: Iterable[str] = ()) -> None:
+        self.id = stream_id
+        self.context_tags: Tuple[str, ...] = tuple(context_tags)
+        self.timestamps_us = array("q")
+        self.values = array("d")
+
+    def append(self, timestamp: datetime, value: Number) -> None:
+        self.append_us(to_epoch_us(timestamp), value)
+
+    def append_us(self, timestamp_us: int, value: Number) -> None:
+        if self.timestamps_us and timestamp_us < self.timestamps_us[-1]:
+            raise ValueError(f"{self.id}: samples must arrive in time order")
+        self.timestamps_us.append(timestamp_us)
+        self.values.append(value)
+
+    def extend_us(self, timestamps_us: Iterable[int], values: Iterable[Number]) -> None:
+        """
+        Bulk append of columns (arrays, lists or anything iterable).
+        """
+        ts = timestamps_us if isinstance(timestamps_us, array) and timestamps_us.typecode == "q" \
+            else array("q", timestamps_us)
+        vs = values if isinstance(values, array) and values.typecode == "d" else array("d", values)
+        if len(ts) != len(vs):
+            raise ValueError(f"{self.id}: {len(ts)} timestamps but {len(vs)} values")
+        if not ts:
+            return
+        if (self.timestamps_us and ts[0] < self.timestamps_us[-1]) \
+                or any(map(operator.gt, ts, ts[1:])):
+            raise ValueError(f"{self.id}: samples must arrive in time order")
+        self.timestamps_us.extend(ts)
+        self.values.extend(vs)
+
+    def extend(self, samples: Iterable[Tuple[datetime, Number]]) -> None:
+        ts = array("q")
+        vs = array("d")
+        for timestamp, value in samples:
+            ts.append(to_epoch_us(timestamp))
+            vs.append(value)
+        self.extend_us(ts, vs)
+
+    def __len__(self) -> int:
+        return len(self.timestamps_us)
+
+    def __iter__(self) -> Iterator[Tuple[datetime, Number]]:
+        for us, v in zip(self.timestamps_us, self.values):
+            yield from_epoch_us(us), v
+
+    def __repr__(self) -> str:
+        return f"SignalStream(id={self.id!r}, context_tags={self.context_tags!r}, samples={len(self)})"
+
+
+class SignalStore:
+    """
+    Signal streams of many entities (people, machines, stations), keyed
+    by entity ID and stream ID.
+    """
+
+    def __init__(self) -> None:
+        self._entities: Dict[str, Dict[str, SignalStream]] = {}
+
+    def stream(self, entity_id: str, stream_id: str, context_tags: Iterable[str] = ()) -> SignalStream:
+        """
+        The entity's stream, created (with `context_tags`) on first use.
+        """
+        streams = self._entities.setdefault(entity_id, {})
+        s = streams.get(stream_id)
+        if s is None:
+            s = streams[stream_id] = SignalStream(stream_id, context_tags)
+        return s
+
+    def append(self, entity_id: str, stream_id: str, timestamp: datetime, value: Number) -> None:
+        self.stream(entity_id, stream_id).append(timestamp, value)
+
+    def entities(self) -> List[str]:
+        return list(self._entities)
+
+    def streams(self, entity_id: str) -> Dict[str, SignalStream]:
+        return self._entities.get(entity_id, {})
+
+    def windows(self, entity_id: str, config: Optional[CadenceConfig] = None) -> List["StreamWindow"]:
+        return build_stream_windows(self.streams(entity_id), config)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._entities
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+
+@dataclass
+class StreamStats:
+    """
+    Basic statistics of one stream inside one window.
+    """
+    count: int
+    mean: Number
+    std: Number                         # population standard deviation
+    min: Number
+    max: Number
+
+
+@dataclass
+class StreamWindow:
+    """
+    Time slice of all streams of an entity (CADENCE_LAYER_SPEC §4.1).
+
+    `slices` holds each stream's [lo, hi) sample range, so the raw values
+    are stream.values[lo:hi]; streams without samples in the window have
+    no entry in `stats`.
+    """
+    window_start: datetime
+    window_end: datetime
+    slices: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    stats: Dict[str, StreamStats] = field(default_factory=dict)
+
+
+def _window_stats(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> Tuple[List, ...]:
+    """
+    count, mean, std, min and max of values[lo[k]:hi[k]] for every k at
+    once (all ranges non-empty). The ranges are gathered into one array
+    so each statistic is a single reduceat; the variance is two-pass,
+    from deviations to each window's own mean, because E[x^2] - mean^2
+    cancels out for large values.
+    """
+    counts = hi - lo
+    offsets = np.cumsum(counts) - counts
+    # values of window k at gathered[offsets[k]: offsets[k] + counts[k]]
+    gathered = values[np.arange(int(counts.sum())) - np.repeat(offsets - lo, counts)]
+    mean = np.add.reduceat(gathered, offsets) / counts
+    dev = gathered - np.repeat(mean, counts)
+    std = np.sqrt(np.add.reduceat(dev * dev, offsets) / counts)
+    return (
+        counts.tolist(), mean.tolist(), std.tolist(),
+        np.minimum.reduceat(gathered, offsets).tolist(),
+        np.maximum.reduceat(gathered, offsets).tolist(),
+    )
+
+
+def build_stream_windows(
+    streams: Union[Mapping[str, SignalStream], Sequence[SignalStream]],
+    config: Optional[CadenceConfig] = None,
+) -> List[StreamWindow]:
+    """
+    Slice all streams of one entity into windows in one sweep.
+
+    The window grid follows CadenceWindowEngine: windows start every
+    `step_size` seconds from the earliest sample of any stream, span
+    `window_size` seconds (half-open), and windows without samples in any
+    stream are not emitted. Window bounds are found by bisecting each
+    stream's timestamp array from the previous window's position, and
+    gaps with no samples are skipped in one step, so the cost is per
+    window and stream rather than per sample. Statistics of all windows
+    of a stream are then computed together by NumPy from the recorded
+    bounds, without per-sample Python objects.
+    """
+    if config is None:
+        config = CadenceConfig()
+    if config.window_size <= 0 or config.step_size <= 0:
+        raise ValueError("window_size and step_size must be positive")
+    if isinstance(streams, Mapping):
+        streams = list(streams.values())
+    streams = [s for s in streams if len(s)]
+    if not streams:
+        return []
+
+    size = round(config.window_size * 1e6)
+    step = round(config.step_size * 1e6)
+    origin = min(s.timestamps_us[0] for s in streams)
+    last = max(s.timestamps_us[-1] for s in streams)
+    origin_dt = from_epoch_us(origin)
+    window_delta = timedelta(microseconds=size)
+
+    # read-only views; the arrays cannot be resized while these are alive
+    columns = [(s.id, s.timestamps_us, np.frombuffer(s.values, dtype=np.float64), len(s))
+               for s in streams]
+    lows = [0] * len(columns)
+    highs = [0] * len(columns)
+    # per stream, the [lo, hi) range of every emitted window
+    bounds: List[Tuple[array, array]] = [(array("q"), array("q")) for _ in columns]
+    out: List[StreamWindow] = []
+    index = 0
+    last_index = (last - origin) // step
+    while index <= last_index:
+        start = origin + index * step
+        end = start + size
+        nearest = None      # earliest sample at or after `start`
+        for j, (_, ts, _, n) in enumerate(columns):
+            lo = bisect_left(ts, start, lows[j])
+            hi = bisect_left(ts, end, max(lo, highs[j]))
+            lows[j], highs[j] = lo, hi
+            if lo < n and (nearest is None or ts[lo] < nearest):
+                nearest = ts[lo]
+        if nearest is None:
+            break
+        if nearest >= end:
+            # empty window: jump to the first one that covers `nearest`
+            index = max(index + 1, (nearest - origin - size) // step + 1)
+            continue
+
+        window_start = origin_dt + timedelta(microseconds=index * step)
+        window = StreamWindow(window_start, window_start + window_delta)
+        for j, (stream_id, _, _, _) in enumerate(columns):
+            window.slices[stream_id] = (lows[j], highs[j])
+            bounds[j][0].append(lows[j])
+            bounds[j][1].append(highs[j])
+        out.append(window)
+        index += 1
+
+    for (stream_id, _, values, _), (lo, hi) in zip(columns, bounds):
+        lo = np.frombuffer(lo, dtype=np.int64)
+        hi = np.frombuffer(hi, dtype=np.int64)
+        filled = np.flatnonzero(hi > lo)
+        if not len(filled):
+            continue
+        stats = _window_stats(values, lo[filled], hi[filled])
+        for k, count, mean, std, low, high in zip(filled.tolist(), *stats):
+            out[k].stats[stream_id] = StreamStats(count, mean, std, low, high)
+    return out
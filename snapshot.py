@@ -0,0 +1,340 @@
+# alma/snapshot.py
+
+from __future__ import annotations
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+import json
+import math
+import mmap
+import os
+import struct
+
+from .cadence_layer import CadenceWindowMetrics
+from .codec import EPOCH, EPOCH_UTC, to_epoch_us
+from .dejavu_layer import DejaVuMatch, DejaVuSummary
+from .interpretation_layer import InterpretationResult
+
+
+# file header: magic, format version, table kind, flags, column count, rows
+_HEADER = struct.Struct("<8sHHHHQ8x")
+_MAGIC = b"ALMASNP\x00"
+_VERSION = 1
+
+# column directory entry: name, type code, element count, byte offset
+_COLUMN = struct.Struct("<16ss7xQQ")
+
+# table kinds
+WINDOWS = 1
+SUMMARIES = 2
+RESULTS = 3
+
+# header flags
+_TZ_UTC = 1     # timestamps were tz-aware; restore them as UTC
+
+_ITEM_SIZE = {"q": 8, "d": 8, "i": 4, "B": 1}
+_ALIGN = 8
+
+
+class _Columns:
+    """
+    Column builder: typed arrays plus dictionary-encoded string columns.
+    """
+
+    def __init__(self) -> None:
+        self.columns: List[Tuple[str, str, bytes, int]] = []
+
+    def add(self, name: str, typecode: str, values: Iterable) -> None:
+        data = values if isinstance(values, array) else array(typecode, values)
+        self.columns.append((name, typecode, data.tobytes(), len(data)))
+
+    def add_floats(self, name: str, values: Iterable[Optional[float]]) -> None:
+        self.add(name, "d", [math.nan if v is None else v for v in values])
+
+    def add_dictionary(self, name: str, values: Iterable[Optional[Hashable]], encode=str) -> None:
+        """
+        Codes (int32, -1 = None) in `name` plus the distinct values as a
+        string table in `name.off` / `name.txt`.
+        """
+        index: Dict[Hashable, int] = {}
+        codes = array("i")
+        for v in values:
+            if v is None:
+                codes.append(-1)
+                continue
+            code = index.get(v)
+            if code is None:
+                code = index[v] = len(index)
+            codes.append(code)
+        blobs = [encode(v).encode() for v in index]
+        offsets = array("q", [0])
+        for b in blobs:
+            offsets.append(offsets[-1] + len(b))
+        self.add(name, "i", codes)
+        self.add(f"{name}.off", "q", offsets)
+        blob = b"".join(blobs)
+        self.columns.append((f"{name}.txt", "B", blob, len(blob)))
+
+    def write(self, path: str, kind: int, rows: int, flags: int) -> None:
+        """
+        Write header, directory and 8-byte aligned columns to a temporary
+        file, then rename it over `path`. The file is fsynced before the
+        rename and its directory after it, so after a crash `path` holds
+        either the old snapshot or the complete new one.
+        """
+        offset = _HEADER.size + _COLUMN.size * len(self.columns)
+        directory = []
+        chunks = []
+        for name, typecode, data, count in self.columns:
+            pad = -offset % _ALIGN
+            chunks.append(b"\x00" * pad)
+            offset += pad
+            directory.append(_COLUMN.pack(name.encode(), typecode.encode(), count, offset))
+            chunks.append(data)
+            offset += len(data)
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, kind, flags, len(self.columns), rows))
+            f.write(b"".join(directory))
+            f.write(b"".join(chunks))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _timestamp_flags(timestamps: Sequence[datetime]) -> int:
+    return _TZ_UTC if timestamps and timestamps[0].tzinfo is not None else 0
+
+
+def write_windows(path: str, windows: Sequence[CadenceWindowMetrics]) -> None:
+    """
+    Snapshot of cadence windows (NaN = missing metric).
+    """
+    cols = _Columns()
+    cols.add("window_start", "q", [to_epoch_us(w.window_start) for w in windows])
+    cols.add("window_end", "q", [to_epoch_us(w.window_end) for w in windows])
+    cols.add_floats("hr_mean", [w.hr_mean for w in windows])
+    cols.add_floats("hrv_rmssd", [w.hrv_rmssd for w in windows])
+    cols.add_floats("movement_mean", [w.movement_mean for w in windows])
+    cols.add("confidence_mean", "d", [w.confidence_mean for w in windows])
+    flags = _timestamp_flags([w.window_end for w in windows])
+    cols.write(path, WINDOWS, len(windows), flags)
+
+
+def write_summaries(path: str, summaries: Sequence[DejaVuSummary]) -> None:
+    """
+    Snapshot of Deja-Vu summaries. Matches of all summaries share one set
+    of match columns; summary i owns match rows
+    match_start[i]:match_start[i + 1], and `strongest` is a match row (-1 =
+    None).
+    """
+    matches: List[DejaVuMatch] = []
+    starts = array("q", [0])
+    strongest = array("q")
+    for s in summaries:
+        first = len(matches)
+        matches.extend(s.matches)
+        starts.append(len(matches))
+        best = s.strongest_match
+        if best is None:
+            strongest.append(-1)
+            continue
+        row = next((first + j for j, m in enumerate(s.matches) if m is best), None)
+        if row is None:
+            row = next((first + j for j, m in enumerate(s.matches) if m == best), None)
+        if row is None:
+            # not one of its own matches: store it outside every range
+            row = len(matches)
+            matches.append(best)
+        strongest.append(row)
+
+    cols = _Columns()
+    cols.add("window_start", "q", [to_epoch_us(s.window_start) for s in summaries])
+    cols.add("window_end", "q", [to_epoch_us(s.window_end) for s in summaries])
+    cols.add("match_start", "q", starts)
+    cols.add("strongest", "q", strongest)
+    cols.add("current_time", "q", [to_epoch_us(m.current_time) for m in matches])
+    cols.add("past_time", "q", [to_epoch_us(m.past_time) for m in matches])
+    cols.add("similarity", "d", [m.similarity for m in matches])
+    cols.add("duration", "q", [m.duration_minutes for m in matches])
+    cols.add_dictionary("notes", [m.notes for m in matches])
+    flags = _timestamp_flags([s.window_end for s in summaries])
+    cols.write(path, SUMMARIES, len(summaries), flags)
+
+
+def write_results(path: str, results: Sequence[InterpretationResult]) -> None:
+    """
+    Snapshot of interpretation results; labels, details and dejavu texts
+    are dictionary-encoded.
+    """
+    cols = _Columns()
+    cols.add("timestamp", "q", [to_epoch_us(r.timestamp) for r in results])
+    cols.add("confidence", "d", [r.confidence for r in results])
+    cols.add_dictionary("labels", [tuple(r.labels) for r in results], encode=lambda v: json.dumps(list(v)))
+    cols.add_dictionary("details", [r.details for r in results])
+    cols.add_dictionary("dejavu", [r.dejavu for r in results])
+    flags = _timestamp_flags([r.timestamp for r in results])
+    cols.write(path, RESULTS, len(results), flags)
+
+
+class Snapshot:
+    """
+    Read-only, mmap-backed view of a snapshot file.
+
+    column() returns a typed memoryview straight over the mapped file, so
+    reading one column touches only its pages (np.frombuffer() accepts it
+    as is). Views must be released before close().
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            self._map.close()
+            raise ValueError(f"{path}: truncated header")
+        magic, version, kind, flags, ncols, rows = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            self._map.close()
+            raise ValueError(f"{path}: not an ALMA snapshot")
+        if version != _VERSION:
+            self._map.close()
+            raise ValueError(f"{path}: unsupported snapshot version {version}")
+        self.kind = kind
+        self.flags = flags
+        self.rows = rows
+        self.schema: Dict[str, Tuple[str, int, int]] = {}
+        for i in range(ncols):
+            name, typecode, count, offset = _COLUMN.unpack_from(self._map, _HEADER.size + i * _COLUMN.size)
+            name = name.rstrip(b"\x00").decode()
+            typecode = typecode.decode()
+            if offset + count * _ITEM_SIZE[typecode] > len(self._map):
+                self._map.close()
+                raise ValueError(f"{path}: truncated column {name}")
+            self.schema[name] = (typecode, count, offset)
+
+    def column(self, name: str) -> memoryview:
+        typecode, count, offset = self.schema[name]
+        view = memoryview(self._map)[offset: offset + count * _ITEM_SIZE[typecode]]
+        return view if typecode == "B" else view.cast(typecode)
+
+    def strings(self, name: str, decode=None) -> List:
+        """
+        Dictionary of a dictionary-encoded column, indexed by code.
+        """
+        offsets = self.column(f"{name}.off").tolist()
+        _, _, base = self.schema[f"{name}.txt"]
+        raw = self._map[base: base + offsets[-1]]
+        values = [raw[a:b].decode() for a, b in zip(offsets, offsets[1:])]
+        return [decode(v) for v in values] if decode is not None else values
+
+    def _decoded(self, name: str, decode=None) -> List:
+        table = self.strings(name, decode)
+        return [None if c < 0 else table[c] for c in self.column(name).tolist()]
+
+    def _timestamps(self, name: str) -> List[datetime]:
+        # step from row to row: cadence timestamps repeat a handful of
+        # deltas, and datetime + cached timedelta beats building one per row
+        current = EPOCH_UTC if self.flags & _TZ_UTC else EPOCH
+        deltas: Dict[int, timedelta] = {}
+        prev = 0
+        out = []
+        for us in self.column(name).tolist():
+            step = us - prev
+            delta = deltas.get(step)
+            if delta is None:
+                delta = deltas[step] = timedelta(microseconds=step)
+            current += delta
+            out.append(current)
+            prev = us
+        return out
+
+    def _floats(self, name: str) -> List[Optional[float]]:
+        return [None if v != v else v for v in self.column(name).tolist()]
+
+    def _expect(self, kind: int) -> None:
+        if self.kind != kind:
+            raise ValueError(f"{self.path}: snapshot holds table kind {self.kind}, not {kind}")
+
+    def to_windows(self) -> List[CadenceWindowMetrics]:
+        self._expect(WINDOWS)
+        return [
+            CadenceWindowMetrics(*row)
+            for row in zip(
+                self._timestamps("window_start"),
+                self._timestamps("window_end"),
+                self._floats("hr_mean"),
+                self._floats("hrv_rmssd"),
+                self._floats("movement_mean"),
+                self.column("confidence_mean").tolist(),
+            )
+        ]
+
+    def to_summaries(self) -> List[DejaVuSummary]:
+        self._expect(SUMMARIES)
+        matches = [
+            DejaVuMatch(*row)
+            for row in zip(
+                self._timestamps("current_time"),
+                self._timestamps("past_time"),
+                self.column("similarity").tolist(),
+                self.column("duration").tolist(),
+                self._decoded("notes"),
+            )
+        ]
+        starts = self.column("match_start").tolist()
+        out = []
+        for i, (ws, we, best) in enumerate(zip(
+            self._timestamps("window_start"),
+            self._timestamps("window_end"),
+            self.column("strongest").tolist(),
+        )):
+            out.append(DejaVuSummary(
+                window_start=ws,
+                window_end=we,
+                matches=matches[starts[i]: starts[i + 1]],
+                strongest_match=matches[best] if best >= 0 else None,
+            ))
+        return out
+
+    def to_results(self) -> List[InterpretationResult]:
+        self._expect(RESULTS)
+        return [
+            InterpretationResult.from_labels(ts, labels, conf, dv)
+            for ts, labels, conf, dv in zip(
+                self._timestamps("timestamp"),
+                self._decoded("labels", json.loads),
+                self.column("confidence").tolist(),
+                self._decoded("dejavu"),
+            )
+        ]
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_windows(path: str) -> List[CadenceWindowMetrics]:
+    with Snapshot(path) as snap:
+        return snap.to_windows()
+
+
+def read_summaries(path: str) -> List[DejaVuSummary]:
+    with Snapshot(path) as snap:
+        return snap.to_summaries()
+
+
+def read_results(path: str) -> List[InterpretationResult]:
+    with Snapshot(path) as snap:
+        return snap.to_results()
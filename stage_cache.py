@@ -0,0 +1,405 @@
+# alma/stage_cache.py
+
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import math
+import shelve
+import struct
+
+from .cadence_layer import CadenceWindowMetrics, RawSample, window_to_cadence_point
+from .codec import to_epoch_us
+from .dejavu_layer import (
+    DejaVuFeatureVector,
+    DejaVuHistory,
+    DejaVuSummary,
+    _window_to_feature_vector,
+    find_dejavu_for_window,
+)
+from .interpretation_layer import (
+    InterpretationResult,
+    _integrate_dejavu,
+    _interpret_point,
+)
+from .pipeline import AlmaPipelineConfig, cadence_stage
+
+
+# stage namespaces inside a StageCache
+FEATURES = "dejavu.features"
+SUMMARIES = "dejavu.summaries"
+RESULTS = "interpretation.results"
+
+_DIGEST_SIZE = 16
+_WINDOW = struct.Struct("<qq4dB")
+_MISS = object()
+
+# disk keys that are not cache entries
+_GENERATION_KEY = "meta:generation"
+_META_PREFIXES = ("meta:", "config:")
+
+# part of the results fingerprint; bump when InterpretationResult's
+# pickled layout changes, so older disk entries are dropped
+_RESULTS_LAYOUT = 2
+
+
+def config_fingerprint(config: Any) -> str:
+    """
+    Stable hash of a config dataclass (its repr lists every field).
+    """
+    return hashlib.blake2b(repr(config).encode(), digest_size=_DIGEST_SIZE).hexdigest()
+
+
+def window_digest(window: CadenceWindowMetrics) -> bytes:
+    """
+    Content hash of a cadence window.
+    """
+    values = (window.hr_mean, window.hrv_rmssd, window.movement_mean, window.confidence_mean)
+    # bit i: field i is None; bit 4: timestamps are tz-aware
+    mask = sum(1 << i for i, v in enumerate(values) if v is None)
+    if window.window_end.tzinfo is not None:
+        mask |= 1 << 4
+    packed = _WINDOW.pack(
+        to_epoch_us(window.window_start),
+        to_epoch_us(window.window_end),
+        *(math.nan if v is None else v for v in values),
+        mask,
+    )
+    return hashlib.blake2b(packed, digest_size=_DIGEST_SIZE).digest()
+
+
+class StageCache:
+    """
+    Size-bounded LRU of per-window stage outputs, keyed by content digest.
+
+    Entries live in one namespace per stage. bind() ties a namespace to a
+    config fingerprint and drops the namespace when the fingerprint
+    changes, so a cache is meant to serve one configuration at a time.
+
+    With `path`, entries are also written through to disk and read back
+    on memory misses, so they survive between runs. The disk tier is two
+    shelve generations, `<path>.0` and `<path>.1`: writes go to the
+    current one and hits in the previous one are copied forward. Each
+    holds at most max_disk_entries / 2 entries (default 10 * max_entries
+    in total).
+
+    Generations only rotate when the cache is opened and the current
+    one is at least a quarter of max_disk_entries: the previous one is
+    recreated empty and becomes current, dropping entries not used for a
+    whole generation. During a run a full current generation drops its
+    own oldest entries (FIFO) instead, so a long run's misses never evict
+    the previous run's entries before the run gets to them; a sequential
+    re-run over an overlapping range is a scan, and would otherwise get
+    no hits once one run outgrows the disk tier. A re-run can hit at most
+    the max_disk_entries / 2 newest entries of the run before it (three
+    per window: features, summary, result), so size the disk tier to a
+    run's overlap for full reuse.
+
+    Cached values are shared, not copied: treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 100_000,
+        path: Optional[str] = None,
+        max_disk_entries: Optional[int] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries if max_disk_entries is not None else 10 * max_entries
+        self._entries: "OrderedDict[Tuple[str, bytes], Any]" = OrderedDict()
+        self._fingerprints: Dict[str, str] = {}
+        self.path = path
+        self._disk = None           # current generation
+        self._previous = None
+        self._generation = 0
+        self._disk_count = 0        # entries in the current generation
+        self._fifo: Deque[str] = deque()    # its keys, oldest first
+        if path is not None:
+            self._open_disk(path)
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def _open_disk(self, path: str) -> None:
+        shelves = [shelve.open(f"{path}.{i}") for i in (0, 1)]
+        generations = [shelf.get(_GENERATION_KEY, -1) for shelf in shelves]
+        current = 0 if generations[0] >= generations[1] else 1
+        self._disk = shelves[current]
+        self._previous = shelves[1 - current]
+        self._generation = max(0, generations[current])
+        self._disk[_GENERATION_KEY] = self._generation
+        keys = [k for k in self._disk.keys() if not k.startswith(_META_PREFIXES)]
+        if len(keys) >= max(1, self.max_disk_entries // 4):
+            self._rotate()
+        else:
+            # written by earlier runs, in no particular order
+            self._fifo.extend(keys)
+            self._disk_count = len(keys)
+
+    def _rotate(self) -> None:
+        """
+        Start a new disk generation in place of the previous one.
+        """
+        self._previous.close()
+        fresh = shelve.open(f"{self.path}.{(self._generation + 1) % 2}", flag="n")
+        self._generation += 1
+        fresh[_GENERATION_KEY] = self._generation
+        for k in self._disk.keys():
+            if k.startswith("config:"):
+                fresh[k] = self._disk[k]
+        self._previous, self._disk = self._disk, fresh
+        self._disk_count = 0
+        self._fifo.clear()
+
+    def _disk_put(self, key: str, value: Any) -> None:
+        if key not in self._disk:
+            limit = max(1, self.max_disk_entries // 2)
+            while self._disk_count >= limit and self._fifo:
+                oldest = self._fifo.popleft()
+                # keys removed by clear() are skipped
+                if oldest in self._disk:
+                    del self._disk[oldest]
+                    self._disk_count -= 1
+            self._disk_count += 1
+            self._fifo.append(key)
+        self._disk[key] = value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def bind(self, stage: str, fingerprint: str) -> None:
+        """
+        Declare the config of a stage; entries made under another config
+        are dropped.
+        """
+        current = self._fingerprints.get(stage)
+        if current is None and self._disk is not None:
+            current = self._disk.get(f"config:{stage}")
+        if current == fingerprint:
+            self._fingerprints[stage] = fingerprint
+            return
+        if current is not None:
+            self.clear(stage)
+        self._fingerprints[stage] = fingerprint
+        if self._disk is not None:
+            self._disk[f"config:{stage}"] = fingerprint
+
+    def get(self, stage: str, key: bytes, default: Any = None) -> Any:
+        entry = (stage, key)
+        value = self._entries.get(entry, _MISS)
+        if value is not _MISS:
+            self._entries.move_to_end(entry)
+        elif self._disk is not None:
+            disk_key = f"{stage}:{key.hex()}"
+            value = self._disk.get(disk_key, _MISS)
+            if value is _MISS:
+                value = self._previous.get(disk_key, _MISS)
+                if value is not _MISS:
+                    self._disk_put(disk_key, value)
+            if value is not _MISS:
+                self._remember(entry, value)
+        if value is _MISS:
+            self.misses[stage] = self.misses.get(stage, 0) + 1
+            return default
+        self.hits[stage] = self.hits.get(stage, 0) + 1
+        return value
+
+    def put(self, stage: str, key: bytes, value: Any) -> None:
+        self._remember((stage, key), value)
+        if self._disk is not None:
+            self._disk_put(f"{stage}:{key.hex()}", value)
+
+    def _remember(self, entry: Tuple[str, bytes], value: Any) -> None:
+        self._entries[entry] = value
+        self._entries.move_to_end(entry)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self, stage: Optional[str] = None) -> None:
+        """
+        Drop one stage's entries, or everything.
+        """
+        if stage is None:
+            self._entries.clear()
+            self._fingerprints.clear()
+            if self._disk is not None:
+                self._previous.clear()
+                self._disk.clear()
+                self._disk[_GENERATION_KEY] = self._generation
+                self._disk_count = 0
+                self._fifo.clear()
+            return
+        for entry in [e for e in self._entries if e[0] == stage]:
+            del self._entries[entry]
+        self._fingerprints.pop(stage, None)
+        if self._disk is not None:
+            prefix = f"{stage}:"
+            for shelf in (self._disk, self._previous):
+                doomed = [k for k in shelf.keys() if k.startswith(prefix)]
+                for k in doomed:
+                    del shelf[k]
+                if shelf is self._disk:
+                    self._disk_count -= len(doomed)
+                shelf.pop(f"config:{stage}", None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            stage: {"hits": self.hits.get(stage, 0), "misses": self.misses.get(stage, 0)}
+            for stage in sorted(set(self.hits) | set(self.misses))
+        }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._previous.close()
+            self._disk = self._previous = None
+
+    def __enter__(self) -> "StageCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _DigestHistory:
+    """
+    Window digests of the Deja-Vu history, sorted by timestamp.
+    """
+
+    def __init__(self) -> None:
+        self._timestamps: List[datetime] = []
+        self._digests: List[bytes] = []
+
+    def append(self, ts: datetime, digest: bytes) -> None:
+        if not self._timestamps or ts >= self._timestamps[-1]:
+            self._timestamps.append(ts)
+            self._digests.append(digest)
+        else:
+            i = bisect_right(self._timestamps, ts)
+            self._timestamps.insert(i, ts)
+            self._digests.insert(i, digest)
+
+    def between(self, start: datetime, end: datetime) -> List[bytes]:
+        lo = bisect_left(self._timestamps, start)
+        hi = bisect_right(self._timestamps, end, lo)
+        return self._digests[lo:hi]
+
+    def evict_before(self, cutoff: datetime) -> None:
+        n = bisect_left(self._timestamps, cutoff)
+        if n:
+            del self._timestamps[:n]
+            del self._digests[:n]
+
+
+class CachedAnalysis:
+    """
+    Deja-Vu + interpretation of one window stream, reusing cached outputs.
+
+    Produces exactly what DejaVuEngine + StreamingInterpreter produce for
+    the same windows. The cache keys capture everything an output depends
+    on:
+
+        features   window content
+        summary    window content + the windows in its lookback range
+        result     the trend window's contents + the Deja-Vu text
+
+    so a re-run over overlapping ranges only recomputes windows whose
+    content or context changed. The history itself is always rebuilt (it
+    holds feature vectors, which are cheap to derive).
+    """
+
+    def __init__(self, cache: StageCache, config: Optional[AlmaPipelineConfig] = None) -> None:
+        if config is None:
+            config = AlmaPipelineConfig()
+        self.cache = cache
+        self.dejavu_config = config.dejavu_config()
+        self.interpretation_config = config.interpretation_config()
+
+        cache.bind(FEATURES, config_fingerprint(self.dejavu_config))
+        cache.bind(SUMMARIES, config_fingerprint(self.dejavu_config))
+        cache.bind(RESULTS, f"{config_fingerprint(self.interpretation_config)}/{_RESULTS_LAYOUT}")
+
+        self.history = DejaVuHistory()
+        self._digests = _DigestHistory()
+        self._has_history = False
+        self._gap = timedelta(minutes=self.dejavu_config.min_gap_minutes)
+        self._min_age = timedelta(minutes=self.dejavu_config.min_history_minutes)
+
+        span = max(1, self.interpretation_config.trend_window_points)
+        self._recent = deque(maxlen=span)
+        self._recent_digests: Deque[bytes] = deque(maxlen=span)
+
+    def _features(self, window: CadenceWindowMetrics, digest: bytes) -> Optional[DejaVuFeatureVector]:
+        fv = self.cache.get(FEATURES, digest, _MISS)
+        if fv is _MISS:
+            fv = _window_to_feature_vector(window, self.dejavu_config)
+            self.cache.put(FEATURES, digest, fv)
+        return fv
+
+    def _summary(self, window: CadenceWindowMetrics, digest: bytes) -> DejaVuSummary:
+        now = window.window_end
+        h = hashlib.blake2b(digest, digest_size=_DIGEST_SIZE)
+        for d in self._digests.between(now - self._min_age, now - self._gap):
+            h.update(d)
+        key = h.digest()
+        summary = self.cache.get(SUMMARIES, key)
+        if summary is None:
+            summary = find_dejavu_for_window(window, self.history, self.dejavu_config)
+            self.cache.put(SUMMARIES, key, summary)
+        return summary
+
+    def push(self, window: CadenceWindowMetrics) -> Tuple[Optional[DejaVuSummary], InterpretationResult]:
+        digest = window_digest(window)
+
+        # Deja-Vu, as DejaVuEngine.push
+        summary = self._summary(window, digest) if self._has_history else None
+        fv = self._features(window, digest)
+        if fv is not None:
+            self.history.append(fv)
+            self._digests.append(fv.timestamp, digest)
+            self._has_history = True
+            self.history.evict_before(fv.timestamp - self._min_age)
+            self._digests.evict_before(fv.timestamp - self._min_age)
+
+        # interpretation, as StreamingInterpreter.push
+        point = window_to_cadence_point(window)
+        self._recent.append(point)
+        self._recent_digests.append(digest)
+        dejavu = _integrate_dejavu(summary)
+        h = hashlib.blake2b(b"".join(self._recent_digests), digest_size=_DIGEST_SIZE)
+        h.update(b"\x00" if dejavu is None else b"\x01" + dejavu.encode())
+        key = h.digest()
+        result = self.cache.get(RESULTS, key)
+        if result is None:
+            result = _interpret_point(point, self._recent, summary, self.interpretation_config)
+            self.cache.put(RESULTS, key, result)
+        return summary, result
+
+
+def cached_analysis_stage(
+    windows: Iterable[CadenceWindowMetrics],
+    cache: StageCache,
+    config: Optional[AlmaPipelineConfig] = None,
+) -> Iterator[InterpretationResult]:
+    """
+    Drop-in for dejavu_stage + interpretation_stage backed by `cache`.
+    """
+    analysis = CachedAnalysis(cache, config)
+    for w in windows:
+        yield analysis.push(w)[1]
+
+
+def run_cached_pipeline(
+    samples: Iterable[RawSample],
+    cache: StageCache,
+    config: Optional[AlmaPipelineConfig] = None,
+) -> Iterator[InterpretationResult]:
+    """
+    run_alma_core_pipeline with Deja-Vu and interpretation outputs served
+    from `cache` wherever the inputs are unchanged.
+    """
+    if config is None:
+        config = AlmaPipelineConfig()
+    windows = cadence_stage(samples, config.cadence_config())
+    return cached_analysis_stage(windows, cache, config)
@@ -0,0 +1,349 @@
+# alma/system_server.py
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import json
+import threading
+import time
+
+from .event_log import EventLog, format_timestamp, parse_since
+from .instrumentation import INSTRUMENTATION, LatencyHistogram
+from .interpretation_layer import InterpretationResult
+from .rate_limiter import RateLimiter
+from .request_auth import (
+    ERROR_MISSING_HEADERS,
+    ERROR_REPLAY,
+    ERROR_REPLAY_CACHE_FULL,
+    ERROR_SIGNATURE_INVALID,
+    ERROR_TIMESTAMP_DRIFT,
+    ERROR_UNKNOWN_CLIENT,
+    RequestVerifier,
+)
+
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    429: "Too Many Requests",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+_MAX_HEAD = 16 * 1024
+
+
+def _response_head(status: int, length: int, keep_alive: bool) -> bytes:
+    return (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {length}\r\n"
+        f"Cache-Control: no-store\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode()
+
+
+def _json_response(status: int, body: Dict[str, Any]) -> Tuple[int, bytes]:
+    return status, json.dumps(body, separators=(",", ":")).encode()
+
+
+class _Prepared:
+    """
+    Immutable pre-serialised response (body plus both header variants).
+    """
+
+    __slots__ = ("status", "body", "keep_alive", "close")
+
+    def __init__(self, status: int, body: bytes) -> None:
+        self.status = status
+        self.body = body
+        self.keep_alive = _response_head(status, len(body), True) + body
+        self.close = _response_head(status, len(body), False) + body
+
+
+_NO_STATE = _Prepared(*_json_response(503, {"status": "ERROR", "error": "ERROR_NO_STATE"}))
+_RATE_LIMITED = _Prepared(*_json_response(429, {"status": "ERROR", "error": "ERROR_RATE_LIMITED"}))
+_INTERNAL_ERROR = _Prepared(*_json_response(500, {"status": "ERROR", "error": "ERROR_INTERNAL"}))
+_UNAUTHORIZED = {
+    code: _Prepared(*_json_response(401, {"status": "ERROR", "error": code}))
+    for code in (
+        ERROR_MISSING_HEADERS, ERROR_UNKNOWN_CLIENT, ERROR_TIMESTAMP_DRIFT,
+        ERROR_SIGNATURE_INVALID, ERROR_REPLAY, ERROR_REPLAY_CACHE_FULL,
+    )
+}
+
+
+def state_from_result(
+    result: InterpretationResult,
+    session_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    SystemState of §8.1 built from the latest interpretation result.
+    """
+    return {
+        "timestamp": format_timestamp(result.timestamp),
+        "session_id": session_id,
+        "interpretation_tag": result.details,
+        "labels": list(result.labels),
+        "confidence": result.confidence,
+        "dejavu": result.dejavu,
+        "errors": [],
+    }
+
+
+class SystemServer:
+    """
+    Local read-only HTTP service for /state, /health and /events (§8).
+
+    The latest state is held as one immutable, fully serialised response.
+    publish_*() builds the new response off to the side and swaps it in
+    with a single reference assignment, so the pipeline (from any thread)
+    never blocks readers and a reader always sends one complete state.
+    /events bodies come straight from the EventLog's byte ranges.
+    Connections are HTTP/1.1 keep-alive and served by one asyncio loop;
+    a request with a body (or any method but GET/HEAD) is answered and
+    its connection closed, since request bodies are never read.
+
+    /health reports `latency` as the pipeline's p99 from INSTRUMENTATION
+    (0 while it is disabled) next to the server's own request p99.
+
+    With a RequestVerifier, every request must carry valid X-Alma-*
+    signature headers (§8.8) and is otherwise answered 401 with the
+    verifier's error code. With a RateLimiter, each request is charged
+    before routing to its verified client ID, or to the peer address
+    when there is no verifier (X-Alma-Client-ID alone is not trusted);
+    over-limit requests get 429. An exception while answering a request
+    (e.g. an I/O error reading the event log) is answered 500, closes the
+    connection and is reported as /health `last_error`.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        event_log: Optional[EventLog] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        verifier: Optional[RequestVerifier] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.event_log = event_log
+        self.rate_limiter = rate_limiter
+        self.verifier = verifier
+        self._state: _Prepared = _NO_STATE
+        self._last_error: Optional[str] = None
+        self._started = time.monotonic()
+        self.request_latency = LatencyHistogram()   # always on, request handling only
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # -- publishing (pipeline side) ---------------------------------------
+
+    def publish_state(self, system_state: Dict[str, Any]) -> None:
+        """
+        Replace the /state snapshot.
+        """
+        self._state = _Prepared(*_json_response(200, {"status": "OK", "system_state": system_state}))
+
+    def publish_result(self, result: InterpretationResult, session_id: Optional[str] = None) -> None:
+        self.publish_state(state_from_result(result, session_id))
+
+    def report_error(self, message: Optional[str]) -> None:
+        """
+        Set the `last_error` reported by /health (None clears it).
+        """
+        self._last_error = message
+
+    # -- request handling ---------------------------------------------------
+
+    def _health(self) -> Tuple[int, bytes]:
+        return _json_response(200, {
+            "status": "OK",
+            "uptime": round(time.monotonic() - self._started, 3),
+            "latency": INSTRUMENTATION.latency_ms(),
+            "request_latency_p99_ms": self.request_latency.percentile(0.99),
+            "last_error": self._last_error,
+        })
+
+    def _events(self, query: str) -> Tuple[int, Union[bytes, List[bytes]]]:
+        if self.event_log is None:
+            return _json_response(404, {"status": "ERROR", "error": "ERROR_NOT_FOUND"})
+        params = parse_qs(query)
+        try:
+            since = parse_since(params["since"][0]) if "since" in params else None
+            limit = int(params["limit"][0]) if "limit" in params else 0
+        except (ValueError, OverflowError):
+            return _json_response(400, {"status": "ERROR", "error": "ERROR_BAD_QUERY"})
+        return 200, self.event_log.response_chunks(since, max(0, limit))
+
+    def _client(
+        self,
+        peer_id: str,
+        client_id: Optional[str],
+        timestamp: Optional[str],
+        signature: Optional[str],
+    ) -> Union[str, _Prepared]:
+        """
+        The identity a request is rate-limited under, or a 401 response.
+        """
+        if self.verifier is None:
+            return peer_id
+        error = self.verifier.verify(client_id, timestamp, signature)
+        if error is not None:
+            return _UNAUTHORIZED[error]
+        return client_id
+
+    def _route(self, method: str, target: str, client_id: str) -> Any:
+        """
+        A _Prepared response, or (status, body bytes / chunk list).
+        """
+        if method not in ("GET", "HEAD"):
+            return _json_response(405, {"status": "ERROR", "error": "ERROR_METHOD_NOT_ALLOWED"})
+        url = urlsplit(target)
+        if self.rate_limiter is not None and not self.rate_limiter.allow(client_id, url.path):
+            return _RATE_LIMITED
+        if url.path == "/state":
+            return self._state
+        if url.path == "/health":
+            return self._health()
+        if url.path == "/events":
+            return self._events(url.query)
+        return _json_response(404, {"status": "ERROR", "error": "ERROR_NOT_FOUND"})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        peer = writer.get_extra_info("peername")
+        peer_id = str(peer[0]) if isinstance(peer, tuple) else str(peer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.LimitOverrunError:
+                    writer.write(_Prepared(*_json_response(431, {"status": "ERROR"})).close)
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                t0 = time.perf_counter_ns()
+
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split()
+                if len(parts) != 3:
+                    writer.write(_Prepared(*_json_response(400, {"status": "ERROR"})).close)
+                    break
+                method, target, version = parts
+                connection = ""
+                client_id = timestamp = signature = None
+                has_body = False
+                for line in lines[1:]:
+                    name = line[: line.find(":") + 1].lower()
+                    if name == "connection:":
+                        connection = line[11:].strip().lower()
+                    elif name == "x-alma-client-id:":
+                        client_id = line[17:].strip()
+                    elif name == "x-alma-timestamp:":
+                        timestamp = line[17:].strip()
+                    elif name == "x-alma-signature:":
+                        signature = line[17:].strip()
+                    elif name == "transfer-encoding:" or (name == "content-length:" and line[15:].strip() != "0"):
+                        has_body = True
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                # bodies are never read: close rather than parse one as the
+                # next request on this connection
+                if has_body or method not in ("GET", "HEAD"):
+                    keep_alive = False
+
+                try:
+                    client = self._client(peer_id, client_id, timestamp, signature)
+                    if isinstance(client, _Prepared):
+                        response = client
+                    else:
+                        response = self._route(method, target, client)
+                except Exception as exc:
+                    self.report_error(f"{method} {target}: {type(exc).__name__}: {exc}")
+                    response = _INTERNAL_ERROR
+                    keep_alive = False
+                if isinstance(response, _Prepared):
+                    out = response.keep_alive if keep_alive else response.close
+                    if method == "HEAD":
+                        out = out[: len(out) - len(response.body)]
+                    writer.write(out)
+                else:
+                    status, body = response
+                    chunks = body if isinstance(body, list) else [body]
+                    length = sum(len(c) for c in chunks)
+                    writer.write(_response_head(status, length, keep_alive))
+                    if method != "HEAD":
+                        writer.writelines(chunks)
+
+                self.request_latency.record((time.perf_counter_ns() - t0) / 1e6)
+                if writer.transport.get_write_buffer_size() > 256 * 1024:
+                    await writer.drain()
+                if not keep_alive:
+                    break
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    # -- lifecycle --------------------------------------------------------
+
+    async def start(self) -> None:
+        self._started = time.monotonic()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=_MAX_HEAD)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # idle keep-alive connections would otherwise hold wait_closed()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> None:
+        """
+        Run the server on its own event loop in a daemon thread; returns
+        once it is listening (self.port is then the bound port).
+        """
+        ready = threading.Event()
+        failure: List[BaseException] = []
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            self._loop = loop
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as exc:
+                failure.append(exc)
+                ready.set()
+                loop.close()
+                return
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(self.close())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="alma-system-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if failure:
+            raise failure[0]
+
+    def stop_thread(self) -> None:
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+            self._thread = None
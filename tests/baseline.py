@@ -0,0 +1,300 @@
+# alma/tests/baseline.py
+
+"""
+The Deja-Vu and interpretation layers as they were before the performance
+work, kept verbatim (apart from imports) as oracles for the tests. They
+build the current Deja-Vu dataclasses, so their output compares equal to
+the optimised code's; interpretation results are BaselineResult, the
+original dataclass.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+import math
+
+from alma.cadence_layer import CadencePoint, CadenceWindowMetrics
+from alma.dejavu_layer import (
+    DejaVuConfig,
+    DejaVuFeatureVector,
+    DejaVuMatch,
+    DejaVuSummary,
+)
+from alma.interpretation_layer import InterpretationConfig
+
+
+Number = float
+
+
+# --------------------------------------------------
+# Deja-Vu
+# --------------------------------------------------
+
+def _window_to_feature_vector(
+    window: CadenceWindowMetrics,
+    config: DejaVuConfig,
+) -> Optional[DejaVuFeatureVector]:
+    if window.confidence_mean < config.min_confidence_mean:
+        return None
+    return DejaVuFeatureVector(
+        timestamp=window.window_end,
+        hr_mean=window.hr_mean,
+        hrv_rmssd=window.hrv_rmssd,
+        movement_mean=window.movement_mean,
+        confidence_mean=window.confidence_mean,
+    )
+
+
+def _vector_distance(a: DejaVuFeatureVector, b: DejaVuFeatureVector) -> Number:
+    fields = [('hr_mean', True), ('hrv_rmssd', True), ('movement_mean', True), ('confidence_mean', False)]
+    diffs = []
+    for fname, signed in fields:
+        va = getattr(a, fname)
+        vb = getattr(b, fname)
+        if va is not None and vb is not None:
+            # tanh normalisation to [-1, 1] (or [0,1] for confidence)
+            if signed:
+                na, nb = math.tanh(va), math.tanh(vb)
+            else:
+                na, nb = max(0.0, min(1.0, va)), max(0.0, min(1.0, vb))
+            diffs.append(na - nb)
+    if not diffs:
+        return 1e9
+    return math.sqrt(sum(d * d for d in diffs) / len(diffs))
+
+
+def _distance_to_similarity(distance: Number) -> Number:
+    return max(0.0, min(1.0, 1.0 / (1.0 + distance)))
+
+
+def find_dejavu_for_window(
+    current: CadenceWindowMetrics,
+    history: List[DejaVuFeatureVector],
+    config: Optional[DejaVuConfig] = None,
+) -> DejaVuSummary:
+    if config is None:
+        config = DejaVuConfig()
+
+    current_vec = _window_to_feature_vector(current, config)
+    if current_vec is None:
+        return DejaVuSummary(
+            window_start=current.window_start,
+            window_end=current.window_end,
+            matches=[],
+            strongest_match=None,
+        )
+
+    now = current_vec.timestamp
+    gap = timedelta(minutes=config.min_gap_minutes)
+    min_age = timedelta(minutes=config.min_history_minutes)
+
+    matches: List[DejaVuMatch] = []
+    for past_vec in history:
+        age = now - past_vec.timestamp
+        if age < gap:
+            continue
+        # (min_age filter optional; here we apply it strictly)
+        if age > min_age:
+            continue
+        sim = _distance_to_similarity(_vector_distance(current_vec, past_vec))
+        if sim >= config.similarity_threshold:
+            matches.append(
+                DejaVuMatch(
+                    current_time=now,
+                    past_time=past_vec.timestamp,
+                    similarity=sim,
+                    duration_minutes=config.window_minutes,
+                    notes=None,
+                )
+            )
+
+    matches.sort(key=lambda m: m.similarity, reverse=True)
+    matches = matches[: config.max_matches_per_window]
+    strongest = matches[0] if matches else None
+
+    return DejaVuSummary(
+        window_start=current.window_start,
+        window_end=current.window_end,
+        matches=matches,
+        strongest_match=strongest,
+    )
+
+
+def run_dejavu_pipeline(
+    windows: List[CadenceWindowMetrics],
+    config: Optional[DejaVuConfig] = None,
+) -> List[DejaVuSummary]:
+    if config is None:
+        config = DejaVuConfig()
+
+    summaries: List[DejaVuSummary] = []
+    history: List[DejaVuFeatureVector] = []
+
+    # incremental history build
+    for w in windows:
+        # allow search only after we have some history
+        if len(history) > 0:
+            summary = find_dejavu_for_window(w, history, config)
+            summaries.append(summary)
+        # add current to history for next iterations
+        fv = _window_to_feature_vector(w, config)
+        if fv is not None:
+            history.append(fv)
+
+    return summaries
+
+
+# --------------------------------------------------
+# interpretation
+# --------------------------------------------------
+
+@dataclass
+class BaselineResult:
+    timestamp: datetime
+    labels: List[str]
+    details: str
+    confidence: Number
+    dejavu: Optional[str] = None
+
+
+def _interpret_single_point(
+    point: CadencePoint,
+    config: InterpretationConfig
+) -> List[str]:
+    if point.confidence < config.min_confidence:
+        return ["low_confidence"]
+
+    labels: List[str] = []
+
+    # HR-based hints
+    hr = point.hr_mean
+    if hr is not None:
+        if hr > config.high_hr_threshold:
+            labels.append("elevated_heart_rate")
+        elif hr < config.low_hr_threshold:
+            labels.append("low_heart_rate")
+
+    # HRV-based hints
+    hrv = point.hrv_rmssd
+    if hrv is not None:
+        if hrv >= config.calm_hrv_threshold:
+            labels.append("calm_indicator")
+        elif hrv <= config.tension_hrv_threshold:
+            labels.append("tension_indicator")
+
+    # movement
+    mov = point.movement_level
+    if mov is not None and mov > config.movement_threshold:
+        labels.append("active")
+
+    # if nothing stuck, add a neutral tag
+    if not labels:
+        labels.append("neutral")
+
+    return labels
+
+
+def _interpret_trend(
+    recent_points: List[CadencePoint],
+    config: InterpretationConfig
+) -> Optional[str]:
+    if len(recent_points) < config.trend_window_points:
+        return None
+
+    # simple linear slope via first/last
+    first = recent_points[0]
+    last = recent_points[-1]
+
+    def slope(a: Optional[Number], b: Optional[Number]) -> Optional[Number]:
+        if a is None or b is None:
+            return None
+        return b - a
+
+    hr_slope = slope(first.hr_mean, last.hr_mean)
+    hrv_slope = slope(first.hrv_rmssd, last.hrv_rmssd)
+    mov_slope = slope(first.movement_level, last.movement_level)
+
+    # decide
+    if hr_slope is not None and hrv_slope is not None:
+        if hr_slope < -2 and hrv_slope > 2:
+            return "calming_trend"
+        if hr_slope > 2 and hrv_slope < -2:
+            return "tension_trend"
+
+    # steady low movement
+    if mov_slope is not None and abs(mov_slope) <= 5 and last.movement_level is not None and last.movement_level < config.movement_threshold:
+        return "steady_state"
+
+    return None
+
+
+def _integrate_dejavu(
+    summary: Optional[DejaVuSummary],
+) -> Optional[str]:
+    if summary is None or not summary.matches:
+        return None
+    best = summary.strongest_match
+    if best is None:
+        return None
+    # human-readable delta
+    delta = best.current_time - best.past_time
+    minutes = int(delta.total_seconds() // 60)
+    hours = minutes // 60
+    rem_min = minutes % 60
+    if hours > 0:
+        time_str = f"{hours}h {rem_min}m"
+    else:
+        time_str = f"{minutes}m"
+    return f"similar to {time_str} ago ({best.similarity:.2f})"
+
+
+def interpret_state(
+    cadence_series: List[CadencePoint],
+    windows: List[CadenceWindowMetrics],
+    dejavu_summaries: List[DejaVuSummary],
+    config: Optional[InterpretationConfig] = None
+) -> List[BaselineResult]:
+    if config is None:
+        config = InterpretationConfig()
+
+    results: List[BaselineResult] = []
+
+    # pre-index windows and dejavu by timestamp for fast lookup
+    window_map = {w.window_end: w for w in windows}
+    dejavu_map = {s.window_end: s for s in dejavu_summaries}
+
+    for i, point in enumerate(cadence_series):
+        # single point labels
+        single_labels = _interpret_single_point(point, config)
+
+        # trend label (use last N points up to i)
+        trend_window = cadence_series[max(0, i - config.trend_window_points + 1): i + 1]
+        trend_label = _interpret_trend(trend_window, config)
+
+        # build label list
+        labels = single_labels.copy()
+        if trend_label is not None:
+            labels.append(trend_label)
+
+        # details string
+        details = ", ".join(labels) if labels else "neutral"
+
+        # confidence for the result: average of point confidence
+        confidence = point.confidence
+
+        # dejavu string
+        window_key = point.timestamp  # assume point.timestamp == window_end
+        dejavu_summary = dejavu_map.get(window_key)
+        dejavu_str = _integrate_dejavu(dejavu_summary)
+
+        results.append(
+            BaselineResult(
+                timestamp=point.timestamp,
+                labels=labels,
+                details=details,
+                confidence=confidence,
+                dejavu=dejavu_str,
+            )
+        )
+
+    return results
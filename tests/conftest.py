@@ -0,0 +1,18 @@
+# alma/tests/conftest.py
+
+"""
+The repository root is the `alma` package. When the checkout is not on
+sys.path under that name, register it so the tests can import alma.*.
+"""
+from __future__ import annotations
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if importlib.util.find_spec("alma") is None:
+    _spec = importlib.machinery.ModuleSpec("alma", None, is_package=True)
+    _spec.submodule_search_locations = [_ROOT]
+    sys.modules["alma"] = importlib.util.module_from_spec(_spec)
@@ -0,0 +1,92 @@
+# alma/tests/signals.py
+
+"""
+Generated inputs shared by the tests.
+"""
+from __future__ import annotations
+from datetime import datetime, timedelta
+from typing import List
+import random
+
+from alma.cadence_layer import CadenceConfig, CadencePoint, CadenceWindowMetrics, RawSample, build_cadence_windows
+from alma.signal_generator import generate_signals
+
+
+START = datetime(2025, 1, 1)
+
+
+def wearer_samples(minutes: float = 600, seed: int = 7, step_seconds: float = 5.0) -> List[RawSample]:
+    """
+    One synthetic wearer cycling through the four demo phases every hour.
+    """
+    return generate_signals(minutes=minutes, step_seconds=step_seconds, seed=seed).raw_samples()
+
+
+def wearer_windows(
+    minutes: float = 600,
+    seed: int = 7,
+    window_size: float = 120.0,
+    step_size: float = 120.0,
+) -> List[CadenceWindowMetrics]:
+    """
+    Cadence windows of a synthetic wearer (realistic feature scales).
+    """
+    return build_cadence_windows(
+        wearer_samples(minutes, seed),
+        CadenceConfig(window_size=window_size, step_size=step_size),
+    )
+
+
+def scaled_windows(
+    n: int,
+    seed: int = 0,
+    step_minutes: int = 5,
+    shuffle: bool = False,
+    jitter: bool = False,
+) -> List[CadenceWindowMetrics]:
+    """
+    Windows whose features sit where tanh is not saturated, rounded so
+    similarity ties happen, with about 10% of the features missing and
+    confidences around the Deja-Vu cut-off.
+    """
+    rnd = random.Random(seed)
+
+    def feature(v: float):
+        return None if rnd.random() < 0.1 else round(v, 1)
+
+    out = []
+    for i in range(n):
+        end = START + timedelta(minutes=step_minutes * i, seconds=rnd.randint(0, 30) if jitter else 0)
+        out.append(CadenceWindowMetrics(
+            window_start=end - timedelta(minutes=10),
+            window_end=end,
+            hr_mean=feature(rnd.gauss(0, 1)),
+            hrv_rmssd=feature(rnd.gauss(0.5, 0.5)),
+            movement_mean=feature(rnd.gauss(0, 1)),
+            confidence_mean=round(rnd.uniform(0.4, 1.0), 1),
+        ))
+    if shuffle:
+        rnd.shuffle(out)
+    return out
+
+
+def edge_points(n: int = 600, seed: int = 41) -> List[CadencePoint]:
+    """
+    Points sitting on and around every threshold, with missing values and
+    confidences on both sides of the cut-off.
+    """
+    rnd = random.Random(seed)
+
+    def pick(*values):
+        return rnd.choice(values + (None,))
+
+    return [
+        CadencePoint(
+            timestamp=START + timedelta(minutes=2 * i),
+            hr_mean=pick(54.0, 55.0, 56.0, 75.0, 94.0, 95.0, 96.0, 97.5),
+            hrv_rmssd=pick(15.0, 19.0, 20.0, 21.0, 39.0, 40.0, 41.0, 43.0),
+            movement_level=pick(0.0, 195.0, 199.0, 200.0, 201.0, 204.0, 205.0),
+            confidence=rnd.choice([0.0, 0.49, 0.5, 0.51, 1.0]),
+        )
+        for i in range(n)
+    ]
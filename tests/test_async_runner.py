@@ -0,0 +1,128 @@
+# alma/tests/test_async_runner.py
+
+from datetime import timedelta, timezone
+import asyncio
+
+import pytest
+
+from alma.async_runner import AsyncPipelineRunner, RunnerConfig
+from alma.cadence_layer import RawSample
+from alma.pipeline import AlmaPipelineConfig, run_alma_core_pipeline
+
+from signals import wearer_samples
+
+
+SMALL_QUEUES = RunnerConfig(sample_queue_size=8, window_queue_size=2, result_queue_size=4,
+                            batch_size=16, offload_min_windows=2)
+
+
+async def aiter_samples(samples):
+    for s in samples:
+        yield s
+
+
+async def run_devices(streams, runner_config=None, config=None):
+    """
+    Ingest every stream concurrently and collect the results per device.
+    """
+    runner = AsyncPipelineRunner(config, runner_config)
+    out = {device: [] for device in streams}
+
+    async def consume():
+        async for device, result in runner.results():
+            out[device].append(result)
+
+    consumer = asyncio.create_task(consume())
+    outcomes = await asyncio.gather(
+        *(runner.ingest(device, aiter_samples(samples)) for device, samples in streams.items()),
+        return_exceptions=True,
+    )
+    try:
+        await runner.aclose()
+    except ValueError as exc:
+        # aclose() re-raises the failure ingest() already reported
+        assert exc in outcomes
+    await consumer
+    return out, dict(zip(streams, outcomes)), runner
+
+
+@pytest.mark.parametrize("runner_config", [None, SMALL_QUEUES])
+def test_matches_serial_pipeline(runner_config):
+    config = AlmaPipelineConfig(cadence_seconds=60)
+    streams = {f"dev-{i}": wearer_samples(minutes=60 + 30 * i, seed=i) for i in range(6)}
+    out, outcomes, runner = asyncio.run(run_devices(streams, runner_config, config))
+    assert all(o is None for o in outcomes.values())
+    for device, samples in streams.items():
+        assert out[device] == list(run_alma_core_pipeline(samples, config))
+    assert runner.device_count == 0
+
+
+def test_tz_aware_samples():
+    tz = timezone(timedelta(hours=5, minutes=30))
+    samples = [RawSample(s.timestamp.replace(tzinfo=tz), s.hr_bpm, s.rr_ms, s.accel_mg, s.signal_quality)
+               for s in wearer_samples(minutes=90, seed=9)]
+    out, _, _ = asyncio.run(run_devices({"a": samples}, SMALL_QUEUES))
+    assert out["a"] == list(run_alma_core_pipeline(samples))
+
+
+def test_out_of_order_device_fails_alone():
+    good = wearer_samples(minutes=60, seed=1)
+    bad = wearer_samples(minutes=60, seed=2)
+    bad[300], bad[100] = bad[100], bad[300]
+    out, outcomes, _ = asyncio.run(run_devices({"good": good, "bad": bad}, SMALL_QUEUES))
+    assert isinstance(outcomes["bad"], ValueError)
+    assert outcomes["good"] is None
+    assert out["good"] == list(run_alma_core_pipeline(good))
+    assert out["bad"] == list(run_alma_core_pipeline(bad[:101]))[:len(out["bad"])]
+
+
+def test_aclose_reraises_device_errors():
+    samples = wearer_samples(minutes=10, seed=3)
+
+    async def main():
+        runner = AsyncPipelineRunner(runner_config=SMALL_QUEUES)
+        await runner.submit("a", samples[5])
+        await runner.submit("a", samples[0])
+        with pytest.raises(ValueError):
+            await runner.aclose()
+        with pytest.raises(RuntimeError):
+            await runner.submit("b", samples[0])
+
+    asyncio.run(main())
+
+
+def test_backpressure_holds_the_producer():
+    samples = wearer_samples(minutes=60, seed=4)
+
+    async def main():
+        runner = AsyncPipelineRunner(runner_config=SMALL_QUEUES)
+        ingest = asyncio.create_task(runner.ingest("a", aiter_samples(samples)))
+        await asyncio.sleep(0.2)
+        # nobody reads results: the queues fill up and ingest waits
+        assert not ingest.done()
+        got = []
+
+        async def consume():
+            async for _, result in runner.results():
+                got.append(result)
+
+        consumer = asyncio.create_task(consume())
+        await ingest
+        await runner.aclose()
+        await consumer
+        return got
+
+    assert asyncio.run(main()) == list(run_alma_core_pipeline(samples))
+
+
+def test_empty_streams():
+    out, outcomes, runner = asyncio.run(run_devices({"a": [], "b": []}))
+    assert out == {"a": [], "b": []}
+    assert all(o is None for o in outcomes.values())
+
+    async def close_unknown():
+        runner = AsyncPipelineRunner()
+        await runner.close_device("never-seen")
+        await runner.aclose()
+
+    asyncio.run(close_unknown())
@@ -0,0 +1,85 @@
+# alma/tests/test_benchmarks.py
+
+from dataclasses import replace
+import json
+
+import pytest
+
+from alma.benchmarks import (
+    BenchResult,
+    _samples,
+    compare,
+    load_results,
+    run_benchmark,
+    save_results,
+)
+from alma.cadence_layer import build_cadence_windows
+
+
+@pytest.fixture(scope="module")
+def samples():
+    return _samples(60, 42)
+
+
+def _result(**kw) -> BenchResult:
+    base = dict(name="dejavu", size="1h", items=100, seconds=0.01, throughput=10_000.0,
+                best_seconds=0.01, repeats=5, reference_seconds=0.005, p99_ms=0.1, peak_mb=1.0)
+    base.update(kw)
+    return BenchResult(**base)
+
+
+@pytest.mark.parametrize("name", ["cadence", "dejavu", "interpretation", "chain", "verify"])
+def test_run_benchmark_reports_repeats(samples, name):
+    result = run_benchmark(name, "1h", samples, measure_memory=False, repeats=3, min_time=0.0)
+    assert result.repeats == 3
+    assert result.best_seconds <= result.seconds
+    assert result.throughput == pytest.approx(result.items / result.best_seconds)
+    assert result.reference_seconds > 0
+
+
+def test_chain_counts_windows_like_its_latencies(samples):
+    result = run_benchmark("chain", "1h", samples, measure_memory=False, repeats=1, min_time=0.0)
+    assert result.items == len(build_cadence_windows(samples))
+    assert result.p99_ms is not None
+
+
+def test_interpretation_is_timed_as_one_batch(samples):
+    result = run_benchmark("interpretation", "1h", samples, repeats=1, min_time=0.0)
+    assert result.p50_ms is None and result.p99_ms is None
+    assert result.peak_mb is not None
+
+
+def test_invalid_repeats(samples):
+    with pytest.raises(ValueError):
+        run_benchmark("cadence", "1h", samples, repeats=0)
+
+
+def test_compare_identical_results_has_no_regressions():
+    results = [_result(), _result(name="chain")]
+    assert compare(results, results) == []
+
+
+def test_compare_flags_slower_code():
+    regressions = compare([_result(throughput=5_000.0, p99_ms=0.3)], [_result()])
+    assert len(regressions) == 2
+
+
+def test_compare_scales_by_machine_speed():
+    # the whole machine ran at half speed: same code, no regression
+    slow = _result(throughput=5_000.0, p99_ms=0.2, reference_seconds=0.01)
+    assert compare([slow], [_result()]) == []
+    # memory does not scale with speed
+    assert len(compare([replace(slow, peak_mb=2.0)], [_result()])) == 1
+
+
+def test_results_without_repeat_fields_still_load(tmp_path):
+    path = tmp_path / "old.json"
+    path.write_text(json.dumps({"results": [
+        {"name": "cadence", "size": "1h", "items": 10, "seconds": 1.0, "throughput": 10.0},
+    ]}))
+    old = load_results(str(path))
+    assert old[0].repeats == 1 and old[0].reference_seconds is None
+    assert compare([_result(name="cadence", throughput=10.0)], old) == []
+
+    save_results(str(path), [_result()])
+    assert load_results(str(path)) == [_result()]
@@ -0,0 +1,134 @@
+# alma/tests/test_cadence_layer.py
+
+from datetime import timedelta, timezone
+import math
+import random
+
+import pytest
+
+from alma.cadence_layer import (
+    CadenceConfig,
+    CadenceWindowEngine,
+    CadenceWindowMetrics,
+    RawSample,
+    build_cadence_windows,
+    windows_to_cadence_points,
+)
+
+from signals import START, wearer_samples
+
+
+def naive_windows(samples, config):
+    """
+    Filter the whole series once per window and aggregate from scratch.
+    """
+    if not samples:
+        return []
+    origin = samples[0].timestamp
+    size = timedelta(seconds=config.window_size)
+    step = timedelta(seconds=config.step_size)
+    out = []
+    index = 0
+    while origin + index * step <= samples[-1].timestamp:
+        start = origin + index * step
+        index += 1
+        inside = [s for s in samples if start <= s.timestamp < start + size]
+        if not inside:
+            continue
+        good = [s for s in inside if s.signal_quality >= config.min_signal_quality]
+        diffs = [b.rr_ms - a.rr_ms for a, b in zip(good, good[1:])]
+        out.append(CadenceWindowMetrics(
+            window_start=start,
+            window_end=start + size,
+            hr_mean=sum(s.hr_bpm for s in good) / len(good) if good else None,
+            hrv_rmssd=math.sqrt(sum(d * d for d in diffs) / len(diffs)) if diffs else None,
+            movement_mean=sum(s.accel_mg for s in good) / len(good) if good else None,
+            confidence_mean=sum(s.signal_quality for s in inside) / len(inside),
+        ))
+    return out
+
+
+def gappy_samples(n=2000, seed=3):
+    """
+    Irregular samples with repeated timestamps, gaps of several windows
+    and many readings below the quality cut-off.
+    """
+    rnd = random.Random(seed)
+    t = START
+    out = []
+    for _ in range(n):
+        r = rnd.random()
+        t += timedelta(seconds=0 if r < 0.05 else 900 if r < 0.07 else rnd.uniform(0.5, 9))
+        out.append(RawSample(t, rnd.gauss(70, 8), rnd.gauss(800, 40), abs(rnd.gauss(30, 20)),
+                             rnd.uniform(0.4, 1.0)))
+    return out
+
+
+CONFIGS = [
+    CadenceConfig(),
+    CadenceConfig(window_size=120, step_size=30),
+    CadenceConfig(window_size=60, step_size=90, min_signal_quality=0.9),
+    CadenceConfig(window_size=7.5, step_size=2.5),
+]
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_matches_naive_recompute_on_generated_signals(config):
+    samples = wearer_samples(minutes=120)
+    assert build_cadence_windows(samples, config) == naive_windows(samples, config)
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_matches_naive_recompute_on_irregular_samples(config):
+    samples = gappy_samples()
+    assert build_cadence_windows(samples, config) == naive_windows(samples, config)
+
+
+def test_push_returns_windows_as_they_close():
+    config = CadenceConfig(window_size=120, step_size=60)
+    samples = wearer_samples(minutes=30)
+    engine = CadenceWindowEngine(config)
+    streamed = []
+    for s in samples:
+        for w in engine.push(s):
+            assert w.window_end <= s.timestamp
+            streamed.append(w)
+    streamed.extend(engine.flush())
+    assert streamed == naive_windows(samples, config)
+    assert engine.flush() == []
+
+
+def test_tz_aware_samples():
+    tz = timezone(timedelta(hours=2))
+    samples = gappy_samples(500)
+    aware = [RawSample(s.timestamp.replace(tzinfo=tz), s.hr_bpm, s.rr_ms, s.accel_mg, s.signal_quality)
+             for s in samples]
+    windows = build_cadence_windows(aware)
+    assert windows == naive_windows(aware, CadenceConfig())
+    assert all(w.window_start.tzinfo is tz for w in windows)
+
+
+def test_out_of_order_samples_raise():
+    samples = gappy_samples(50)
+    engine = CadenceWindowEngine()
+    for s in samples[:10]:
+        engine.push(s)
+    engine.push(samples[9])
+    with pytest.raises(ValueError):
+        engine.push(samples[5])
+
+
+def test_empty_input_and_bad_config():
+    assert build_cadence_windows([]) == []
+    assert windows_to_cadence_points([]) == []
+    for config in (CadenceConfig(window_size=0), CadenceConfig(step_size=-1)):
+        with pytest.raises(ValueError):
+            CadenceWindowEngine(config)
+
+
+def test_cadence_points_are_stamped_with_window_end():
+    windows = build_cadence_windows(wearer_samples(minutes=20))
+    points = windows_to_cadence_points(windows)
+    assert [p.timestamp for p in points] == [w.window_end for w in windows]
+    assert [(p.hr_mean, p.hrv_rmssd, p.movement_level, p.confidence) for p in points] == \
+        [(w.hr_mean, w.hrv_rmssd, w.movement_mean, w.confidence_mean) for w in windows]
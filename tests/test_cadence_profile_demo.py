@@ -0,0 +1,98 @@
+# alma/tests/test_cadence_profile_demo.py
+
+from datetime import timedelta, timezone
+import importlib.util
+import math
+import os
+import random
+import sys
+
+import pytest
+
+from signals import START
+
+
+def _load_demo():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "docs", "models", "examples", "cadence_profile_demo.py")
+    spec = importlib.util.spec_from_file_location("cadence_profile_demo", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+demo = _load_demo()
+
+
+def phase_samples(n=900, seed=8, tz=None):
+    """
+    Samples drifting through all four states, with bursts of bad signal,
+    repeated timestamps and gaps longer than the trend window.
+    """
+    rnd = random.Random(seed)
+    t = START.replace(tzinfo=tz)
+    bad_until = 0
+    out = []
+    for i in range(n):
+        r = rnd.random()
+        t += timedelta(seconds=0 if r < 0.03 else 1200 if r < 0.04 else rnd.uniform(1, 8))
+        if rnd.random() < 0.02:
+            bad_until = i + rnd.randint(5, 40)
+        hr = rnd.gauss(75 + 60 * math.sin(i / 80) ** 2, 6)
+        out.append(demo.RawSample(
+            timestamp=t,
+            hr_bpm=hr,
+            rr_ms=60000.0 / max(hr, 40) + rnd.gauss(0, 30),
+            accel_mg=abs(rnd.gauss(50 + 450 * rnd.random(), 60)),
+            signal_quality=rnd.uniform(0.3, 0.6) if i < bad_until else rnd.uniform(0.7, 1.0),
+        ))
+    return out
+
+
+@pytest.mark.parametrize("tz", [None, timezone(timedelta(hours=-5))])
+def test_estimator_matches_infer_state(tz):
+    samples = phase_samples(tz=tz)
+    estimator = demo.CadenceStateEstimator()
+    seen = set()
+    for i, s in enumerate(samples):
+        got = estimator.update(s)
+        assert got == demo.infer_state(samples[:i + 1])
+        seen.add(got.state)
+    assert seen == set(demo.CadenceState)
+
+
+def test_running_sum_matches_fsum():
+    rnd = random.Random(9)
+    values = [rnd.choice([1e16, -1e16, 1.0, 0.1, 1e-8]) * rnd.random() for _ in range(2000)]
+    total = demo._RunningSum()
+    for i, x in enumerate(values):
+        total.add(x)
+        if i >= 50:
+            total.remove(values[i - 50])
+            assert total.total() == math.fsum(values[i - 49:i + 1])
+
+
+def test_out_of_order_samples_raise():
+    samples = phase_samples(20)
+    estimator = demo.CadenceStateEstimator()
+    for s in samples[:10]:
+        estimator.push(s)
+    estimator.push(samples[9])
+    with pytest.raises(ValueError):
+        estimator.push(samples[3])
+
+
+def test_no_samples():
+    got = demo.CadenceStateEstimator().result()
+    expected = demo.infer_state([])
+    assert (got.state, got.confidence, got.events) == (expected.state, expected.confidence, expected.events)
+    assert got.state is demo.CadenceState.UNKNOWN
+
+
+def test_simulate_stream_is_seeded():
+    results = demo.simulate_stream(minutes=30, seed=3)
+    again = demo.simulate_stream(minutes=30, seed=3)
+    assert len(results) == 14
+    assert [(r.state, r.confidence, r.events) for r in results] == \
+        [(r.state, r.confidence, r.events) for r in again]
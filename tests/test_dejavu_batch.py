@@ -0,0 +1,56 @@
+# alma/tests/test_dejavu_batch.py
+
+from datetime import timedelta, timezone
+
+import pytest
+
+from alma.dejavu_batch import build_feature_matrix, run_dejavu_pipeline_batch
+from alma.dejavu_layer import DejaVuConfig
+
+import baseline
+from signals import scaled_windows, wearer_windows
+
+
+CONFIGS = [
+    DejaVuConfig(),
+    DejaVuConfig(similarity_threshold=0.5, max_matches_per_window=5, min_history_minutes=300),
+    DejaVuConfig(similarity_threshold=0.0),
+    DejaVuConfig(max_matches_per_window=0),
+]
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("order", ["sorted", "shuffled", "jittered"])
+def test_matches_baseline_on_scaled_windows(config, order):
+    windows = scaled_windows(400, seed=3, shuffle=order == "shuffled", jitter=order == "jittered")
+    assert run_dejavu_pipeline_batch(windows, config, block_size=64) == \
+        baseline.run_dejavu_pipeline(windows, config)
+
+
+@pytest.mark.parametrize("config", CONFIGS[:3])
+def test_matches_baseline_on_generated_signals(config):
+    windows = wearer_windows(minutes=600)
+    assert run_dejavu_pipeline_batch(windows, config, block_size=32) == \
+        baseline.run_dejavu_pipeline(windows, config)
+
+
+def test_empty_and_single_window():
+    assert run_dejavu_pipeline_batch([]) == []
+    assert run_dejavu_pipeline_batch(scaled_windows(1)) == []
+    assert build_feature_matrix([]).coords.shape == (0, 4)
+
+
+def test_low_confidence_prefix_produces_no_summaries():
+    windows = scaled_windows(50, seed=1)
+    for w in windows[:10]:
+        w.confidence_mean = 0.1
+    assert run_dejavu_pipeline_batch(windows) == baseline.run_dejavu_pipeline(windows)
+
+
+def test_tz_aware_windows():
+    tz = timezone(timedelta(hours=1))
+    windows = scaled_windows(200, seed=2, jitter=True)
+    for w in windows:
+        w.window_start = w.window_start.replace(tzinfo=tz)
+        w.window_end = w.window_end.replace(tzinfo=tz)
+    assert run_dejavu_pipeline_batch(windows, block_size=16) == baseline.run_dejavu_pipeline(windows)
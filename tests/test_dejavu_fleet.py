@@ -0,0 +1,69 @@
+# alma/tests/test_dejavu_fleet.py
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+
+import pytest
+
+from alma.dejavu_fleet import _pack_windows, _unpack_windows, run_dejavu_fleet
+from alma.dejavu_layer import DejaVuConfig, run_dejavu_pipeline
+
+import baseline
+from signals import scaled_windows, wearer_windows
+
+
+@pytest.fixture(scope="module")
+def fleet():
+    users = {f"user-{i}": scaled_windows(40 * (i % 5) + 10, seed=i, jitter=True) for i in range(23)}
+    users["wearer"] = wearer_windows(minutes=360)
+    users["nobody"] = []
+    return users
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 7])
+def test_matches_baseline_per_user(fleet, chunk_size):
+    config = DejaVuConfig(similarity_threshold=0.7)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        result = run_dejavu_fleet(fleet, config, max_workers=3, chunk_size=chunk_size, executor=pool)
+    assert list(result.summaries) == list(fleet)
+    for user, windows in fleet.items():
+        assert result.summaries[user] == baseline.run_dejavu_pipeline(windows, config)
+    assert sum(t.users for t in result.worker_timings) == len(fleet)
+    assert sum(t.windows for t in result.worker_timings) == sum(map(len, fleet.values()))
+
+
+def test_process_pool(fleet):
+    subset = {u: fleet[u] for u in list(fleet)[:6]}
+    result = run_dejavu_fleet(subset, max_workers=2)
+    assert result.summaries == {u: run_dejavu_pipeline(w) for u, w in subset.items()}
+
+
+def test_packing_round_trip():
+    windows = scaled_windows(100, seed=3, jitter=True)
+    assert any(w.hr_mean is None for w in windows)
+    assert _unpack_windows(_pack_windows(windows)) == windows
+    assert _unpack_windows(_pack_windows([])) == []
+
+
+def test_tz_aware_windows_come_back_naive_utc():
+    windows = scaled_windows(50, seed=4)
+    aware = scaled_windows(50, seed=4)
+    for w in aware:
+        w.window_start = w.window_start.replace(tzinfo=timezone.utc)
+        w.window_end = w.window_end.replace(tzinfo=timezone.utc)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        result = run_dejavu_fleet({"a": aware}, max_workers=1, executor=pool)
+    assert result.summaries["a"] == run_dejavu_pipeline(windows)
+
+
+def test_out_of_order_windows_use_the_fallback():
+    windows = scaled_windows(150, seed=5, shuffle=True)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        result = run_dejavu_fleet({"a": windows}, max_workers=1, executor=pool)
+    assert result.summaries["a"] == baseline.run_dejavu_pipeline(windows)
+
+
+def test_empty_fleet():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        result = run_dejavu_fleet({}, executor=pool)
+    assert result.summaries == {} and result.worker_timings == []
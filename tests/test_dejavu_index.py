@@ -0,0 +1,125 @@
+# alma/tests/test_dejavu_index.py
+
+from datetime import timedelta
+import random
+
+import pytest
+
+from alma.dejavu_index import DejaVuIndex, run_dejavu_pipeline_indexed
+from alma.dejavu_layer import (
+    DejaVuConfig,
+    DejaVuEngine,
+    DejaVuHistory,
+    _window_to_feature_vector,
+    build_feature_history,
+    find_dejavu_for_window,
+)
+
+import baseline
+from signals import scaled_windows, wearer_windows
+
+
+CONFIGS = [
+    DejaVuConfig(),
+    DejaVuConfig(similarity_threshold=0.9, max_matches_per_window=5),
+    DejaVuConfig(similarity_threshold=0.97, min_history_minutes=600),
+    DejaVuConfig(similarity_threshold=0.0),
+]
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_matches_baseline_on_scaled_windows(config):
+    windows = scaled_windows(600, seed=5, jitter=True)
+    assert run_dejavu_pipeline_indexed(windows, config) == baseline.run_dejavu_pipeline(windows, config)
+
+
+@pytest.mark.parametrize("config", CONFIGS[:3])
+def test_matches_baseline_on_generated_signals(config):
+    windows = wearer_windows(minutes=720)
+    assert run_dejavu_pipeline_indexed(windows, config) == baseline.run_dejavu_pipeline(windows, config)
+
+
+def test_out_of_order_appends_match_plain_history():
+    config = DejaVuConfig(similarity_threshold=0.9, min_history_minutes=24 * 60)
+    windows = scaled_windows(300, seed=2, shuffle=True)
+    index, history = DejaVuIndex(config), DejaVuHistory()
+    for fv in build_feature_history(windows, config):
+        index.append(fv)
+        history.append(fv)
+    for w in windows:
+        assert find_dejavu_for_window(w, index, config) == find_dejavu_for_window(w, history, config)
+
+
+def test_engine_rejects_out_of_order_windows():
+    config = DejaVuConfig()
+    engine = DejaVuEngine(config, history=DejaVuIndex(config))
+    windows = scaled_windows(3)
+    engine.push(windows[1])
+    with pytest.raises(ValueError):
+        engine.push(windows[0])
+
+
+def test_empty_input():
+    assert run_dejavu_pipeline_indexed([]) == []
+    index = DejaVuIndex()
+    w = scaled_windows(1)[0]
+    w.confidence_mean = 1.0
+    fv = _window_to_feature_vector(w, index.config)
+    assert index.candidates(fv, fv.timestamp - timedelta(hours=1), fv.timestamp) == []
+
+
+def test_grid_prunes_when_the_metric_separates_windows():
+    config = DejaVuConfig(similarity_threshold=0.9, min_history_minutes=7 * 24 * 60)
+    windows = scaled_windows(2000, seed=4)
+    index = DejaVuIndex(config)
+    scanned = in_range = 0
+    for w in windows:
+        fv = _window_to_feature_vector(w, config)
+        if fv is None:
+            continue
+        start, end = fv.timestamp - timedelta(days=7), fv.timestamp - timedelta(minutes=15)
+        scanned += len(index.candidates(fv, start, end))
+        in_range += len(index.between(start, end))
+        index.append(fv)
+    assert scanned < in_range / 3
+
+
+def test_saturated_features_fall_back_to_the_time_range():
+    # tanh(hr) == 1.0 for every realistic heart rate, so only confidence
+    # separates these windows and nothing can be pruned
+    config = DejaVuConfig()
+    index = DejaVuIndex(config)
+    for fv in build_feature_history(wearer_windows(minutes=600), config):
+        index.append(fv)
+    fv = index.between(index._timestamps[0], index._timestamps[-1])[-1]
+    start, end = fv.timestamp - timedelta(hours=5), fv.timestamp
+    assert index.candidates(fv, start, end) == index.between(start, end)
+
+
+def test_eviction_removes_entries_from_every_cell():
+    config = DejaVuConfig(similarity_threshold=0.9)
+    windows = scaled_windows(3000, seed=6)
+    engine = DejaVuEngine(config, history=DejaVuIndex(config))
+    for w in windows:
+        engine.push(w)
+    index = engine.history
+    cutoff = index.between(index._timestamps[0], index._timestamps[-1])[0].timestamp
+    assert len(index) <= 13
+    assert index._grids and any(index._grids.values())
+    for mask, grids in index._grids.items():
+        for grid in grids.values():
+            entries = [e for cell in grid.cells.values() for e in cell.live()]
+            assert len(entries) == len(index._groups[mask])
+            assert all(e.timestamp >= cutoff for e in entries)
+            assert all(len(cell.entries) <= 2 * len(cell) for cell in grid.cells.values())
+
+
+def test_grid_rebuilds_when_a_field_starts_to_spread():
+    config = DejaVuConfig(similarity_threshold=0.9, min_history_minutes=24 * 60)
+    windows = scaled_windows(200, seed=8)
+    rnd = random.Random(8)
+    for w in windows[:100]:
+        w.hr_mean, w.hrv_rmssd, w.movement_mean, w.confidence_mean = 80.0, 40.0, 300.0, 0.9
+    for w in windows[100:]:
+        w.hr_mean, w.hrv_rmssd, w.movement_mean = (round(rnd.gauss(0, 1), 1) for _ in range(3))
+    assert run_dejavu_pipeline_indexed(windows, config) == baseline.run_dejavu_pipeline(windows, config)
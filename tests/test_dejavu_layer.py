@@ -0,0 +1,153 @@
+# alma/tests/test_dejavu_layer.py
+
+from datetime import timedelta, timezone
+
+import pytest
+
+from alma.dejavu_layer import (
+    DejaVuConfig,
+    DejaVuEngine,
+    DejaVuHistory,
+    build_feature_history,
+    find_dejavu_for_window,
+    run_dejavu_pipeline,
+)
+
+import baseline
+from signals import START, scaled_windows, wearer_windows
+
+
+CONFIGS = [
+    DejaVuConfig(),
+    DejaVuConfig(similarity_threshold=0.5, max_matches_per_window=5, min_history_minutes=300),
+    DejaVuConfig(similarity_threshold=0.0),
+]
+
+
+# -- sliding history --------------------------------------------------------
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("order", ["sorted", "shuffled", "jittered"])
+def test_pipeline_matches_baseline(config, order):
+    windows = scaled_windows(300, seed=11, shuffle=order == "shuffled", jitter=order == "jittered")
+    assert run_dejavu_pipeline(windows, config) == baseline.run_dejavu_pipeline(windows, config)
+
+
+@pytest.mark.parametrize("config", CONFIGS[:2])
+def test_pipeline_matches_baseline_on_generated_signals(config):
+    windows = wearer_windows(minutes=720)
+    assert run_dejavu_pipeline(windows, config) == baseline.run_dejavu_pipeline(windows, config)
+
+
+def test_pipeline_with_tz_aware_windows():
+    windows = scaled_windows(200, seed=4)
+    for w in windows:
+        w.window_start = w.window_start.replace(tzinfo=timezone.utc)
+        w.window_end = w.window_end.replace(tzinfo=timezone.utc)
+    assert run_dejavu_pipeline(windows) == baseline.run_dejavu_pipeline(windows)
+
+
+def test_empty_input():
+    assert run_dejavu_pipeline([]) == []
+    assert run_dejavu_pipeline(scaled_windows(1)) == []
+    history = DejaVuHistory()
+    assert len(history) == 0 and history.between(START, START + timedelta(days=1)) == []
+
+
+def test_history_keeps_time_order_and_evicts():
+    vectors = build_feature_history(scaled_windows(400, seed=5, shuffle=True), DejaVuConfig(min_confidence_mean=0))
+    history = DejaVuHistory()
+    for fv in vectors:
+        history.append(fv)
+    ordered = sorted(vectors, key=lambda v: v.timestamp)
+    assert list(history) == ordered
+
+    start, end = START + timedelta(hours=3), START + timedelta(hours=9)
+    assert history.between(start, end) == [v for v in ordered if start <= v.timestamp <= end]
+
+    for hours in range(0, 40, 2):
+        cutoff = START + timedelta(hours=hours)
+        history.evict_before(cutoff)
+        assert list(history) == [v for v in ordered if v.timestamp >= cutoff]
+    assert len(history) == 0
+
+
+# -- streaming engine -------------------------------------------------------
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_engine_pushes_match_baseline(config):
+    windows = scaled_windows(300, seed=12, jitter=True)
+    # the first windows below the confidence cut-off produce no summary
+    for w in windows[:5]:
+        w.confidence_mean = 0.1
+    engine = DejaVuEngine(config)
+    pushed = [engine.push(w) for w in windows]
+    assert [s for s in pushed if s is not None] == baseline.run_dejavu_pipeline(windows, config)
+    assert pushed[:6] == [None] * 6
+
+
+def test_engine_bounds_its_history():
+    config = DejaVuConfig()
+    engine = DejaVuEngine(config)
+    for w in scaled_windows(2000, seed=13):
+        engine.push(w)
+    # one window every 5 minutes, 60 minute lookback
+    assert len(engine.history) <= 13
+
+
+def test_engine_rejects_out_of_order_windows():
+    windows = scaled_windows(3)
+    engine = DejaVuEngine()
+    engine.push(windows[1])
+    with pytest.raises(ValueError):
+        engine.push(windows[0])
+    # equal end times are fine
+    engine.push(windows[1])
+
+
+def test_engine_with_prefilled_history():
+    config = DejaVuConfig()
+    windows = scaled_windows(100, seed=14)
+    history = DejaVuHistory()
+    for fv in build_feature_history(windows[:50], config):
+        history.append(fv)
+    engine = DejaVuEngine(config, history=history)
+    pushed = [engine.push(w) for w in windows[50:]]
+    assert None not in pushed
+    assert pushed == baseline.run_dejavu_pipeline(windows, config)[-50:]
+
+
+# -- top-k selection --------------------------------------------------------
+
+@pytest.mark.parametrize("k", [0, 1, 3, 10, 1000])
+@pytest.mark.parametrize("threshold", [0.0, 0.8, 0.95])
+def test_top_k_matches_collect_and_sort(k, threshold):
+    # rounded features make many exact similarity ties
+    config = DejaVuConfig(similarity_threshold=threshold, max_matches_per_window=k,
+                          min_history_minutes=24 * 60, min_confidence_mean=0.0)
+    windows = scaled_windows(400, seed=15)
+    history = build_feature_history(windows, config)
+    sorted_history = DejaVuHistory()
+    for fv in history:
+        sorted_history.append(fv)
+    for w in windows[::7]:
+        expected = baseline.find_dejavu_for_window(w, history, config)
+        assert find_dejavu_for_window(w, history, config) == expected
+        assert find_dejavu_for_window(w, sorted_history, config) == expected
+
+
+def test_top_k_on_generated_signals():
+    config = DejaVuConfig(min_history_minutes=12 * 60, max_matches_per_window=5)
+    windows = wearer_windows(minutes=720)
+    history = build_feature_history(windows, config)
+    for w in windows[::5]:
+        assert find_dejavu_for_window(w, history, config) == \
+            baseline.find_dejavu_for_window(w, history, config)
+
+
+def test_top_k_with_empty_history():
+    w = scaled_windows(1)[0]
+    w.confidence_mean = 1.0
+    summary = find_dejavu_for_window(w, [])
+    assert summary.matches == [] and summary.strongest_match is None
+    assert summary == baseline.find_dejavu_for_window(w, [])
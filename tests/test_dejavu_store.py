@@ -0,0 +1,131 @@
+# alma/tests/test_dejavu_store.py
+
+from datetime import timedelta, timezone
+import os
+
+import pytest
+
+from alma.dejavu_layer import (
+    DejaVuConfig,
+    DejaVuEngine,
+    build_feature_history,
+    find_dejavu_for_window,
+)
+from alma.dejavu_store import DejaVuFeatureStore, open_user_store
+
+import baseline
+from signals import START, scaled_windows, wearer_windows
+
+
+def _vectors(n=300, seed=21):
+    return build_feature_history(scaled_windows(n, seed=seed, jitter=True), DejaVuConfig(min_confidence_mean=0))
+
+
+def test_round_trip_and_reopen(tmp_path):
+    vectors = _vectors()
+    path = str(tmp_path / "u.djv")
+    with DejaVuFeatureStore(path) as store:
+        for fv in vectors:
+            store.append(fv)
+        assert list(store) == vectors
+    with DejaVuFeatureStore(path) as store:
+        assert len(store) == len(vectors)
+        assert list(store) == vectors
+        assert store[-1] == vectors[-1]
+        start, end = START + timedelta(hours=2), START + timedelta(hours=7)
+        assert store.between(start, end) == [v for v in vectors if start <= v.timestamp <= end]
+
+
+def test_store_as_history_matches_baseline(tmp_path):
+    config = DejaVuConfig(min_history_minutes=6 * 60)
+    windows = wearer_windows(minutes=720)
+    with open_user_store(str(tmp_path), "u1") as store:
+        engine = DejaVuEngine(config, history=store)
+        pushed = [engine.push(w) for w in windows]
+        assert [s for s in pushed if s is not None] == baseline.run_dejavu_pipeline(windows, config)
+
+
+def test_reopened_store_continues_a_session(tmp_path):
+    config = DejaVuConfig(min_history_minutes=24 * 60)
+    windows = scaled_windows(200, seed=22)
+    path = str(tmp_path / "u.djv")
+    with DejaVuFeatureStore(path) as store:
+        for w in windows[:100]:
+            store.append_window(w, config)
+    with DejaVuFeatureStore(path) as store:
+        history = build_feature_history(windows[:100], config)
+        for w in windows[100:]:
+            assert find_dejavu_for_window(w, store, config) == \
+                baseline.find_dejavu_for_window(w, history, config)
+
+
+def test_tz_aware_timestamps_come_back_as_utc(tmp_path):
+    tz = timezone(timedelta(hours=9))
+    vectors = _vectors(50)
+    for fv in vectors:
+        fv.timestamp = fv.timestamp.replace(tzinfo=timezone.utc).astimezone(tz)
+    path = str(tmp_path / "u.djv")
+    with DejaVuFeatureStore(path) as store:
+        for fv in vectors:
+            store.append(fv)
+        with pytest.raises(ValueError):
+            store.append(_vectors(1)[0])
+    with DejaVuFeatureStore(path) as store:
+        got = list(store)
+    assert got == vectors
+    assert all(fv.timestamp.utcoffset() == timedelta(0) for fv in got)
+
+
+def test_out_of_order_append_raises(tmp_path):
+    vectors = _vectors(10)
+    with DejaVuFeatureStore(str(tmp_path / "u.djv")) as store:
+        store.append(vectors[5])
+        with pytest.raises(ValueError):
+            store.append(vectors[4])
+        assert len(store) == 1
+
+
+@pytest.mark.parametrize("damage", ["torn", "corrupt"])
+def test_damaged_tail_is_dropped_on_open(tmp_path, damage):
+    vectors = _vectors(20)
+    path = str(tmp_path / "u.djv")
+    with DejaVuFeatureStore(path) as store:
+        for fv in vectors:
+            store.append(fv)
+    size = os.path.getsize(path)
+    with open(path, "r+b") as f:
+        if damage == "torn":
+            f.truncate(size - 7)
+        else:
+            f.seek(size - 20)
+            f.write(b"\xff\xff\xff\xff")
+    with DejaVuFeatureStore(path) as store:
+        assert list(store) == vectors[:-1]
+        store.append(vectors[-1])
+    with DejaVuFeatureStore(path) as store:
+        assert list(store) == vectors
+
+
+def test_empty_store(tmp_path):
+    path = str(tmp_path / "u.djv")
+    with DejaVuFeatureStore(path) as store:
+        assert len(store) == 0 and list(store) == []
+        assert store.between(START, START + timedelta(days=1)) == []
+        w = scaled_windows(1)[0]
+        w.confidence_mean = 1.0
+        assert find_dejavu_for_window(w, store).matches == []
+    with DejaVuFeatureStore(path) as store:
+        assert len(store) == 0
+
+
+def test_rejects_foreign_files_and_bad_user_ids(tmp_path):
+    path = tmp_path / "x.djv"
+    path.write_bytes(b"not a store at all, just some bytes")
+    with pytest.raises(ValueError):
+        DejaVuFeatureStore(str(path))
+    (tmp_path / "short.djv").write_bytes(b"ALMA")
+    with pytest.raises(ValueError):
+        DejaVuFeatureStore(str(tmp_path / "short.djv"))
+    for user in ("", ".", "..", f"a{os.sep}b"):
+        with pytest.raises(ValueError):
+            open_user_store(str(tmp_path), user)
@@ -0,0 +1,180 @@
+# alma/tests/test_event_log.py
+
+from datetime import timedelta, timezone
+import json
+import os
+import random
+
+import pytest
+
+from alma.event_log import EventEnvelope, EventLog, EventLogConfig, format_timestamp, parse_since
+
+from signals import START
+
+
+SMALL = EventLogConfig(segment_bytes=4096, index_interval_bytes=300)
+
+
+def generated_events(n=400, seed=51):
+    """
+    Events with runs of equal timestamps and microsecond steps.
+    """
+    rnd = random.Random(seed)
+    t = START
+    out = []
+    for i in range(n):
+        r = rnd.random()
+        t += timedelta(0) if r < 0.3 else timedelta(microseconds=1) if r < 0.4 else timedelta(seconds=rnd.randint(1, 600))
+        out.append(EventEnvelope(
+            id=i + 1,
+            entity_id=f"wearer-{rnd.randint(1, 3)}",
+            timestamp=t,
+            event_type=rnd.choice(["EVENT_SLOW_DOWN", "EVENT_MICRO_BREAK_RECOMMENDED"]),
+            payload=rnd.choice([None, {"hr": round(rnd.gauss(90, 10), 1)}, ["x", 1]]),
+            confidence=rnd.choice([None, round(rnd.random(), 3)]),
+        ))
+    return out
+
+
+def fill(log, events):
+    for e in events:
+        assert log.append_event(e) == e.id
+
+
+def naive_since(events, since=None, limit=0):
+    """
+    Filter the whole list; a page ends after `limit` events plus the rest
+    of the run sharing the last timestamp.
+    """
+    out = [e for e in events if since is None or e.timestamp > since]
+    if limit and len(out) > limit:
+        last = out[limit - 1].timestamp
+        out = out[:limit] + [e for e in out[limit:] if e.timestamp == last]
+    return out
+
+
+def body(log, since=None, limit=0):
+    return json.loads(b"".join(bytes(c) for c in log.response_chunks(since, limit)))
+
+
+def as_json(events):
+    return [{"timestamp": format_timestamp(e.timestamp), "id": e.id, "entity_id": e.entity_id,
+             "event_type": e.event_type, "payload": e.payload, "confidence": e.confidence}
+            for e in events]
+
+
+def probes(events):
+    times = [e.timestamp for e in events]
+    return [None, START - timedelta(days=1), times[-1], times[-1] + timedelta(seconds=1)] + \
+        times[::37] + [t + timedelta(microseconds=1) for t in times[5::41]] + \
+        [t - timedelta(microseconds=1) for t in times[9::43]]
+
+
+@pytest.mark.parametrize("config", [EventLogConfig(), SMALL])
+def test_since_matches_naive_filter(tmp_path, config):
+    events = generated_events()
+    with EventLog(str(tmp_path), config) as log:
+        fill(log, events)
+        assert len(log) == len(events)
+        for since in probes(events):
+            for limit in (0, 1, 7, 1000):
+                expected = naive_since(events, since, limit)
+                assert log.events_since(since, limit) == expected
+                assert body(log, since, limit) == {"status": "OK", "events": as_json(expected)}
+    if config is SMALL:
+        assert len([n for n in os.listdir(tmp_path) if n.endswith(".log")]) > 5
+
+
+def test_paging_by_last_timestamp_loses_nothing(tmp_path):
+    events = generated_events()
+    with EventLog(str(tmp_path), SMALL) as log:
+        fill(log, events)
+        seen, since = [], None
+        while True:
+            page = log.events_since(since, limit=5)
+            if not page:
+                break
+            seen.extend(page)
+            since = page[-1].timestamp
+    assert seen == events
+
+
+def test_reopen_continues_ids(tmp_path):
+    events = generated_events()
+    with EventLog(str(tmp_path), SMALL) as log:
+        fill(log, events[:250])
+    with EventLog(str(tmp_path), SMALL) as log:
+        assert log.events_since() == events[:250]
+        fill(log, events[250:])
+    # sealed segments come back from their index files, or a rescan
+    os.remove(sorted(tmp_path.glob("*.idx"))[0])
+    with open(sorted(tmp_path.glob("*.idx"))[1], "ab") as f:
+        f.write(b"\x00")
+    with EventLog(str(tmp_path), SMALL) as log:
+        for since in probes(events):
+            assert log.events_since(since) == naive_since(events, since)
+
+
+@pytest.mark.parametrize("cut", [1, 2, 20])
+def test_torn_tail_is_dropped_on_open(tmp_path, cut):
+    events = generated_events(60)
+    with EventLog(str(tmp_path), SMALL) as log:
+        fill(log, events)
+    active = sorted(tmp_path.glob("*.log"))[-1]
+    size = os.path.getsize(active)
+    os.truncate(active, size - cut)
+    with EventLog(str(tmp_path), SMALL) as log:
+        assert log.events_since() == events[:-1]
+        assert log.append_event(events[-1]) == events[-1].id
+    with EventLog(str(tmp_path), SMALL) as log:
+        assert log.events_since() == events
+
+
+def test_tz_aware_timestamps_are_stored_as_utc(tmp_path):
+    tz = timezone(timedelta(hours=-7))
+    events = generated_events(100)
+    with EventLog(str(tmp_path), SMALL) as log:
+        for e in events:
+            aware = e.timestamp.replace(tzinfo=timezone.utc).astimezone(tz)
+            log.append(e.entity_id, aware, e.event_type, e.payload, e.confidence)
+        assert log.events_since() == events
+        since = events[50].timestamp.replace(tzinfo=timezone.utc).astimezone(tz)
+        assert log.events_since(since) == naive_since(events, events[50].timestamp)
+    assert parse_since("2025-01-01T02:00:00+02:00") == START
+    assert parse_since("2025-01-01T00:00:00Z") == START
+
+
+def test_out_of_order_append_raises(tmp_path):
+    events = generated_events(20)
+    with EventLog(str(tmp_path)) as log:
+        fill(log, events)
+        with pytest.raises(ValueError):
+            log.append("w", events[-1].timestamp - timedelta(microseconds=1), "EVENT_SLOW_DOWN")
+        # the same instant in another zone is not older
+        same = events[-1].timestamp.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=3)))
+        assert log.append("w", same, "EVENT_SLOW_DOWN") == 21
+    with EventLog(str(tmp_path)) as log:
+        with pytest.raises(ValueError):
+            log.append("w", START, "EVENT_SLOW_DOWN")
+        assert len(log) == 21
+
+
+def test_max_segments_drops_the_oldest(tmp_path):
+    events = generated_events()
+    config = EventLogConfig(segment_bytes=2048, index_interval_bytes=300, max_segments=3)
+    with EventLog(str(tmp_path), config) as log:
+        fill(log, events)
+        kept = log.events_since()
+        assert kept == events[-len(kept):] and len(kept) < len(events)
+        assert len(log) == len(kept)
+    assert len(list(tmp_path.glob("*.log"))) == 3
+
+
+def test_empty_log(tmp_path):
+    with EventLog(str(tmp_path)) as log:
+        assert len(log) == 0
+        assert log.events_since() == [] and log.events_since(START) == []
+        assert body(log) == {"status": "OK", "events": []}
+    with EventLog(str(tmp_path)) as log:
+        assert log.events_since() == []
+        assert log.append("w", START, "EVENT_SLOW_DOWN") == 1
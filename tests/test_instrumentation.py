@@ -0,0 +1,121 @@
+# alma/tests/test_instrumentation.py
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+import json
+
+import pytest
+
+from alma.cadence_layer import windows_to_cadence_points
+from alma.dejavu_layer import DejaVuConfig, build_feature_history, find_dejavu_for_window, run_dejavu_pipeline
+from alma.instrumentation import INSTRUMENTATION, LATENCY_BUCKETS_MS, Instrumentation, LatencyHistogram
+from alma.interpretation_layer import interpret_state
+from alma.system_server import SystemServer
+
+import baseline
+from signals import scaled_windows, wearer_windows
+
+
+@pytest.fixture
+def instr():
+    INSTRUMENTATION.reset()
+    INSTRUMENTATION.enable()
+    yield INSTRUMENTATION
+    INSTRUMENTATION.disable()
+    INSTRUMENTATION.reset()
+
+
+def rows(results):
+    return [(r.timestamp, list(r.labels), r.details, r.confidence, r.dejavu) for r in results]
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_enabled_layers_still_match_baseline(instr, shuffle):
+    windows = scaled_windows(200, seed=31, shuffle=shuffle)
+    summaries = run_dejavu_pipeline(windows)
+    assert summaries == baseline.run_dejavu_pipeline(windows)
+    points = windows_to_cadence_points(windows)
+    assert rows(interpret_state(points, windows, summaries)) == \
+        rows(baseline.interpret_state(points, windows, summaries))
+
+    snap = instr.snapshot()
+    assert snap["dejavu.pipeline"]["calls"] == 1
+    assert snap["dejavu.pipeline"]["items"] == len(windows)
+    assert snap["interpretation.interpret_state"]["items"] == len(points)
+    assert snap["dejavu.search"]["counters"]["matches"] == sum(len(s.matches) for s in summaries)
+    json.dumps(snap)
+
+
+def test_search_counts_scanned_history(instr):
+    config = DejaVuConfig(min_history_minutes=24 * 60)
+    windows = wearer_windows(minutes=300)
+    history = build_feature_history(windows, config)
+    for w in windows[::10]:
+        find_dejavu_for_window(w, history, config)
+    stats = instr.stage("dejavu.search")
+    assert stats.calls == stats.items == len(windows[::10])
+    assert stats.counters["history_scanned"] == stats.calls * len(history)
+    assert stats.latency.count == stats.calls
+
+
+def test_tz_aware_and_empty_input(instr):
+    windows = scaled_windows(60, seed=32)
+    for w in windows:
+        w.window_start = w.window_start.replace(tzinfo=timezone.utc)
+        w.window_end = w.window_end.replace(tzinfo=timezone.utc)
+    assert run_dejavu_pipeline(windows) == baseline.run_dejavu_pipeline(windows)
+    assert run_dejavu_pipeline([]) == []
+    assert interpret_state([], [], []) == []
+    assert instr.stage("dejavu.pipeline").items == len(windows)
+    assert instr.stage("dejavu.pipeline").calls == 2
+    assert instr.stage("interpretation.interpret_state").items == 0
+
+
+def test_disabled_records_nothing():
+    INSTRUMENTATION.reset()
+    windows = scaled_windows(50, seed=33)
+    run_dejavu_pipeline(windows)
+    assert not INSTRUMENTATION.enabled
+    assert INSTRUMENTATION.snapshot() == {}
+    assert INSTRUMENTATION.latency_ms() == 0.0
+
+
+def test_histogram_buckets_and_percentiles():
+    h = LatencyHistogram()
+    assert h.percentile(0.99) == 0.0 and h.snapshot()["mean_ms"] == 0.0
+    for ms in [0.01] * 50 + [0.3] * 45 + [7.0] * 4 + [5000.0]:
+        h.record(ms)
+    # bucket bounds are inclusive upper bounds
+    assert h.counts[LATENCY_BUCKETS_MS.index(0.01)] == 50
+    assert h.counts[LATENCY_BUCKETS_MS.index(0.5)] == 45
+    assert h.counts[LATENCY_BUCKETS_MS.index(10.0)] == 4
+    assert h.counts[-1] == 1
+    assert (h.percentile(0.5), h.percentile(0.95), h.percentile(0.99), h.percentile(1.0)) == \
+        (0.01, 0.5, 10.0, 5000.0)
+    snap = h.snapshot()
+    assert snap["count"] == 100 and snap["max_ms"] == 5000.0
+    assert sum(snap["buckets"].values()) == 100 and snap["buckets"]["+inf"] == 1
+
+
+def test_concurrent_records_are_not_lost():
+    instr = Instrumentation()
+    instr.enable()
+
+    def work(_):
+        for _ in range(500):
+            instr.record("s", instr.start(), items=2, n=1)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(work, range(8)))
+    stats = instr.stage("s")
+    assert (stats.calls, stats.items, stats.counters["n"], stats.latency.count) == (4000, 8000, 4000, 4000)
+
+
+def test_health_reports_pipeline_latency(instr):
+    server = SystemServer()
+    assert json.loads(server._health()[1])["latency"] == 0.0
+    instr.record("dejavu.search", (instr.start()[0] - 3_000_000, 0))
+    health = json.loads(server._health()[1])
+    # capped at the slowest recording inside the 5 ms bucket
+    assert 3.0 <= health["latency"] == instr.latency_ms() == instr.latency_ms("dejavu.search") < 5.0
+    assert instr.latency_ms("missing") == 0.0
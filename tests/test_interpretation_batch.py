@@ -0,0 +1,83 @@
+# alma/tests/test_interpretation_batch.py
+
+from datetime import timezone
+import random
+
+import numpy as np
+import pytest
+
+from alma.cadence_layer import windows_to_cadence_points
+from alma.dejavu_layer import run_dejavu_pipeline
+from alma.interpretation_batch import interpret_columns, interpret_state_batch, interpret_state_table
+from alma.interpretation_layer import InterpretationConfig
+
+import baseline
+from signals import edge_points, scaled_windows, wearer_windows
+
+
+def rows(results):
+    return [(r.timestamp, list(r.labels), r.details, r.confidence, r.dejavu) for r in results]
+
+
+CONFIGS = [
+    InterpretationConfig(),
+    InterpretationConfig(trend_window_points=1),
+    InterpretationConfig(trend_window_points=5, min_confidence=0.0, movement_threshold=199),
+    InterpretationConfig(trend_window_points=10_000),
+]
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_edge_points_match_baseline(config):
+    points = edge_points()
+    assert rows(interpret_state_batch(points, [], [], config)) == \
+        rows(baseline.interpret_state(points, [], [], config))
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_generated_signals_match_baseline(shuffle):
+    windows = wearer_windows(minutes=720)
+    points = windows_to_cadence_points(windows)
+    summaries = run_dejavu_pipeline(windows)
+    if shuffle:
+        random.Random(3).shuffle(points)
+        random.Random(4).shuffle(summaries)
+    assert rows(interpret_state_batch(points, windows, summaries)) == \
+        rows(baseline.interpret_state(points, windows, summaries))
+
+
+def test_duplicate_summaries_last_one_wins():
+    windows = scaled_windows(150, seed=42)
+    summaries = run_dejavu_pipeline(windows)
+    summaries = summaries + summaries[::-3]
+    points = windows_to_cadence_points(windows)
+    assert rows(interpret_state_batch(points, windows, summaries)) == \
+        rows(baseline.interpret_state(points, windows, summaries))
+
+
+def test_tz_aware_points():
+    windows = scaled_windows(100, seed=43)
+    for w in windows:
+        w.window_start = w.window_start.replace(tzinfo=timezone.utc)
+        w.window_end = w.window_end.replace(tzinfo=timezone.utc)
+    points = windows_to_cadence_points(windows)
+    summaries = run_dejavu_pipeline(windows)
+    assert rows(interpret_state_batch(points, windows, summaries)) == \
+        rows(baseline.interpret_state(points, windows, summaries))
+
+
+def test_table_columns():
+    points = edge_points(50)
+    table = interpret_state_table(points, [], [])
+    assert len(table) == 50 and table.flags.dtype == np.uint16
+    expected = baseline.interpret_state(points, [], [])
+    assert [table.labels(i) for i in range(50)] == [r.labels for r in expected]
+    assert table.confidence.tolist() == [p.confidence for p in points]
+
+
+def test_empty_input():
+    assert interpret_state_batch([], [], []) == []
+    table = interpret_state_table([], [], [])
+    assert len(table) == 0 and table.flags.shape == (0,)
+    empty = np.zeros(0)
+    assert interpret_columns(empty, empty, empty, empty).shape == (0,)
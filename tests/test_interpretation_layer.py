@@ -0,0 +1,227 @@
+# alma/tests/test_interpretation_layer.py
+
+from dataclasses import asdict, replace
+from datetime import datetime, timedelta, timezone
+import pickle
+import random
+
+import pytest
+
+from alma.cadence_layer import windows_to_cadence_points
+from alma.dejavu_layer import run_dejavu_pipeline
+from alma.interpretation_layer import (
+    AsOfJoin,
+    InterpretationConfig,
+    InterpretationLabel,
+    InterpretationResult,
+    StreamingInterpreter,
+    align_summaries,
+    flags_of,
+    interpret_state,
+    labels_of,
+)
+
+import baseline
+from signals import START, edge_points, scaled_windows, wearer_windows
+
+
+def rows(results):
+    return [(r.timestamp, list(r.labels), r.details, r.confidence, r.dejavu) for r in results]
+
+
+def test_result_stores_flags_and_renders_shared_labels():
+    ts = datetime(2025, 1, 1)
+    flags = int(InterpretationLabel.ELEVATED_HEART_RATE | InterpretationLabel.TENSION_TREND)
+    a = InterpretationResult(ts, flags, 0.9)
+    b = InterpretationResult(ts, flags, 0.8, "similar to 1h 0m ago (0.91)")
+    assert a.labels == ("elevated_heart_rate", "tension_trend")
+    assert a.details == "elevated_heart_rate, tension_trend"
+    assert a.labels is b.labels and a.details is b.details
+    assert not hasattr(a, "__dict__")
+    assert InterpretationResult(ts, 0, 1.0).details == "neutral"
+
+
+def test_result_dataclass_protocols():
+    r = InterpretationResult(datetime(2025, 1, 1), int(InterpretationLabel.ACTIVE), 0.7, "x")
+    assert asdict(r) == {"timestamp": r.timestamp, "flags": r.flags, "confidence": 0.7, "dejavu": "x"}
+    calm = replace(r, flags=int(InterpretationLabel.CALM_INDICATOR))
+    assert calm.labels == ("calm_indicator",) and calm.dejavu == "x"
+    assert pickle.loads(pickle.dumps(r)) == r
+
+
+def test_from_labels_round_trip():
+    ts = datetime(2025, 1, 1)
+    labels = ["low_heart_rate", "calm_indicator", "steady_state"]
+    r = InterpretationResult.from_labels(ts, labels, 0.6)
+    assert list(r.labels) == labels
+    assert labels_of(flags_of(labels)) == tuple(labels)
+    # unknown labels carry no bit
+    assert InterpretationResult.from_labels(ts, ["custom"], 0.6).flags == 0
+
+
+def test_interpret_state_matches_baseline_rendering():
+    windows = wearer_windows(minutes=720)
+    points = windows_to_cadence_points(windows)
+    summaries = run_dejavu_pipeline(windows)
+    assert rows(interpret_state(points, windows, summaries)) == \
+        rows(baseline.interpret_state(points, windows, summaries))
+
+
+# -- streaming interpreter --------------------------------------------------
+
+def stream(points, summaries, config=None):
+    """
+    Push every point with the summary the baseline looks up for it.
+    """
+    by_end = {s.window_end: s for s in summaries}
+    interpreter = StreamingInterpreter(config)
+    return [interpreter.push(p, by_end.get(p.timestamp)) for p in points]
+
+
+@pytest.mark.parametrize("config", [
+    InterpretationConfig(),
+    InterpretationConfig(trend_window_points=1),
+    InterpretationConfig(trend_window_points=6, min_confidence=0.0),
+])
+def test_streaming_matches_baseline_at_the_thresholds(config):
+    points = edge_points()
+    assert rows(stream(points, [], config)) == rows(baseline.interpret_state(points, [], [], config))
+
+
+def test_streaming_matches_baseline_on_generated_signals():
+    windows = wearer_windows(minutes=720)
+    points = windows_to_cadence_points(windows)
+    summaries = run_dejavu_pipeline(windows)
+    assert rows(stream(points, summaries)) == rows(baseline.interpret_state(points, windows, summaries))
+
+
+def test_streaming_follows_arrival_order():
+    # like interpret_state, trends are taken over the points as given
+    windows = scaled_windows(200, seed=44, shuffle=True)
+    points = windows_to_cadence_points(windows)
+    random.Random(5).shuffle(points)
+    summaries = run_dejavu_pipeline(windows)
+    assert rows(stream(points, summaries)) == rows(baseline.interpret_state(points, windows, summaries))
+
+
+def test_streaming_tz_aware_points():
+    windows = scaled_windows(100, seed=45)
+    for w in windows:
+        w.window_start = w.window_start.replace(tzinfo=timezone.utc)
+        w.window_end = w.window_end.replace(tzinfo=timezone.utc)
+    points = windows_to_cadence_points(windows)
+    summaries = run_dejavu_pipeline(windows)
+    assert rows(stream(points, summaries)) == rows(baseline.interpret_state(points, windows, summaries))
+
+
+def test_streaming_keeps_only_the_trend_window():
+    interpreter = StreamingInterpreter(InterpretationConfig(trend_window_points=4))
+    for p in edge_points(100):
+        interpreter.push(p)
+    assert len(interpreter._recent) == 4
+    assert stream([], []) == [] and interpret_state([], [], []) == []
+
+
+# -- as-of join -------------------------------------------------------------
+
+def naive_align(points, summaries, tolerance_seconds):
+    """
+    Scan every summary per point: the last one (by window_end, then list
+    order) ending at most tolerance after the point, if it ends at most
+    tolerance before it.
+    """
+    tol = timedelta(seconds=tolerance_seconds)
+    out = []
+    for p in points:
+        best = None
+        for s in sorted(summaries, key=lambda s: s.window_end):
+            if s.window_end <= p.timestamp + tol:
+                best = s
+        out.append(best if best is not None and p.timestamp - best.window_end <= tol else None)
+    return out
+
+
+def jittered(points, seed, seconds):
+    rnd = random.Random(seed)
+    return [replace(p, timestamp=p.timestamp + timedelta(seconds=rnd.uniform(-seconds, seconds)))
+            for p in points]
+
+
+@pytest.mark.parametrize("order", ["sorted", "shuffled points", "shuffled summaries"])
+def test_exact_join_matches_dict_lookup(order):
+    windows = scaled_windows(300, seed=46)
+    points = windows_to_cadence_points(windows)
+    summaries = run_dejavu_pipeline(windows)
+    # duplicated window ends: the later summary wins, as in a dict
+    summaries = summaries + [replace(s, matches=[], strongest_match=None) for s in summaries[::4]]
+    if order == "shuffled points":
+        random.Random(6).shuffle(points)
+    elif order == "shuffled summaries":
+        random.Random(7).shuffle(summaries)
+    by_end = {s.window_end: s for s in summaries}
+    got = list(align_summaries(points, summaries))
+    assert [id(s) if s else None for s in got] == [id(by_end[p.timestamp]) if p.timestamp in by_end else None
+                                                  for p in points]
+
+
+@pytest.mark.parametrize("tolerance", [0.0, 5.0, 30.0, 200.0])
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_tolerant_join_matches_naive_scan(tolerance, shuffle):
+    windows = scaled_windows(120, seed=47, jitter=True)
+    points = jittered(windows_to_cadence_points(windows), 8, 40)
+    summaries = run_dejavu_pipeline(windows)
+    if shuffle:
+        random.Random(9).shuffle(points)
+    got = list(align_summaries(points, summaries, tolerance))
+    assert [id(s) if s else None for s in got] == \
+        [id(s) if s else None for s in naive_align(points, summaries, tolerance)]
+
+
+def test_jittered_points_get_their_summaries_back():
+    windows = wearer_windows(minutes=720)
+    points = windows_to_cadence_points(windows)
+    summaries = run_dejavu_pipeline(windows)
+    expected = baseline.interpret_state(points, windows, summaries)
+    skewed = jittered(points, 10, 20)
+    got = interpret_state(skewed, windows, summaries, InterpretationConfig(join_tolerance_seconds=30))
+    assert [r.dejavu for r in got] == [r.dejavu for r in expected]
+    # without tolerance, the skewed points find nothing
+    assert all(r.dejavu is None for r in interpret_state(skewed, windows, summaries))
+
+
+def test_join_with_tz_aware_timestamps():
+    windows = scaled_windows(100, seed=48)
+    for w in windows:
+        w.window_start = w.window_start.replace(tzinfo=timezone.utc)
+        w.window_end = w.window_end.replace(tzinfo=timezone.utc)
+    points = windows_to_cadence_points(windows)
+    summaries = run_dejavu_pipeline(windows)
+    by_end = {s.window_end: s for s in summaries}
+    assert list(align_summaries(points, summaries)) == [by_end.get(p.timestamp) for p in points]
+
+
+def test_as_of_join_is_lazy_and_rejects_descending_queries():
+    pulled = []
+
+    def items():
+        for i in range(1000):
+            pulled.append(i)
+            yield i
+
+    # one item every two minutes, matched up to 30 seconds either side
+    join = AsOfJoin(items(), key=lambda i: START + timedelta(minutes=2 * i), tolerance=timedelta(seconds=30))
+    assert join.match(START + timedelta(minutes=3, seconds=20)) is None
+    assert join.match(START + timedelta(minutes=3, seconds=40)) == 2
+    assert join.match(START + timedelta(minutes=4, seconds=25)) == 2
+    assert join.match(START + timedelta(minutes=5)) is None
+    assert len(pulled) <= 8
+    with pytest.raises(ValueError):
+        join.match(START)
+
+
+def test_empty_join():
+    windows = scaled_windows(10)
+    points = windows_to_cadence_points(windows)
+    assert list(align_summaries(points, [])) == [None] * 10
+    assert list(align_summaries([], run_dejavu_pipeline(windows))) == []
+    assert AsOfJoin([], key=lambda x: x).match(datetime(2025, 1, 1)) is None
@@ -0,0 +1,85 @@
+# alma/tests/test_pipeline.py
+
+from datetime import timedelta, timezone
+from itertools import islice
+
+import pytest
+
+from alma.cadence_layer import RawSample, build_cadence_windows, windows_to_cadence_points
+from alma.dejavu_layer import DejaVuConfig
+from alma.pipeline import AlmaPipelineConfig, run_alma_core_pipeline
+from alma.signal_generator import iter_signal_chunks
+
+import baseline
+from signals import wearer_samples
+
+
+def rows(results):
+    return [(r.timestamp, list(r.labels), r.details, r.confidence, r.dejavu) for r in results]
+
+
+def batch_run(samples, config):
+    """
+    The list-based chain: all windows, then all summaries, then interpret.
+    """
+    windows = build_cadence_windows(samples, config.cadence_config())
+    summaries = baseline.run_dejavu_pipeline(windows, config.dejavu_config())
+    points = windows_to_cadence_points(windows)
+    return baseline.interpret_state(points, windows, summaries, config.interpretation_config())
+
+
+CONFIGS = [
+    AlmaPipelineConfig(),
+    AlmaPipelineConfig(cadence_seconds=60, cadence_step_seconds=30, min_signal_quality=0.85),
+    AlmaPipelineConfig(dejavu=DejaVuConfig(similarity_threshold=0.5, min_history_minutes=240)),
+]
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_matches_batch_run(config):
+    samples = wearer_samples(minutes=600)
+    assert rows(run_alma_core_pipeline(samples, config)) == rows(batch_run(samples, config))
+
+
+def test_default_config():
+    samples = wearer_samples(minutes=120, seed=2)
+    assert rows(run_alma_core_pipeline(samples)) == rows(batch_run(samples, AlmaPipelineConfig()))
+
+
+def test_tz_aware_samples():
+    tz = timezone(timedelta(hours=-3))
+    samples = [RawSample(s.timestamp.replace(tzinfo=tz), s.hr_bpm, s.rr_ms, s.accel_mg, s.signal_quality)
+               for s in wearer_samples(minutes=180, seed=3)]
+    results = list(run_alma_core_pipeline(samples))
+    assert rows(results) == rows(batch_run(samples, AlmaPipelineConfig()))
+    assert all(r.timestamp.tzinfo is tz for r in results)
+
+
+def test_streams_lazily():
+    pulled = 0
+
+    def endless():
+        nonlocal pulled
+        for chunk in iter_signal_chunks(1, minutes=60 * 24 * 365, chunk_minutes=60):
+            for s in chunk.raw_samples():
+                pulled += 1
+                yield s
+
+    results = list(islice(run_alma_core_pipeline(endless()), 30))
+    # 30 two-minute windows at one sample every five seconds
+    assert len(results) == 30
+    assert pulled <= 31 * 24 + 1
+
+
+def test_out_of_order_samples_raise_when_reached():
+    samples = wearer_samples(minutes=30, seed=4)
+    samples[200], samples[100] = samples[100], samples[200]
+    results = run_alma_core_pipeline(samples)
+    assert len(list(islice(results, 3))) == 3
+    with pytest.raises(ValueError):
+        list(results)
+
+
+def test_empty_input():
+    assert list(run_alma_core_pipeline([])) == []
+    assert list(run_alma_core_pipeline(iter(()))) == []
@@ -0,0 +1,92 @@
+# alma/tests/test_rate_limiter.py
+
+import random
+
+import pytest
+
+from alma.rate_limiter import DEFAULT_LIMITS, RateLimit, RateLimiter
+
+
+class Clock:
+    def __init__(self, now: float = 100.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class NaiveBuckets:
+    """
+    Textbook token buckets: (tokens, last refill) per client and endpoint.
+    """
+
+    def __init__(self, limits, clock) -> None:
+        self.limits = limits
+        self.clock = clock
+        self.state = {}
+
+    def allow(self, client_id, endpoint):
+        lim = self.limits.get(endpoint)
+        if lim is None:
+            return True
+        now = self.clock()
+        tokens, last = self.state.get((client_id, endpoint), (lim.burst, now))
+        tokens = min(lim.burst, tokens + (now - last) * lim.rate)
+        ok = tokens >= 1
+        self.state[(client_id, endpoint)] = (tokens - 1 if ok else tokens, now)
+        return ok
+
+
+def test_decisions_match_naive_token_buckets():
+    clock = Clock()
+    limiter = RateLimiter(clock=clock, capacity=4)
+    naive = NaiveBuckets(DEFAULT_LIMITS, clock)
+    rnd = random.Random(1)
+    endpoints = list(DEFAULT_LIMITS) + ["/health"]
+    for _ in range(50_000):
+        clock.now += rnd.choice([0, 0, 0.01, 0.1, 1, 5, 90]) * rnd.random()
+        client, endpoint = f"c{rnd.randrange(50)}", rnd.choice(endpoints)
+        assert limiter.allow(client, endpoint) == naive.allow(client, endpoint)
+
+
+def test_burst_refill_and_retry_after():
+    clock = Clock()
+    limiter = RateLimiter({"/events": RateLimit(rate=5.0, burst=5.0)}, clock=clock)
+    assert all(limiter.allow("a", "/events") for _ in range(5))
+    assert not limiter.allow("a", "/events")
+    assert limiter.retry_after("a", "/events") == pytest.approx(0.2)
+    assert limiter.allow("b", "/events")        # buckets are per client
+    clock.now += 0.2
+    assert limiter.allow("a", "/events")
+    assert limiter.allow("a", "/unlimited")
+
+
+def test_capacity_is_capped_and_new_clients_refused_when_full():
+    clock = Clock()
+    limiter = RateLimiter(clock=clock, capacity=2, max_clients=16)
+    for i in range(1000):
+        limiter.allow(f"spoofed-{i}", "/state")
+    assert limiter.capacity == 16 and len(limiter) == 16
+    # every slot holds a client that is still throttled: newcomers wait
+    assert not limiter.allow("newcomer", "/state")
+    # once they are idle, probing frees slots again
+    clock.now += 2
+    assert limiter.allow("newcomer", "/state")
+    assert limiter.capacity == 16
+
+
+def test_idle_clients_are_evicted():
+    clock = Clock()
+    limiter = RateLimiter(clock=clock, capacity=8)
+    for i in range(8):
+        limiter.allow(f"c{i}", "/state")
+    clock.now += 2
+    assert limiter.evict_idle() == 8
+    assert len(limiter) == 0
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        RateLimiter({"/x": RateLimit(rate=0.0, burst=1.0)})
+    with pytest.raises(ValueError):
+        RateLimiter(max_clients=0)
@@ -0,0 +1,216 @@
+# alma/tests/test_request_auth.py
+
+from datetime import timedelta
+import hashlib
+import hmac
+import random
+
+import pytest
+
+from alma.codec import EPOCH
+from alma.event_log import parse_since
+from alma.request_auth import (
+    ERROR_MISSING_HEADERS,
+    ERROR_REPLAY,
+    ERROR_REPLAY_CACHE_FULL,
+    ERROR_SIGNATURE_INVALID,
+    ERROR_TIMESTAMP_DRIFT,
+    ERROR_UNKNOWN_CLIENT,
+    HEADER_CLIENT_ID,
+    HEADER_SIGNATURE,
+    HEADER_TIMESTAMP,
+    ReplayCache,
+    RequestVerifier,
+    VerifierConfig,
+)
+
+from signals import START
+
+
+SECRETS = {f"client-{i}": f"secret-{i}".encode() for i in range(5)}
+T0 = (START - EPOCH).total_seconds()
+
+
+class Clock:
+    def __init__(self, now=T0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def stamp(seconds, suffix="Z"):
+    return f"{START + timedelta(seconds=seconds):%Y-%m-%dT%H:%M:%S.%f}{suffix}"
+
+
+def naive_sign(client_id, timestamp, payload=b""):
+    message = timestamp.encode() + b"\n" + client_id.encode() + b"\n" + payload
+    return hmac.new(SECRETS[client_id], message, hashlib.sha256).hexdigest()
+
+
+class NaiveVerifier:
+    """
+    §8.8 spelled out: HMAC over the message, drift check, and every
+    accepted signature remembered for good.
+    """
+
+    def __init__(self, max_drift):
+        self.max_drift = max_drift
+        self.seen = set()
+
+    def verify(self, now, client_id, timestamp, signature, payload=b""):
+        if not client_id or not timestamp or not signature:
+            return ERROR_MISSING_HEADERS
+        if client_id not in SECRETS:
+            return ERROR_UNKNOWN_CLIENT
+        try:
+            sent = (parse_since(timestamp) - EPOCH).total_seconds()
+        except (ValueError, OverflowError):
+            return ERROR_TIMESTAMP_DRIFT
+        if abs(now - sent) > self.max_drift:
+            return ERROR_TIMESTAMP_DRIFT
+        if signature != naive_sign(client_id, timestamp, payload):
+            return ERROR_SIGNATURE_INVALID
+        if signature in self.seen:
+            return ERROR_REPLAY
+        self.seen.add(signature)
+        return None
+
+
+def request_stream(n=3000, seed=61):
+    """
+    (now, client, timestamp, signature, payload): fresh, replayed, forged,
+    late, early, unknown-client and incomplete requests.
+    """
+    rnd = random.Random(seed)
+    now = 0.0
+    sent = []
+    for _ in range(n):
+        now += rnd.uniform(0, 2)
+        kind = rnd.random()
+        if kind < 0.25 and sent:
+            client, ts, sig, payload = rnd.choice(sent[-200:])
+            yield now, client, ts, sig, payload
+            continue
+        client = rnd.choice(list(SECRETS))
+        ts = stamp(now + rnd.uniform(-40, 40), rnd.choice(["Z", "+00:00"]))
+        payload = rnd.choice([b"", b"{}", bytes(rnd.randrange(256) for _ in range(8))])
+        sig = naive_sign(client, ts, payload)
+        if kind < 0.30:
+            sig = sig[:-1] + ("0" if sig[-1] != "0" else "1")
+        elif kind < 0.33:
+            client = "stranger"
+        elif kind < 0.35:
+            sig = None
+        else:
+            sent.append((client, ts, sig, payload))
+        yield now, client, ts, sig, payload
+
+
+@pytest.mark.parametrize("config", [
+    VerifierConfig(),
+    VerifierConfig(bucket_seconds=1, key_cache_size=2),
+    VerifierConfig(bloom_bits_per_bucket=1 << 16),
+])
+def test_matches_naive_verifier(config):
+    clock = Clock()
+    verifier = RequestVerifier(SECRETS, config, clock)
+    naive = NaiveVerifier(config.max_drift_seconds)
+    codes = []
+    for now, client, ts, sig, payload in request_stream():
+        clock.now = T0 + now
+        code = verifier.verify(client, ts, sig, payload)
+        assert code == naive.verify(T0 + now, client, ts, sig, payload)
+        codes.append(code)
+    assert set(codes) == {None, ERROR_REPLAY, ERROR_SIGNATURE_INVALID, ERROR_TIMESTAMP_DRIFT,
+                          ERROR_UNKNOWN_CLIENT, ERROR_MISSING_HEADERS}
+    assert sum(verifier.replays.values()) == codes.count(ERROR_REPLAY)
+    limit = 2 * config.max_drift_seconds / config.bucket_seconds + 2
+    assert verifier.replay_cache.bucket_count <= limit
+
+
+@pytest.mark.parametrize("timestamp", [
+    "0001-01-01T00:00:00+01:00",
+    "9999-12-31T23:59:59Z",
+    "garbage",
+    "2025-13-01T00:00:00Z",
+])
+def test_bad_and_overflowing_timestamps_are_drift(timestamp):
+    verifier = RequestVerifier(SECRETS, clock=Clock())
+    assert verifier.verify("client-0", timestamp, "00" * 32) == ERROR_TIMESTAMP_DRIFT
+
+
+def test_tz_offsets_are_honoured():
+    verifier = RequestVerifier(SECRETS, clock=Clock())
+    ts = f"{START + timedelta(hours=2, seconds=10):%Y-%m-%dT%H:%M:%S}+02:00"
+    sig = verifier.sign("client-1", ts)
+    assert sig == naive_sign("client-1", ts)
+    assert verifier.verify("client-1", ts, sig) is None
+    assert verifier.verify("client-1", ts, sig) == ERROR_REPLAY
+    late = f"{START + timedelta(seconds=10):%Y-%m-%dT%H:%M:%S}+02:00"
+    assert verifier.verify("client-1", late, verifier.sign("client-1", late)) == ERROR_TIMESTAMP_DRIFT
+
+
+@pytest.mark.parametrize("headers", [
+    {},
+    {HEADER_CLIENT_ID: "client-0", HEADER_TIMESTAMP: stamp(0)},
+    {HEADER_CLIENT_ID: "client-0", HEADER_SIGNATURE: "ab"},
+    {HEADER_TIMESTAMP: stamp(0), HEADER_SIGNATURE: "ab"},
+    {HEADER_CLIENT_ID: "", HEADER_TIMESTAMP: stamp(0), HEADER_SIGNATURE: "ab"},
+])
+def test_missing_headers(headers):
+    assert RequestVerifier(SECRETS, clock=Clock()).verify_headers(headers) == ERROR_MISSING_HEADERS
+
+
+def test_signature_format_and_key_rotation():
+    secrets = dict(SECRETS)
+    verifier = RequestVerifier(lambda c: secrets.get(c), clock=Clock())
+    ts = stamp(1)
+    assert verifier.verify("client-2", ts, "not hex") == ERROR_SIGNATURE_INVALID
+    assert verifier.verify("client-2", ts, naive_sign("client-2", ts)[:-2]) == ERROR_SIGNATURE_INVALID
+    secrets["client-2"] = b"rotated"
+    # the prepared key is cached until forgotten
+    assert verifier.verify("client-2", ts, naive_sign("client-2", ts)) is None
+    verifier.forget("client-2")
+    assert verifier.verify("client-2", stamp(2), naive_sign("client-2", stamp(2))) == ERROR_SIGNATURE_INVALID
+    headers = {HEADER_CLIENT_ID: "client-3", HEADER_TIMESTAMP: ts, HEADER_SIGNATURE: naive_sign("client-3", ts, b"x")}
+    assert verifier.verify_headers(headers, b"x") is None
+    assert verifier.verify_headers(headers, b"y") == ERROR_SIGNATURE_INVALID
+
+
+def test_per_client_cap_fails_closed_for_that_client_only():
+    config = VerifierConfig(max_entries_per_client=3, max_entries_per_bucket=7)
+    verifier = RequestVerifier(SECRETS, config, Clock())
+
+    def send(client, i):
+        ts = stamp(0.01 * i)
+        return verifier.verify(client, ts, naive_sign(client, ts))
+
+    assert [send("client-0", i) for i in range(5)] == [None] * 3 + [ERROR_REPLAY_CACHE_FULL] * 2
+    assert [send("client-1", i) for i in range(3)] == [None] * 3
+    # client-2 takes the last slot; then the bucket is full for everyone
+    assert send("client-2", 0) is None
+    assert send("client-3", 0) == ERROR_REPLAY_CACHE_FULL
+    assert len(verifier.replay_cache) == 7
+
+
+def test_bloom_filter_keeps_protecting_past_the_caps():
+    config = VerifierConfig(max_entries_per_client=3, max_entries_per_bucket=7, bloom_bits_per_bucket=1 << 20)
+    verifier = RequestVerifier(SECRETS, config, Clock())
+    requests = [(c, stamp(0.01 * i)) for c in ("client-0", "client-1", "client-2") for i in range(10)]
+    assert [verifier.verify(c, ts, naive_sign(c, ts)) for c, ts in requests] == [None] * 30
+    assert [verifier.verify(c, ts, naive_sign(c, ts)) for c, ts in requests] == [ERROR_REPLAY] * 30
+    assert len(verifier.replay_cache) == 7
+    with pytest.raises(ValueError):
+        ReplayCache(VerifierConfig(bloom_bits_per_bucket=64, bloom_hashes=5))
+
+
+def test_cache_expires_whole_buckets():
+    clock = Clock()
+    verifier = RequestVerifier(SECRETS, VerifierConfig(max_drift_seconds=30, bucket_seconds=5), clock)
+    for i in range(600):
+        clock.now = T0 + i
+        ts = stamp(i)
+        assert verifier.verify("client-4", ts, naive_sign("client-4", ts)) is None
+    assert verifier.replay_cache.bucket_count <= 2 * 30 / 5 + 2
+    assert len(verifier.replay_cache) <= 31 + 5
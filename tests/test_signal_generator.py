@@ -0,0 +1,109 @@
+# alma/tests/test_signal_generator.py
+
+from datetime import timedelta, timezone
+import warnings
+
+import numpy as np
+
+from alma.signal_generator import (
+    BASE_HR_BPM,
+    DROPOUT_RATE,
+    PHASE_NAMES,
+    _PHASE_PARAMS,
+    generate_signals,
+    iter_signal_chunks,
+)
+
+from signals import START
+
+
+def demo_phase(minute):
+    """
+    Phase selection of simulate_stream in the cadence profile demo.
+    """
+    if minute < 10:
+        return "CALM"
+    if minute < 30:
+        return "FOCUSED"
+    if minute < 50:
+        return "STRAIN"
+    return "RISK"
+
+
+def test_phases_follow_the_demo():
+    s = generate_signals(minutes=180, step_seconds=7)
+    minutes = s.offsets_us // 60_000_000
+    assert [PHASE_NAMES[p] for p in s.phase] == [demo_phase(m % 60) for m in minutes.tolist()]
+    stretched = generate_signals(minutes=240, step_seconds=30, phase_period_minutes=120)
+    minutes = stretched.offsets_us // 60_000_000
+    assert [PHASE_NAMES[p] for p in stretched.phase] == [demo_phase((m % 120) // 2) for m in minutes.tolist()]
+
+
+def test_distributions_follow_the_demo():
+    s = generate_signals(n_wearers=20, minutes=600, step_seconds=5, seed=1)
+    for phase, (hr_offset, hr_sd, accel_mean, accel_sd) in enumerate(_PHASE_PARAMS):
+        hr = s.hr_bpm[:, s.phase == phase]
+        tol = 5 * hr_sd / np.sqrt(hr.size)
+        assert abs(hr.mean() - (BASE_HR_BPM + hr_offset)) < tol
+        assert abs(hr.std() - hr_sd) < 0.05 * hr_sd
+        rr = s.rr_ms[:, s.phase == phase]
+        assert abs((rr - 60000.0 / np.maximum(hr, 40)).std() - 30) < 1.5
+        assert (s.accel_mg[:, s.phase == phase] >= 0).all()
+    bad = s.signal_quality < 0.7
+    assert abs(bad.mean() - DROPOUT_RATE) < 0.005
+    assert ((0.3 <= s.signal_quality[bad]) & (s.signal_quality[bad] < 0.6)).all()
+    assert ((0.8 <= s.signal_quality[~bad]) & (s.signal_quality[~bad] < 1.0)).all()
+
+
+def test_same_seed_same_arrays():
+    a = generate_signals(n_wearers=3, minutes=30, seed=5)
+    b = generate_signals(n_wearers=3, minutes=30, seed=5)
+    c = generate_signals(n_wearers=3, minutes=30, seed=6)
+    for name in ("offsets_us", "phase", "hr_bpm", "rr_ms", "accel_mg", "signal_quality"):
+        assert np.array_equal(getattr(a, name), getattr(b, name))
+    assert not np.array_equal(a.hr_bpm, c.hr_bpm)
+    assert a.hr_bpm.shape == (3, 360) and a.n_wearers == 3 and a.n_samples == 360
+
+
+def test_raw_samples_match_the_columns():
+    s = generate_signals(n_wearers=2, minutes=20, step_seconds=2.5, start=START)
+    samples = s.raw_samples(1)
+    assert [x.timestamp for x in samples] == \
+        [START + timedelta(seconds=2.5 * i) for i in range(s.n_samples)]
+    assert [x.hr_bpm for x in samples] == s.hr_bpm[1].tolist()
+    assert [x.signal_quality for x in samples] == s.signal_quality[1].tolist()
+    assert s.timestamps().tolist() == [x.timestamp for x in samples]
+    batches = list(s.iter_raw_batches(1, batch_size=100))
+    assert [len(b) for b in batches] == [100] * 4 + [80]
+    assert [x for b in batches for x in b] == samples
+
+
+def test_chunks_cover_the_same_axis():
+    whole = generate_signals(n_wearers=2, minutes=100, step_seconds=7)
+    chunks = list(iter_signal_chunks(2, minutes=100, chunk_minutes=30, step_seconds=7))
+    assert len(chunks) == 4
+    assert np.array_equal(np.concatenate([c.offsets_us for c in chunks]), whole.offsets_us)
+    assert np.array_equal(np.concatenate([c.phase for c in chunks]), whole.phase)
+    assert all(c.hr_bpm.shape == (2, c.n_samples) for c in chunks)
+    again = list(iter_signal_chunks(2, minutes=100, chunk_minutes=30, step_seconds=7))
+    assert all(np.array_equal(a.hr_bpm, b.hr_bpm) for a, b in zip(chunks, again))
+    assert not np.array_equal(chunks[0].hr_bpm[:, :100], chunks[1].hr_bpm[:, :100])
+
+
+def test_tz_aware_start():
+    tz = timezone(timedelta(hours=3))
+    s = generate_signals(minutes=5, start=START.replace(tzinfo=tz))
+    samples = s.raw_samples()
+    assert samples[0].timestamp == START.replace(tzinfo=tz)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        times = s.timestamps()
+    assert times[0] == np.datetime64(START - timedelta(hours=3), "us")
+
+
+def test_empty_output():
+    s = generate_signals(n_wearers=2, minutes=0)
+    assert s.hr_bpm.shape == (2, 0) and s.n_samples == 0
+    assert s.raw_samples() == [] and list(s.iter_raw_batches()) == []
+    assert s.timestamps().shape == (0,)
+    assert list(iter_signal_chunks(2, minutes=0)) == []
@@ -0,0 +1,150 @@
+# alma/tests/test_signal_streams.py
+
+from datetime import timedelta, timezone
+import math
+import random
+
+import pytest
+
+from alma.cadence_layer import CadenceConfig
+from alma.codec import to_epoch_us
+from alma.signal_streams import SignalStore, SignalStream, build_stream_windows
+
+from signals import START, wearer_samples
+
+
+def naive_windows(raw, config):
+    """
+    Per-window recompute over plain lists: (start_us, {stream: stats}).
+    """
+    points = [t for pts in raw.values() for t, _ in pts]
+    if not points:
+        return []
+    origin, last = min(points), max(points)
+    size, step = round(config.window_size * 1e6), round(config.step_size * 1e6)
+    out = []
+    for k in range((last - origin) // step + 1):
+        start = origin + k * step
+        stats = {}
+        for sid, pts in raw.items():
+            seg = [v for t, v in pts if start <= t < start + size]
+            if seg:
+                mean = math.fsum(seg) / len(seg)
+                std = math.sqrt(math.fsum((v - mean) ** 2 for v in seg) / len(seg))
+                stats[sid] = (len(seg), mean, std, min(seg), max(seg))
+        if stats:
+            out.append((start, stats))
+    return out
+
+
+def as_tuples(windows):
+    return [
+        (to_epoch_us(w.window_start),
+         {sid: (s.count, s.mean, s.std, s.min, s.max) for sid, s in w.stats.items()})
+        for w in windows
+    ]
+
+
+def assert_close(got, expected):
+    assert len(got) == len(expected)
+    for (ga, gs), (ea, es) in zip(got, expected):
+        assert ga == ea and list(gs) == list(es)
+        for sid in gs:
+            assert gs[sid][0] == es[sid][0]
+            assert gs[sid][1:] == pytest.approx(es[sid][1:], rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_naive_recompute_on_random_streams(seed):
+    rnd = random.Random(seed)
+    config = CadenceConfig(window_size=rnd.choice([1, 5, 7.5, 60]), step_size=rnd.choice([1, 2.5, 5, 60]))
+    store, raw = SignalStore(), {}
+    for sid in range(rnd.randint(1, 4)):
+        t, pts = rnd.randint(0, 10**7), []
+        for _ in range(rnd.randint(0, 80)):
+            t += int(rnd.choice([0, 1000, 10**6, 3 * 10**6, 10**8]) * rnd.random())
+            pts.append((t, rnd.gauss(10, 3)))
+        store.stream("m", f"s{sid}").extend_us([p[0] for p in pts], [p[1] for p in pts])
+        raw[f"s{sid}"] = pts
+    assert_close(as_tuples(store.windows("m", config)), naive_windows(raw, config))
+
+
+def test_matches_naive_recompute_on_generated_signals():
+    config = CadenceConfig(window_size=120, step_size=30)
+    store, raw = SignalStore(), {"hr": [], "rr": [], "accel": []}
+    for s in wearer_samples(minutes=180):
+        us = to_epoch_us(s.timestamp)
+        for sid, value in (("hr", s.hr_bpm), ("rr", s.rr_ms), ("accel", s.accel_mg)):
+            if value is not None:
+                store.append("w", sid, s.timestamp, value)
+                raw[sid].append((us, value))
+    assert_close(as_tuples(store.windows("w", config)), naive_windows(raw, config))
+
+
+def test_slices_point_at_the_window_samples():
+    s = SignalStream("hr")
+    s.extend_us(range(0, 10 * 10**6, 10**6), [float(i) for i in range(10)])
+    windows = build_stream_windows([s], CadenceConfig(window_size=4, step_size=3))
+    for w in windows:
+        lo, hi = w.slices["hr"]
+        assert list(s.values[lo:hi]) == [v for us, v in zip(s.timestamps_us, s.values)
+                                         if to_epoch_us(w.window_start) <= us < to_epoch_us(w.window_end)]
+
+
+def test_std_is_exact_for_large_offsets():
+    s = SignalStream("counter")
+    s.extend_us(range(0, 60 * 10**6, 10**6), [1e9 + 0.5 * (i % 2) for i in range(60)])
+    (w,) = build_stream_windows([s], CadenceConfig(window_size=60, step_size=60))
+    assert w.stats["counter"].std == 0.25
+    assert w.stats["counter"].mean == 1e9 + 0.25
+
+
+def test_empty_input():
+    assert build_stream_windows([]) == []
+    assert build_stream_windows({"hr": SignalStream("hr")}) == []
+    store = SignalStore()
+    assert store.windows("nobody") == []
+    # an empty stream next to a filled one gets slices but no stats
+    filled = SignalStream("hr")
+    filled.append(START, 60.0)
+    (w,) = build_stream_windows([filled, SignalStream("hrv")])
+    assert list(w.stats) == ["hr"]
+
+
+def test_gaps_skip_empty_windows():
+    s = SignalStream("hr")
+    s.extend_us([0, 10**6, 10**10], [1.0, 2.0, 3.0])
+    windows = build_stream_windows([s], CadenceConfig(window_size=60, step_size=60))
+    assert [w.stats["hr"].count for w in windows] == [2, 1]
+
+
+def test_out_of_order_samples_raise():
+    s = SignalStream("hr")
+    s.append(START, 60.0)
+    with pytest.raises(ValueError):
+        s.append(START - timedelta(seconds=1), 61.0)
+    with pytest.raises(ValueError):
+        s.extend_us([to_epoch_us(START) + 2, to_epoch_us(START) + 1], [1.0, 2.0])
+    with pytest.raises(ValueError):
+        s.extend_us([to_epoch_us(START) + 2], [1.0, 2.0])
+    assert len(s) == 1
+
+
+def test_tz_aware_timestamps_are_stored_as_utc():
+    aware = SignalStream("hr")
+    naive = SignalStream("hr")
+    tz = timezone(timedelta(hours=2))
+    for i in range(5):
+        ts = START + timedelta(seconds=i)
+        naive.append(ts, float(i))
+        aware.append(ts.replace(tzinfo=timezone.utc).astimezone(tz), float(i))
+    assert list(aware.timestamps_us) == list(naive.timestamps_us)
+    assert as_tuples(build_stream_windows([aware])) == as_tuples(build_stream_windows([naive]))
+
+
+@pytest.mark.parametrize("config", [CadenceConfig(window_size=0), CadenceConfig(step_size=-1)])
+def test_invalid_config(config):
+    s = SignalStream("hr")
+    s.append(START, 1.0)
+    with pytest.raises(ValueError):
+        build_stream_windows([s], config)
@@ -0,0 +1,118 @@
+# alma/tests/test_snapshot.py
+
+from datetime import timedelta, timezone
+import os
+import stat
+
+import pytest
+
+from alma.cadence_layer import windows_to_cadence_points
+from alma.dejavu_layer import run_dejavu_pipeline
+from alma.interpretation_layer import interpret_state
+from alma.snapshot import (
+    Snapshot,
+    read_results,
+    read_summaries,
+    read_windows,
+    write_results,
+    write_summaries,
+    write_windows,
+)
+
+from signals import scaled_windows, wearer_windows
+
+
+def _aware(windows):
+    tz = timezone(timedelta(hours=-5))
+    for w in windows:
+        w.window_start = w.window_start.replace(tzinfo=timezone.utc).astimezone(tz)
+        w.window_end = w.window_end.replace(tzinfo=timezone.utc).astimezone(tz)
+    return windows
+
+
+@pytest.mark.parametrize("aware", [False, True])
+def test_round_trip_on_generated_signals(tmp_path, aware):
+    windows = wearer_windows(minutes=600)
+    if aware:
+        windows = _aware(windows)
+    summaries = run_dejavu_pipeline(windows)
+    results = interpret_state(windows_to_cadence_points(windows), windows, summaries)
+
+    write_windows(str(tmp_path / "w.snap"), windows)
+    write_summaries(str(tmp_path / "s.snap"), summaries)
+    write_results(str(tmp_path / "r.snap"), results)
+
+    got_windows = read_windows(str(tmp_path / "w.snap"))
+    got_summaries = read_summaries(str(tmp_path / "s.snap"))
+    got_results = read_results(str(tmp_path / "r.snap"))
+    assert got_windows == windows
+    assert got_summaries == summaries
+    assert got_results == results
+    assert all((w.window_end.tzinfo is not None) == aware for w in got_windows)
+    if aware:
+        assert got_windows[0].window_end.utcoffset() == timedelta(0)
+
+
+def test_round_trip_with_missing_features_and_unsorted_rows(tmp_path):
+    windows = scaled_windows(200, seed=3, shuffle=True)
+    path = str(tmp_path / "w.snap")
+    write_windows(path, windows)
+    assert read_windows(path) == windows
+
+
+def test_strongest_match_stays_one_of_its_matches(tmp_path):
+    summaries = run_dejavu_pipeline(scaled_windows(300, seed=1))
+    path = str(tmp_path / "s.snap")
+    write_summaries(path, summaries)
+    for s in read_summaries(path):
+        if s.matches:
+            assert s.strongest_match is s.matches[0]
+        else:
+            assert s.strongest_match is None
+
+
+def test_empty_tables(tmp_path):
+    for write, read in ((write_windows, read_windows), (write_summaries, read_summaries),
+                        (write_results, read_results)):
+        path = str(tmp_path / f"{write.__name__}.snap")
+        write(path, [])
+        assert read(path) == []
+
+
+def test_write_is_synced_and_atomic(tmp_path, monkeypatch):
+    events = []
+    real_fsync, real_replace = os.fsync, os.replace
+
+    def fsync(fd):
+        events.append("fsync dir" if stat.S_ISDIR(os.fstat(fd).st_mode) else "fsync file")
+        real_fsync(fd)
+
+    def replace(src, dst):
+        events.append("replace")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    monkeypatch.setattr(os, "replace", replace)
+    write_windows(str(tmp_path / "w.snap"), scaled_windows(10))
+    assert events == ["fsync file", "replace", "fsync dir"]
+    assert os.listdir(tmp_path) == ["w.snap"]
+
+
+def test_rejects_damaged_files(tmp_path):
+    path = str(tmp_path / "w.snap")
+    write_windows(path, scaled_windows(50))
+    data = open(path, "rb").read()
+
+    with pytest.raises(ValueError, match="kind"):
+        read_summaries(path)
+
+    for name, content, message in (
+        ("short", data[:10], "truncated header"),
+        ("magic", b"X" + data[1:], "not an ALMA snapshot"),
+        ("torn", data[: len(data) - 8], "truncated column"),
+    ):
+        broken = str(tmp_path / name)
+        with open(broken, "wb") as f:
+            f.write(content)
+        with pytest.raises(ValueError, match=message):
+            Snapshot(broken)
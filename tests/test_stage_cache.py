@@ -0,0 +1,83 @@
+# alma/tests/test_stage_cache.py
+
+from datetime import timezone
+import os
+
+import pytest
+
+from alma.dejavu_layer import DejaVuConfig
+from alma.pipeline import AlmaPipelineConfig, dejavu_stage, interpretation_stage
+from alma.stage_cache import FEATURES, StageCache, cached_analysis_stage, window_digest
+
+from signals import wearer_windows
+
+
+CONFIG = AlmaPipelineConfig()
+
+
+@pytest.fixture(scope="module")
+def windows():
+    return wearer_windows(minutes=60 * 24)
+
+
+def uncached(windows, config=CONFIG):
+    return list(interpretation_stage(dejavu_stage(windows, config.dejavu_config()),
+                                     config.interpretation_config()))
+
+
+def disk_entries(cache):
+    return sum(1 for shelf in (cache._disk, cache._previous)
+               for k in shelf.keys() if not k.startswith(("meta:", "config:")))
+
+
+def test_matches_uncached_pipeline_in_memory(windows):
+    cache = StageCache()
+    assert list(cached_analysis_stage(windows, cache)) == uncached(windows)
+    assert list(cached_analysis_stage(windows, cache)) == uncached(windows)
+    assert cache.stats()[FEATURES]["hits"] == len(windows)
+
+
+def test_rerun_from_disk(tmp_path, windows):
+    path = str(tmp_path / "cache")
+    with StageCache(path=path) as cache:
+        assert list(cached_analysis_stage(windows, cache)) == uncached(windows)
+    with StageCache(path=path) as cache:
+        assert list(cached_analysis_stage(windows, cache)) == uncached(windows)
+        assert all(s["misses"] == 0 for s in cache.stats().values())
+
+
+def test_overlapping_reruns_hit_with_small_bounds(tmp_path, windows):
+    # each run covers 300 windows and moves on by 100; one run writes
+    # ~900 entries, more than the disk tier keeps per generation
+    path = str(tmp_path / "cache")
+    for night in range(6):
+        part = windows[night * 100: night * 100 + 300]
+        with StageCache(max_entries=250, path=path, max_disk_entries=1000) as cache:
+            assert list(cached_analysis_stage(part, cache)) == uncached(part)
+            assert disk_entries(cache) <= 1000
+            if night:
+                assert cache.stats()[FEATURES]["hits"] >= 150
+
+
+def test_config_change_drops_entries(tmp_path, windows):
+    path = str(tmp_path / "cache")
+    other = AlmaPipelineConfig(dejavu=DejaVuConfig(similarity_threshold=0.9))
+    part = windows[:100]
+    with StageCache(path=path) as cache:
+        list(cached_analysis_stage(part, cache))
+    with StageCache(path=path) as cache:
+        assert list(cached_analysis_stage(part, cache, other)) == uncached(part, other)
+        assert cache.stats()[FEATURES]["hits"] == 0
+
+
+def test_digest_tells_tz_aware_from_naive(windows):
+    w = windows[0]
+    aware = type(w)(**{**w.__dict__, "window_start": w.window_start.replace(tzinfo=timezone.utc),
+                       "window_end": w.window_end.replace(tzinfo=timezone.utc)})
+    assert window_digest(aware) != window_digest(w)
+
+
+def test_empty_input(tmp_path):
+    with StageCache(path=str(tmp_path / "cache")) as cache:
+        assert list(cached_analysis_stage([], cache)) == []
+    assert any(name.startswith("cache.0") for name in os.listdir(tmp_path))
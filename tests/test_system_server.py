@@ -0,0 +1,112 @@
+# alma/tests/test_system_server.py
+
+from datetime import datetime, timedelta, timezone
+import http.client
+import json
+
+import pytest
+
+from alma.event_log import EventLog, format_timestamp
+from alma.interpretation_layer import InterpretationLabel, InterpretationResult
+from alma.rate_limiter import RateLimit, RateLimiter
+from alma.request_auth import RequestVerifier
+from alma.system_server import SystemServer
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**kwargs) -> SystemServer:
+        server = SystemServer(**kwargs)
+        server.start_in_thread()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop_thread()
+
+
+def get(server, path, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    try:
+        conn.request("GET", path, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_state_snapshot(serve):
+    server = serve()
+    assert get(server, "/state") == (503, {"status": "ERROR", "error": "ERROR_NO_STATE"})
+    ts = datetime(2025, 1, 1)
+    server.publish_result(InterpretationResult(ts, int(InterpretationLabel.CALM_INDICATOR), 0.9), "s1")
+    status, body = get(server, "/state")
+    assert status == 200
+    assert body["system_state"]["labels"] == ["calm_indicator"]
+    assert body["system_state"]["session_id"] == "s1"
+
+
+def test_rate_limit_ignores_unverified_client_ids(serve):
+    limiter = RateLimiter({"/state": RateLimit(rate=0.001, burst=2.0)})
+    server = serve(rate_limiter=limiter)
+    codes = [get(server, "/state", {"X-Alma-Client-ID": f"spoof-{i}"})[0] for i in range(5)]
+    assert codes == [503, 503, 429, 429, 429]
+    assert len(limiter) == 1
+
+
+def test_verified_clients_are_limited_by_client_id(serve):
+    secrets = {"app": b"s1", "gateway": b"s2"}
+    verifier = RequestVerifier(secrets)
+    signer = RequestVerifier(secrets)
+    limiter = RateLimiter({"/state": RateLimit(rate=0.001, burst=1.0)})
+    server = serve(rate_limiter=limiter, verifier=verifier)
+
+    def signed(client, seconds):
+        ts = format_timestamp(datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(seconds=seconds))
+        return {
+            "X-Alma-Client-ID": client,
+            "X-Alma-Timestamp": ts,
+            "X-Alma-Signature": signer.sign(client, ts),
+        }
+
+    assert get(server, "/state") == (401, {"status": "ERROR", "error": "ERROR_MISSING_HEADERS"})
+    assert get(server, "/state", {"X-Alma-Client-ID": "app"})[1]["error"] == "ERROR_MISSING_HEADERS"
+    bad = dict(signed("app", 0), **{"X-Alma-Signature": "00" * 32})
+    assert get(server, "/state", bad)[1]["error"] == "ERROR_SIGNATURE_INVALID"
+
+    headers = signed("app", 0)
+    assert get(server, "/state", headers)[0] == 503
+    assert get(server, "/state", headers)[1]["error"] == "ERROR_REPLAY"
+    assert get(server, "/state", signed("app", 1))[0] == 429
+    assert get(server, "/state", signed("gateway", 0))[0] == 503
+
+
+class _BrokenLog:
+    def response_chunks(self, since, limit):
+        raise OSError("disk went away")
+
+
+def test_route_errors_answer_500_and_close(serve):
+    server = serve(event_log=_BrokenLog())
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=5)
+    try:
+        conn.request("GET", "/events")
+        response = conn.getresponse()
+        assert response.status == 500
+        assert response.getheader("Connection") == "close"
+        assert json.loads(response.read()) == {"status": "ERROR", "error": "ERROR_INTERNAL"}
+    finally:
+        conn.close()
+    status, body = get(server, "/health")
+    assert status == 200
+    assert "OSError: disk went away" in body["last_error"]
+
+
+@pytest.mark.parametrize("query", ["since=garbage", "limit=x", "since=0001-01-01T00:00:00%2B01:00"])
+def test_bad_events_query_is_400(serve, tmp_path, query):
+    server = serve(event_log=EventLog(str(tmp_path)))
+    assert get(server, f"/events?{query}") == (400, {"status": "ERROR", "error": "ERROR_BAD_QUERY"})
+    assert get(server, "/health")[1]["last_error"] is None